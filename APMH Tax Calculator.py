@@ -1,658 +1,321 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from io import BytesIO
 from datetime import datetime
 
-# TAX CALCULATION FUNCTIONS (Final Corrected Version with Marginal Relief)
-def calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest=0):
-    # Salary – Apply standard deduction
-    if regime == 'new':
-        salary -= 75000
-    else:
-        salary -= 50000
-
-    # House Property – Apply 30% standard deduction THEN subtract loan interest
-    house_income *= 0.70
-    house_income -= house_loan_interest  # Deduct interest on house property loan
-
-    # Total income excluding capital gains
-    total = max(0, salary) + max(0, business_income) + max(0, house_income) + max(0, other_sources)
-    return total
-
-def calculate_surcharge_separate(tax_other, tax_cg, total_income, regime):
-    """Calculate surcharge separately for regular and CG income"""
-    
-    # Determine slab rate based on total income
-    if total_income > 50000000:
-        slab_rate = 0.37 if regime == "old" else 0.25
-    elif total_income > 20000000:
-        slab_rate = 0.25
-    elif total_income > 10000000:
-        slab_rate = 0.15
-    elif total_income > 5000000:
-        slab_rate = 0.10
-    else:
-        slab_rate = 0.00
-    
-    # Apply surcharge separately
-    surcharge_on_other = tax_other * slab_rate  # No cap
-    surcharge_on_cg = tax_cg * min(slab_rate, 0.15)  # Capped at 15%
-    
-    total_surcharge = surcharge_on_other + surcharge_on_cg
-    
-    return total_surcharge, slab_rate
-
-def calculate_tax_old_regime(total_income, stcg, ltcg):
-    # Base tax (normal income)
-    tax = 0
-    if total_income <= 250000:
-        tax = 0
-    elif total_income <= 500000:
-        tax = (total_income - 250000) * 0.05
-    elif total_income <= 1000000:
-        tax = 12500 + (total_income - 500000) * 0.2
-    else:
-        tax = 112500 + (total_income - 1000000) * 0.3
-
-    # Capital gains tax (separate calculation)
-    cg_tax = stcg * 0.20
-    if ltcg > 125000:
-        cg_tax += (ltcg - 125000) * 0.125
-
-    # Apply rebate ONLY to regular income tax (NOT capital gains)
-    rebate_applied = 0
-    total_taxable_income = total_income + stcg + ltcg
-    if total_taxable_income <= 500000:  # ₹5L limit
-        rebate_applied = min(12500, tax)  # Max ₹12.5K rebate on regular tax only
-        tax_after_rebate = max(0, tax - rebate_applied)
-    else:
-        tax_after_rebate = tax
-
-    # Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
-    total_tax_before_surcharge = tax_after_rebate + cg_tax
+from tax_engine import (
+    ADVANCE_TAX_THRESHOLD,
+    DEFAULT_ASSESSMENT_YEAR,
+    INSTALLMENT_SCHEDULE,
+    advance_tax_installments,
+    compute_tax,
+    create_computation_excel_report,
+    installment_due_dates,
+    timing,
+)
 
-    # Surcharge
-    surcharge, slab_rate = calculate_surcharge_separate(
-    tax_after_rebate, cg_tax, total_income + stcg + ltcg, "old"
+# pandas and plotly.express are imported where a table or chart is built, not
+# here: a first visit renders neither, and together they add about half a
+# second to every cold start.  See benchmarks/import_time.py.
+
+# CACHED COMPUTATIONS
+# Submitting the form re-executes this script (a widget inside a fragment
+# re-executes only that fragment, see below), so the calculations, figures
+# and tables below are memoized on the normalized inputs.  Streamlit's cache
+# keeps at most CACHE_MAX_ENTRIES results per function and evicts the least
+# recently used one, so revisiting a scenario costs a dictionary lookup.
+# Each builder is keyed on only what it depends on: neither the regime
+# selected in the form nor TDS changes the income mix, the break-even or the
+# what-if grid, so those take income_amounts(inputs) and a new regime or TDS
+# figure leaves them cached.
+CACHE_MAX_ENTRIES = 256
+
+def normalize_inputs(regime, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg, tds_paid):
+    """Cache key for one scenario - empty (None) inputs become 0.0"""
+    return (
+        regime,
+        float(salary or 0.0),
+        float(business_income or 0.0),
+        float(house_income or 0.0),
+        float(house_loan_interest or 0.0),
+        float(other_sources or 0.0),
+        float(stcg or 0.0),
+        float(ltcg or 0.0),
+        float(tds_paid or 0.0),
     )
 
-    # Cess
-    cess = (total_tax_before_surcharge + surcharge) * 0.04
-
-    return round(max(total_tax_before_surcharge, 0), 2), round(surcharge, 2), round(cess, 2), round(rebate_applied, 2), 0
-
-def calculate_tax_new_regime(total_income, stcg, ltcg):
-    # NEW REGIME TAX SLABS FOR FY 2024-25
-    slabs = [
-        (400000, 0.00),    # 0 to 4L: 0%
-        (400000, 0.05),    # 4L to 8L: 5%
-        (400000, 0.10),    # 8L to 12L: 10%
-        (400000, 0.15),    # 12L to 16L: 15%
-        (400000, 0.20),    # 16L to 20L: 20%
-        (400000, 0.25),    # 20L to 24L: 25%
-        (float('inf'), 0.30) # Above 24L: 30%
-    ]
-
-    # Step 1: Apply LTCG exemption of ₹1.25L first
-    exempt_ltcg = min(ltcg, 125000)
-    taxable_ltcg_after_exemption = max(0, ltcg - exempt_ltcg)
-
-    # Step 2: Calculate available basic exemption (₹4,00,000 for new regime)
-    basic_exemption_limit = 400000
-
-    # Step 3: Apply basic exemption in priority order
-    # Priority: 1. Other income, 2. STCG, 3. Taxable LTCG
-    remaining_exemption = basic_exemption_limit
-
-    # Use exemption for other income first
-    other_income_exempted = min(total_income, remaining_exemption)
-    remaining_exemption = max(0, remaining_exemption - other_income_exempted)
-    taxable_other_income = max(0, total_income - other_income_exempted)
-
-    # Use remaining exemption for STCG
-    stcg_exempted = min(stcg, remaining_exemption)
-    remaining_exemption = max(0, remaining_exemption - stcg_exempted)
-    taxable_stcg = max(0, stcg - stcg_exempted)
-
-    # Use remaining exemption for taxable LTCG
-    ltcg_exempted = min(taxable_ltcg_after_exemption, remaining_exemption)
-    final_taxable_ltcg = max(0, taxable_ltcg_after_exemption - ltcg_exempted)
-
-    # Step 4: Calculate tax on REGULAR income starting from appropriate slab
-    regular_tax = 0
-    if taxable_other_income > 0:
-        exemption_used_from_regular = other_income_exempted
-        if exemption_used_from_regular >= 400000:
-            # Full ₹4L exemption used from regular income
-            # Start from ₹4L-8L slab (index 1)
-            income_remaining = taxable_other_income
-            # Apply slabs starting from 4L-8L (5%)
-            for i in range(1, len(slabs)):  # Start from index 1 (₹4L-8L slab)
-                slab_limit, rate = slabs[i]
-                if income_remaining <= 0:
-                    break
-                taxable_in_slab = min(income_remaining, slab_limit)
-                regular_tax += taxable_in_slab * rate
-                income_remaining -= taxable_in_slab
-        else:
-            # Partial exemption used from regular income
-            remaining_in_first_slab = 400000 - exemption_used_from_regular
-            income_remaining = taxable_other_income
-
-            # If there's still room in the 0% slab
-            if remaining_in_first_slab > 0:
-                tax_free_amount = min(income_remaining, remaining_in_first_slab)
-                income_remaining -= tax_free_amount
-
-            # Apply remaining slabs
-            for i in range(1, len(slabs)):
-                if income_remaining <= 0:
-                    break
-                slab_limit, rate = slabs[i]
-                taxable_in_slab = min(income_remaining, slab_limit)
-                regular_tax += taxable_in_slab * rate
-                income_remaining -= taxable_in_slab
-
-    # Step 5: Calculate capital gains tax separately
-    cg_tax = taxable_stcg * 0.20 + final_taxable_ltcg * 0.125
-
-    # Step 6: Apply rebate ONLY to regular income tax (NOT capital gains)
-    rebate_applied = 0
-    total_taxable_income = total_income + stcg + ltcg
-    if total_taxable_income <= 1200000:  # ₹12L limit
-        rebate_applied = min(60000, regular_tax)  # Max ₹60K rebate on regular tax only
-        regular_tax_after_rebate = max(0, regular_tax - rebate_applied)
-    else:
-        regular_tax_after_rebate = regular_tax
-
-    # Step 7: Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
-    total_tax_before_surcharge = regular_tax_after_rebate + cg_tax
+def income_amounts(inputs):
+    """The seven income amounts of a scenario, without the regime and TDS"""
+    return inputs[1:8]
 
-    # Step 8: Apply Marginal Relief for income between ₹12L to ₹12.6L
-    marginal_relief_applied = 0
-    total_taxable_income = total_income + stcg + ltcg
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def compute_tax_cached(inputs):
+    """The single TaxComputation shared by results, charts, advance tax and Excel"""
+    return compute_tax(*inputs)
 
-    if 1200000 < total_taxable_income <= 1260000:
-        # Calculate tax without rebate for marginal relief comparison
-        tax_without_rebate = regular_tax + cg_tax
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_income_pie_chart(amounts):
+    """Income component donut chart, or None when there is no income"""
+    salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg = amounts
 
-        # Marginal relief calculation
-        marginal_relief_amount = total_taxable_income - 1200000
-
-        # Apply marginal relief - tax cannot exceed the excess over ₹12L
-        if total_tax_before_surcharge > marginal_relief_amount:
-            marginal_relief_applied = total_tax_before_surcharge - marginal_relief_amount
-            total_tax_before_surcharge = marginal_relief_amount
-
-    # Step 9: Calculate surcharge
-    surcharge, slab_rate = calculate_surcharge_separate(
-    regular_tax_after_rebate, cg_tax, total_income + stcg + ltcg, "new"
+    income_data = {
+        "Income Source": ["Salary", "Business", "House Property", "Other Sources", "STCG", "LTCG"],
+        "Amount": [salary, business_income, house_income, other_sources, stcg, ltcg]
+    }
+    if not any(amount > 0 for amount in income_data["Amount"]):
+        return None
+
+    stages = timing.stages('chart.income_pie') if timing.enabled else None
+    import pandas as pd
+    import plotly.express as px
+
+    df_income = pd.DataFrame(income_data)
+    df_income = df_income[df_income["Amount"] > 0]
+    if stages:
+        stages.mark('dataframe')
+
+    fig_pie = px.pie(
+        df_income,
+        values="Amount",
+        names="Income Source",
+        title="Income Distribution",
+        hole=0.4,
+        color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', '#F7DC6F']
     )
+    fig_pie.update_layout(title="Income Component Breakdown", height=400)
+    if stages:
+        stages.mark('figure')
+    return fig_pie
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_tax_component_chart(regular_tax_component, total_cg_tax):
+    """Bar chart of tax on other income vs tax on capital gains"""
+    stages = timing.stages('chart.tax_components') if timing.enabled else None
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    tax_data = {
+        "Tax Component": ["Tax on Other Income", "Tax on Capital Gains"],
+        "Tax Amount": [regular_tax_component, total_cg_tax]
+    }
 
-    # Step 10: Calculate cess
-    cess = (total_tax_before_surcharge + surcharge) * 0.04
-
-    return round(max(total_tax_before_surcharge, 0), 2), round(surcharge, 2), round(cess, 2), round(rebate_applied, 2), round(marginal_relief_applied, 2)
-
-# PROFESSIONAL EXCEL EXPORT WITH FIXED SYNTAX
-def create_professional_excel_report(salary, business_income, house_income, other_sources, stcg, ltcg, regime, house_loan_interest=0, tds_paid=0):
-    """Create Excel report with professional colors and improved visibility using xlsxwriter"""
-
-    # Calculate processed incomes
-    processed_salary = salary - (75000 if regime == 'new' else 50000)
-    processed_house = (house_income * 0.70) - house_loan_interest
-    total_income_calc = max(0, processed_salary) + max(0, business_income) + max(0, processed_house) + max(0, other_sources)
-
-    # Calculate tax
-    if regime == 'new':
-        tax, surcharge, cess, rebate, marginal_relief = calculate_tax_new_regime(total_income_calc, stcg, max(0, ltcg))
-    else:
-        tax, surcharge, cess, rebate, marginal_relief = calculate_tax_old_regime(total_income_calc, stcg, max(0, ltcg))
-    
-    total_tax = tax + surcharge + cess
-    
-    # Calculate Advance Tax Liability
-    net_tax_liability = max(0, total_tax - tds_paid)
-    advance_tax_applicable = net_tax_liability >= 10000
+    df_tax = pd.DataFrame(tax_data)
+    if stages:
+        stages.mark('dataframe')
+
+    # Create bar chart showing BOTH bars
+    fig_bar = go.Figure(data=[
+        go.Bar(
+            x=df_tax["Tax Component"],
+            y=df_tax["Tax Amount"],
+            marker_color=['#3498db', '#e74c3c'],
+            text=[f'₹{val:,.0f}' for val in df_tax["Tax Amount"]],
+            textposition='outside',
+            textfont=dict(size=12)
+        )
+    ])
+
+    fig_bar.update_layout(
+        title="Tax Breakdown: Other Income vs Capital Gains",
+        yaxis_title="Tax Amount (₹)",
+        xaxis_title="",
+        height=400,
+        showlegend=False
+    )
+    if stages:
+        stages.mark('figure')
+    return fig_bar
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_advance_tax_schedule(installments, net_liability):
+    """Schedule tables and chart for already computed quarterly installments"""
+    stages = timing.stages('chart.advance_tax') if timing.enabled else None
+    import pandas as pd
+    import plotly.express as px
+
+    q1_amt, q2_amt, q3_amt, q4_amt = installments
+
+    schedule_df = pd.DataFrame({
+        "Quarter": ["Q1", "Q2", "Q3", "Q4"],
+        "Due Date": ["15 June", "15 September", "15 December", "15 March"],
+        "Cumulative %": ["15%", "45%", "75%", "100%"],
+        "Installment Amount": [f"₹{q1_amt:,.0f}", f"₹{q2_amt:,.0f}", f"₹{q3_amt:,.0f}", f"₹{q4_amt:,.0f}"],
+        "Total Tax Paid": [f"₹{q1_amt:,.0f}", f"₹{q1_amt+q2_amt:,.0f}", f"₹{q1_amt+q2_amt+q3_amt:,.0f}", f"₹{net_liability:,.0f}"]
+    })
 
-    # Create Excel file in memory
-    output = BytesIO()
+    adv_df = pd.DataFrame({
+        "Quarter": ["Q1", "Q2", "Q3", "Q4"],
+        "Due Date": ["15th June", "15th September", "15th December", "15th March"],
+        "Cumulative %": ["15%", "45%", "75%", "100%"],
+        "Installment Amount (₹)": [f"₹{q1_amt:,.0f}", f"₹{q2_amt:,.0f}", f"₹{q3_amt:,.0f}", f"₹{q4_amt:,.0f}"],
+        "Cumulative Payable (₹)": [f"₹{q1_amt:,.0f}", f"₹{q1_amt + q2_amt:,.0f}", f"₹{q1_amt + q2_amt + q3_amt:,.0f}", f"₹{q1_amt + q2_amt + q3_amt + q4_amt:,.0f}"]
+    })
+    if stages:
+        stages.mark('dataframe')
+
+    fig_adv = px.bar(
+        x=["Q1 (June)", "Q2 (Sept)", "Q3 (Dec)", "Q4 (March)"],
+        y=[q1_amt, q2_amt, q3_amt, q4_amt],
+        title="Advance Tax Installments Payment Schedule",
+        labels={'x': 'Quarter', 'y': 'Amount Payable (₹)'},
+        text=[f"₹{x:,.0f}" for x in [q1_amt, q2_amt, q3_amt, q4_amt]]
+    )
+    fig_adv.update_traces(marker_color='#FF8C00', textposition='auto')
+    if stages:
+        stages.mark('figure')
+
+    return schedule_df, adv_df, fig_adv
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_regime_break_even(amounts, deductions):
+    """Break-even deduction, both regimes' tax at ``deductions`` and the two comparison charts"""
+    stages = timing.stages('chart.regime_break_even') if timing.enabled else None
+    import plotly.graph_objects as go
+    from tax_engine.planning import break_even_deduction, regime_tax_by_deduction, regime_tax_curves
+
+    salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg = amounts
+    amounts = dict(salary=salary, business_income=business_income, house_income=house_income,
+                   house_loan_interest=house_loan_interest, other_sources=other_sources, stcg=stcg, ltcg=ltcg)
+
+    break_even = break_even_deduction(**amounts)
+    new_tax, old_tax = regime_tax_by_deduction(deductions, **amounts)
+
+    # Tax against deductions claimed, up to past the break-even point
+    deduction_axis_max = max(2 * (break_even or 0), 2 * deductions, 500000)
+    deduction_axis = [deduction_axis_max * i / 1000 for i in range(1001)]
+    new_by_deduction, old_by_deduction = regime_tax_by_deduction(deduction_axis, **amounts)
+    curves = regime_tax_curves(deductions=deductions, **amounts)
+    if stages:
+        stages.mark('sweep')
+
+    fig_deductions = go.Figure([
+        go.Scatter(x=deduction_axis, y=new_by_deduction, name="New Regime", line=dict(color='#4169E1')),
+        go.Scatter(x=deduction_axis, y=old_by_deduction, name="Old Regime", line=dict(color='#FF8C00')),
+    ])
+    if break_even:
+        fig_deductions.add_vline(x=break_even, line_dash='dash', line_color='#2E8B57',
+                                 annotation_text=f"Break-even ₹{break_even:,.0f}")
+    fig_deductions.update_layout(title="Total Tax vs Old Regime Deductions", xaxis_title="Deductions (₹)",
+                                 yaxis_title="Total Tax (₹)", height=400)
+
+    fig_curves = go.Figure([
+        go.Scatter(x=curves['salary'], y=curves['new_tax'], name="New Regime", line=dict(color='#4169E1')),
+        go.Scatter(x=curves['salary'], y=curves['old_tax'], name="Old Regime", line=dict(color='#FF8C00')),
+    ])
+    if salary > 0:
+        fig_curves.add_vline(x=salary, line_dash='dot', line_color='#666', annotation_text="Your salary")
+    fig_curves.update_layout(title=f"Total Tax vs Salary (old regime after ₹{deductions:,.0f} deductions)",
+                             xaxis_title="Gross Salary (₹)", yaxis_title="Total Tax (₹)", height=400)
+    if stages:
+        stages.mark('figure')
+
+    return break_even, float(new_tax), float(old_tax), fig_deductions, fig_curves
+
+# Sections the savings plan can invest in, with their labels
+SAVINGS_SECTION_LABELS = {
+    "section_80c": "80C (PF, PPF, ELSS, insurance)",
+    "section_80ccd_1b": "80CCD(1B) (NPS)",
+    "section_80d_self": "80D (self & family)",
+    "section_80d_parents": "80D (parents)",
+}
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_savings_plan(amounts, claims, budget):
+    """Allowed old-regime deductions for ``claims`` and the cheapest way to invest ``budget``"""
+    from tax_engine.deductions import allocate_savings, old_regime_deductions
+
+    claims = dict(claims)
+    deductions = old_regime_deductions(**claims)
+    plan = allocate_savings(budget, *amounts, claimed=deductions, senior_self=claims['senior_self'],
+                            senior_parents=claims['senior_parents'])
+    return ({field: float(value) for field, value in deductions.items()},
+            {field: values[0].item() for field, values in plan.items()})
+
+# Inputs the what-if heatmap can vary, with their form labels
+WHAT_IF_FIELDS = {
+    "salary": "Salary Income",
+    "business_income": "Business/Professional Income",
+    "house_income": "House Property Income",
+    "house_loan_interest": "Interest on House Property Loan",
+    "other_sources": "Other Sources Income",
+    "stcg": "Short-Term Capital Gains",
+    "ltcg": "Long-Term Capital Gains",
+}
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_what_if_heatmaps(amounts, x_field, x_range, y_field, y_range, size, metric):
+    """New regime, old regime and old-minus-new heatmaps of ``metric`` over one grid definition"""
+    stages = timing.stages('chart.what_if') if timing.enabled else None
+    import numpy as np
+    import plotly.graph_objects as go
+    from tax_engine.planning import what_if_grid
+
+    salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg = amounts
+    grid = what_if_grid(x_field, np.linspace(*x_range, size), y_field, np.linspace(*y_range, size),
+                        salary=salary, business_income=business_income, house_income=house_income,
+                        house_loan_interest=house_loan_interest, other_sources=other_sources, stcg=stcg, ltcg=ltcg)
+    if stages:
+        stages.mark('grid')
+
+    values = grid[metric]
+    unit = "%" if metric == 'effective_rate' else "₹"
+    value_format = "%{z:.2f}%" if metric == 'effective_rate' else "₹%{z:,.0f}"
+    hover = (f"{WHAT_IF_FIELDS[x_field]}: ₹%{{x:,.0f}}<br>{WHAT_IF_FIELDS[y_field]}: ₹%{{y:,.0f}}"
+             f"<br>{value_format}<extra></extra>")
+
+    def heatmap(z, title, colorscale, **trace_options):
+        # float32 z is sent to the browser as binary, half the size of float64
+        fig = go.Figure(go.Heatmap(x=grid['x'], y=grid['y'], z=z.astype(np.float32), colorscale=colorscale,
+                                   colorbar=dict(title=unit), hovertemplate=hover, **trace_options))
+        fig.update_layout(title=title, xaxis_title=f"{WHAT_IF_FIELDS[x_field]} (₹)",
+                          yaxis_title=f"{WHAT_IF_FIELDS[y_field]} (₹)", height=450)
+        return fig
+
+    label = "Effective Rate" if metric == 'effective_rate' else "Total Tax"
+    fig_new = heatmap(values['new'], f"New Regime - {label}", 'Blues')
+    fig_old = heatmap(values['old'], f"Old Regime - {label}", 'Oranges')
+    fig_diff = heatmap(values['old'] - values['new'], f"Old minus New - {label} (red: new regime is cheaper)",
+                       'RdBu_r', zmid=0)
+    if stages:
+        stages.mark('figure')
+    return fig_new, fig_old, fig_diff
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_income_simulation(inputs, ranges, samples, confidence):
+    """Simulated liability summary and histogram for (low, most likely, high) income ranges"""
+    stages = timing.stages('chart.income_simulation') if timing.enabled else None
+    import numpy as np
+    import plotly.graph_objects as go
+    from tax_engine.simulation import simulate_advance_tax
+
+    regime, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg, tds_paid = inputs
+    simulation = simulate_advance_tax(
+        regime, dict(ranges), salary=salary, business_income=business_income, house_income=house_income,
+        house_loan_interest=house_loan_interest, other_sources=other_sources, stcg=stcg, ltcg=ltcg,
+        tds_paid=tds_paid, samples=samples, confidence=confidence)
+    if stages:
+        stages.mark('simulation')
+
+    # Binned here, so the chart carries 60 bars rather than every sample
+    counts, edges = np.histogram(simulation.pop('net_tax_liability'), bins=60)
+    fig_sim = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts / samples * 100,
+                               marker_color='#4169E1', hovertemplate="₹%{x:,.0f}: %{y:.2f}%<extra></extra>"))
+    fig_sim.add_vline(x=simulation['planned_liability'], line_dash='dash', line_color='#FF8C00',
+                      annotation_text=f"Plan (P{confidence})")
+    fig_sim.update_layout(title="Simulated Net Tax Liability", xaxis_title="Net Tax Liability (₹)",
+                          yaxis_title="Share of Samples (%)", height=400, bargap=0.05)
+    if stages:
+        stages.mark('figure')
+    return simulation, fig_sim
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    """On-disk cache of computations and Excel reports shared by every session (None if it cannot be opened)"""
+    import sqlite3
+    from tax_engine.cache import ResultCache
 
     try:
-        import xlsxwriter
-
-        # Create workbook with xlsxwriter for guaranteed formatting
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        worksheet = workbook.add_worksheet('Income Tax Computation')
-
-        # Define IMPROVED professional formats with better visibility
-        title_format = workbook.add_format({
-            'bold': True,
-            'font_size': 18,
-            'align': 'center',
-            'valign': 'vcenter',
-            'bg_color': '#003366',
-            'font_color': '#FFFFFF',
-            'border': 2,
-            'border_color': '#000000'
-        })
-
-        header_format = workbook.add_format({
-            'bold': True,
-            'font_size': 13,
-            'align': 'center',
-            'valign': 'vcenter',
-            'bg_color': '#0066CC',
-            'font_color': '#FFFFFF',
-            'border': 1,
-            'border_color': '#000000'
-        })
-
-        section_format = workbook.add_format({
-            'bold': True,
-            'font_size': 14,
-            'align': 'center',
-            'valign': 'vcenter',
-            'bg_color': '#8B0000',
-            'font_color': '#FFFFFF',
-            'border': 1,
-            'border_color': '#000000'
-        })
-
-        # FIXED bullet format with WHITE text on ORANGE background for maximum visibility
-        bullet_format = workbook.add_format({
-            'bold': True,
-            'font_size': 12,
-            'align': 'left',
-            'valign': 'vcenter',
-            'bg_color': '#FF8C00',
-            'font_color': '#FFFFFF',
-            'border': 1,
-            'border_color': '#000000'
-        })
-
-        data_format = workbook.add_format({
-            'font_size': 10,
-            'align': 'left',
-            'valign': 'vcenter',
-            'border': 1,
-            'border_color': '#000000'
-        })
-
-        amount_format = workbook.add_format({
-            'font_size': 10,
-            'bold': True,
-            'align': 'right',
-            'valign': 'vcenter',
-            'num_format': '₹#,##0.00',
-            'border': 1,
-            'border_color': '#000000'
-        })
-
-        center_format = workbook.add_format({
-            'font_size': 10,
-            'align': 'center',
-            'valign': 'vcenter',
-            'border': 1,
-            'border_color': '#000000'
-        })
-
-        total_format = workbook.add_format({
-            'font_size': 11,
-            'bold': True,
-            'align': 'right',
-            'valign': 'vcenter',
-            'num_format': '₹#,##0.00',
-            'bg_color': '#E8F4FD',
-            'border': 1,
-            'border_color': '#000000'
-        })
-        
-        negative_format = workbook.add_format({
-            'font_size': 11,
-            'bold': True,
-            'align': 'right',
-            'valign': 'vcenter',
-            'num_format': '"- "₹#,##0.00',
-            'bg_color': '#E8F4FD',
-            'border': 1,
-            'border_color': '#000000',
-            'font_color': 'red'
-        })
-
-        # Set column widths
-        worksheet.set_column('A:A', 50)
-        worksheet.set_column('B:B', 20)
-        worksheet.set_column('C:C', 18)
-        worksheet.set_column('D:D', 20)
-
-        row = 0
-
-        # Column headers
-        worksheet.write(row, 0, 'Particulars', header_format)
-        worksheet.write(row, 1, 'Details', header_format)
-        worksheet.write(row, 2, 'Sub-total', header_format)
-        worksheet.write(row, 3, 'Total', header_format)
-        row += 1
-
-        # Main title
-        worksheet.merge_range(f'A{row+1}:D{row+1}', 'INCOME TAX COMPUTATION - A.Y. 2026-27', title_format)
-        row += 2
-
-        # Statement of Income header
-        worksheet.merge_range(f'A{row+1}:D{row+1}', 'STATEMENT OF INCOME', section_format)
-        row += 2
-
-        # Income sources with improved visibility
-        if salary > 0:
-            worksheet.merge_range(f'A{row+1}:D{row+1}', '● INCOME FROM SALARY', bullet_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Salary Income', data_format)
-            worksheet.write(row, 1, salary, amount_format)
-            row += 1
-
-            worksheet.write(row, 0, f'Less: Standard deduction u/s 16(ia)', data_format)
-            worksheet.write(row, 1, 75000 if regime == 'new' else 50000, amount_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Net Income from Salary', data_format)
-            worksheet.write(row, 2, max(0, processed_salary), total_format)
-            row += 2
-
-        if house_income != 0:
-            worksheet.merge_range(f'A{row+1}:D{row+1}', '● INCOME FROM HOUSE PROPERTY', bullet_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Property Type', data_format)
-            worksheet.write(row, 1, 'Let-out property' if house_income > 0 else 'Self-occupied', data_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Gross annual value' if house_income > 0 else 'Deemed Rental', data_format)
-            worksheet.write(row, 1, abs(house_income) if house_income != 0 else 0, amount_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Less: Municipal taxes', data_format)
-            worksheet.write(row, 1, 0, amount_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Less: Standard deduction u/s 24(a)', data_format)
-            worksheet.write(row, 1, abs(house_income) * 0.30 if house_income != 0 else 0, amount_format)
-            row += 1
-
-            if house_loan_interest > 0:
-                worksheet.write(row, 0, 'Less: Interest on housing loan u/s 24(b)', data_format)
-                worksheet.write(row, 1, house_loan_interest, amount_format)
-                row += 1
-
-            worksheet.write(row, 0, 'Net Income from House Property', data_format)
-            worksheet.write(row, 2, processed_house, total_format)
-            row += 2
-
-        if business_income > 0:
-            worksheet.merge_range(f'A{row+1}:D{row+1}', '● PROFITS AND GAINS OF BUSINESS OR PROFESSION', bullet_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Business/Professional Income', data_format)
-            worksheet.write(row, 1, business_income, amount_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Net Income from Business/Profession', data_format)
-            worksheet.write(row, 2, business_income, total_format)
-            row += 2
-
-        if stcg > 0 or ltcg > 0:
-            worksheet.merge_range(f'A{row+1}:D{row+1}', '● CAPITAL GAINS', bullet_format)
-            row += 1
-
-            if stcg > 0:
-                worksheet.write(row, 0, 'Short Term Capital Gains', data_format)
-                worksheet.write(row, 1, stcg, amount_format)
-                row += 1
-
-            if ltcg > 0:
-                worksheet.write(row, 0, 'Long Term Capital Gains', data_format)
-                worksheet.write(row, 1, ltcg, amount_format)
-                row += 1
-
-                if ltcg > 125000:
-                    worksheet.write(row, 0, 'Less: Exemption u/s 112A', data_format)
-                    worksheet.write(row, 1, 125000, amount_format)
-                    row += 1
-
-            net_cg = stcg + max(0, ltcg - 125000)
-            worksheet.write(row, 0, 'Net Capital Gains', data_format)
-            worksheet.write(row, 2, net_cg, total_format)
-            row += 2
-
-        if other_sources > 0:
-            worksheet.merge_range(f'A{row+1}:D{row+1}', '● INCOME FROM OTHER SOURCES', bullet_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Interest Income', data_format)
-            worksheet.write(row, 1, other_sources, amount_format)
-            row += 1
-
-            worksheet.write(row, 0, 'Net Income from Other Sources', data_format)
-            worksheet.write(row, 2, other_sources, total_format)
-            row += 2
-
-        # Total Income - FIXED the syntax error here
-        gross_total = total_income_calc + stcg + max(0, ltcg)
-        worksheet.write(row, 0, 'Income chargeable under the head House Property', data_format)
-        worksheet.write(row, 3, gross_total, total_format)
-        row += 2
-
-        # Tax Computation
-        worksheet.merge_range(f'A{row+1}:D{row+1}', 'TAX COMPUTATION', section_format)
-        row += 2
-
-        worksheet.write(row, 0, f'Tax as per {regime.upper()} regime', data_format)
-        worksheet.write(row, 3, tax, total_format)
-        row += 1
-
-        if surcharge > 0:
-            worksheet.write(row, 0, 'Add: Surcharge', data_format)
-            worksheet.write(row, 3, surcharge, amount_format)
-            row += 1
-
-        if cess > 0:
-            worksheet.write(row, 0, 'Add: Health & Education Cess', data_format)
-            worksheet.write(row, 3, cess, amount_format)
-            row += 1
-
-        if rebate > 0:
-            worksheet.write(row, 0, 'Less: Rebate u/s 87A', data_format)
-            worksheet.write(row, 3, rebate, amount_format)
-            row += 1
-
-        if marginal_relief > 0:
-            worksheet.write(row, 0, 'Less: Marginal Relief', data_format)
-            worksheet.write(row, 3, marginal_relief, amount_format)
-            row += 1
-
-        worksheet.write(row, 0, 'TOTAL TAX LIABILITY', data_format)
-        worksheet.write(row, 3, total_tax, total_format)
-        row += 1
-        
-        # TDS and Net Payable
-        if tds_paid > 0:
-            worksheet.write(row, 0, 'Less: TDS / Advance Tax Paid', data_format)
-            worksheet.write(row, 3, tds_paid, amount_format)
-            row += 1
-            
-        net_tax_final = total_tax - tds_paid
-        final_label = 'NET TAX PAYABLE' if net_tax_final >= 0 else 'NET REFUND DUE'
-        final_fmt = total_format if net_tax_final >= 0 else negative_format
-        
-        worksheet.write(row, 0, final_label, data_format)
-        worksheet.write(row, 3, abs(net_tax_final), final_fmt)
-        row += 2
-        
-        # Advance Tax Schedule (New Section)
-        if advance_tax_applicable:
-            worksheet.merge_range(f'A{row+1}:D{row+1}', 'ADVANCE TAX LIABILITY SCHEDULE', section_format)
-            row += 2
-            
-            # Calculate Installments
-            q1_amt = round(net_tax_liability * 0.15)
-            q2_amt = round(net_tax_liability * 0.45) - q1_amt
-            q3_amt = round(net_tax_liability * 0.75) - (q1_amt + q2_amt)
-            q4_amt = round(net_tax_liability) - (q1_amt + q2_amt + q3_amt)
-            
-            # Table Headers
-            worksheet.write(row, 0, 'Quarter / Due Date', header_format)
-            worksheet.write(row, 1, 'Cumulative %', header_format)
-            worksheet.write(row, 2, 'Installment Amount', header_format)
-            worksheet.write(row, 3, 'Cumulative Payable', header_format)
-            row += 1
-            
-            installments = [
-                ("Q1 (Due: 15th June)", "15%", q1_amt, q1_amt),
-                ("Q2 (Due: 15th Sept)", "45%", q2_amt, q1_amt + q2_amt),
-                ("Q3 (Due: 15th Dec)", "75%", q3_amt, q1_amt + q2_amt + q3_amt),
-                ("Q4 (Due: 15th Mar)", "100%", q4_amt, q1_amt + q2_amt + q3_amt + q4_amt),
-            ]
-            
-            for label, pct, inst_amt, cum_amt in installments:
-                worksheet.write(row, 0, label, data_format)
-                worksheet.write(row, 1, pct, center_format)
-                worksheet.write(row, 2, inst_amt, amount_format)
-                worksheet.write(row, 3, cum_amt, amount_format)
-                row += 1
-            
-            worksheet.merge_range(f'A{row+1}:D{row+1}', 'Note: Interest u/s 234B/234C applicable if delayed.', bullet_format)
-
-        workbook.close()
-        output.seek(0)
-        return output
-
-    except ImportError:
-        # Fallback using pandas if xlsxwriter not available
-        import pandas as pd
-
-        # Create basic data structure with FIXED syntax
-        report_data = [
-            ["Particulars", "Details", "Sub-total", "Total"],
-            ["INCOME TAX COMPUTATION - A.Y. 2026-27", "", "", ""],
-            ["", "", "", ""],
-            ["STATEMENT OF INCOME", "", "", ""],
-            ["", "", "", ""]
-        ]
-
-        # Add income details (with FIXED syntax)
-        if salary > 0:
-            report_data.extend([
-                ["● INCOME FROM SALARY", "", "", ""],
-                ["Salary Income", f"₹{salary:,.2f}", "", ""],
-                [f"Less: Standard deduction u/s 16(ia)", f"₹{75000 if regime == 'new' else 50000:,.2f}", "", ""],
-                ["Net Income from Salary", "", f"₹{max(0, processed_salary):,.2f}", ""],
-                ["", "", "", ""]
-            ])
-
-        if house_income != 0:
-            report_data.extend([
-                ["● INCOME FROM HOUSE PROPERTY", "", "", ""],
-                ["Property Type", "Let-out property" if house_income > 0 else "Self-occupied", "", ""],
-                ["Gross annual value" if house_income > 0 else "Deemed Rental", f"₹{abs(house_income):,.2f}" if house_income != 0 else "₹0", "", ""],
-                ["Less: Municipal taxes", "₹0", "", ""],
-                ["Less: Standard deduction u/s 24(a)", f"₹{abs(house_income) * 0.30 if house_income != 0 else 0:,.2f}", "", ""]
-            ])
-            if house_loan_interest > 0:
-                report_data.append(["Less: Interest on housing loan u/s 24(b)", f"₹{house_loan_interest:,.2f}", "", ""])
-            report_data.extend([
-                ["Net Income from House Property", "", f"₹{processed_house:,.2f}", ""],
-                ["", "", "", ""]
-            ])
-
-        if business_income > 0:
-            report_data.extend([
-                ["● PROFITS AND GAINS OF BUSINESS OR PROFESSION", "", "", ""],
-                ["Business/Professional Income", f"₹{business_income:,.2f}", "", ""],
-                ["Net Income from Business/Profession", "", f"₹{business_income:,.2f}", ""],
-                ["", "", "", ""]
-            ])
-
-        if stcg > 0 or ltcg > 0:
-            report_data.extend([
-                ["● CAPITAL GAINS", "", "", ""]
-            ])
-            if stcg > 0:
-                report_data.append(["Short Term Capital Gains", f"₹{stcg:,.2f}", "", ""])
-            if ltcg > 0:
-                report_data.append(["Long Term Capital Gains", f"₹{ltcg:,.2f}", "", ""])
-                if ltcg > 125000:
-                    report_data.append(["Less: Exemption u/s 112A", f"₹{125000:,.2f}", "", ""])
-            net_cg = stcg + max(0, ltcg - 125000)
-            report_data.extend([
-                ["Net Capital Gains", "", f"₹{net_cg:,.2f}", ""],
-                ["", "", "", ""]
-            ])
-
-        if other_sources > 0:
-            report_data.extend([
-                ["● INCOME FROM OTHER SOURCES", "", "", ""],
-                ["Interest Income", f"₹{other_sources:,.2f}", "", ""],
-                ["Net Income from Other Sources", "", f"₹{other_sources:,.2f}", ""],
-                ["", "", "", ""]
-            ])
-
-        # Total Income - FIXED the syntax error here too
-        gross_total = total_income_calc + stcg + max(0, ltcg)
-        report_data.extend([
-            ["Income chargeable under the head House Property", "", "", f"₹{gross_total:,.2f}"],
-            ["", "", "", ""],
-            ["TAX COMPUTATION", "", "", ""],
-            [f"Tax as per {regime.upper()} regime", "", "", f"₹{tax:,.2f}"]
-        ])
-
-        if surcharge > 0:
-            report_data.append(["Add: Surcharge", "", "", f"₹{surcharge:,.2f}"])
-        if cess > 0:
-            report_data.append(["Add: Health & Education Cess", "", "", f"₹{cess:,.2f}"])
-        if rebate > 0:
-            report_data.append(["Less: Rebate u/s 87A", "", "", f"₹{rebate:,.2f}"])
-        if marginal_relief > 0:
-            report_data.append(["Less: Marginal Relief", "", "", f"₹{marginal_relief:,.2f}"])
-
-        total_tax = tax + surcharge + cess
-        report_data.append(["TOTAL TAX LIABILITY", "", "", f"₹{total_tax:,.2f}"])
-        
-        # TDS and Advance Tax in Pandas fallback
-        if tds_paid > 0:
-             report_data.append(["Less: TDS / Advance Tax Paid", "", "", f"₹{tds_paid:,.2f}"])
-        
-        net_val = total_tax - tds_paid
-        lbl = "NET TAX PAYABLE" if net_val >= 0 else "NET REFUND DUE"
-        report_data.append([lbl, "", "", f"₹{abs(net_val):,.2f}"])
-        
-        # Advance Tax Schedule in Pandas fallback
-        if advance_tax_applicable:
-             report_data.extend([
-                 ["", "", "", ""],
-                 ["ADVANCE TAX LIABILITY SCHEDULE", "", "", ""],
-                 ["Quarter / Due Date", "Cumulative %", "Installment", "Cumulative Payable"]
-             ])
-             
-             q1_amt = round(net_tax_liability * 0.15)
-             q2_amt = round(net_tax_liability * 0.45) - q1_amt
-             q3_amt = round(net_tax_liability * 0.75) - (q1_amt + q2_amt)
-             q4_amt = round(net_tax_liability) - (q1_amt + q2_amt + q3_amt)
-             
-             report_data.extend([
-                 ["Q1 (Due: 15th June)", "15%", f"₹{q1_amt:,.2f}", f"₹{q1_amt:,.2f}"],
-                 ["Q2 (Due: 15th Sept)", "45%", f"₹{q2_amt:,.2f}", f"₹{q1_amt + q2_amt:,.2f}"],
-                 ["Q3 (Due: 15th Dec)", "75%", f"₹{q3_amt:,.2f}", f"₹{q1_amt + q2_amt + q3_amt:,.2f}"],
-                 ["Q4 (Due: 15th Mar)", "100%", f"₹{q4_amt:,.2f}", f"₹{q1_amt + q2_amt + q3_amt + q4_amt:,.2f}"]
-             ])
-
-        df = pd.DataFrame(report_data)
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Income Tax Computation', index=False, header=False)
-
-        return output
+        return ResultCache()
+    except (OSError, sqlite3.Error):
+        return None
 
 st.set_page_config(
     page_title="APMH Tax Calculator", 
@@ -721,6 +384,12 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Opt-in timing (TAX_ENGINE_TIMING=1): every stage of this rerun, from the
+# tax engine to each tab, is collected and listed in the debug panel at the
+# bottom of the page
+timing_records = timing.start_collecting() if timing.enabled else None
+page_stages = timing.stages('page') if timing.enabled else None
+
 # Header
 st.markdown("""
     <div class="main-header">
@@ -729,25 +398,10 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# Sidebar for regime comparison
-with st.sidebar:
-    st.markdown("### 📊 Quick Regime Comparison")
-    st.info("""
-    **Old Regime Features:**
-    - Standard deduction (₹50,000)
-    - Multiple deductions available
-    - Basic exemption: ₹2.5L
-    - **Rebate: Up to ₹5L income, max ₹12.5K**
-    
-    **New Regime Features:**
-    - Higher standard deduction (₹75,000)
-    - Limited deductions
-    - Basic exemption: ₹4L
-    - **Rebate: Up to ₹12L income, max ₹60K**
-    - **🆕 Marginal Relief: ₹12L-₹12.6L income**
-    - **Smart CG exemption utilization**
-    """)
-    
+# Fragments: a widget inside one reruns only that function, with the
+# arguments it was last called with, instead of the whole script
+@st.fragment
+def regime_slabs_view():
     st.markdown("### 📈 Tax Slabs")
     regime_info = st.selectbox("View details for:", ["New Regime", "Old Regime"])
     
@@ -786,141 +440,56 @@ with st.sidebar:
         - **LTCG:** 12.5% (above ₹1.25L)
         """)
 
-# Main content area with tabs - UPDATED WITH 4TH TAB
-tab1, tab2, tab3, tab4 = st.tabs(["🧮 Calculate Tax", "📊 Analysis", "📅 Advance Tax", "📋 Tax Planning"])
-
-with tab1:
-    # Input form with enhanced styling
-    st.markdown("<h3 style='text-align: center;'>Use New Tax Regime For better results</h3>", unsafe_allow_html=True)
-
-    with st.form("tax_form"):
-        st.markdown("### 🔧 Tax Regime Selection")
-        regime = st.radio(
-            "Select Tax Regime",
-            ["new", "old"], # CHANGED: New regime is now first (default)
-            horizontal=True,
-            help="New regime: ₹4L basic exemption + ₹60K rebate + Marginal Relief | Old regime: ₹2.5L basic exemption + ₹12.5K rebate"
-        )
-
-        st.markdown("### 💰 Income Details")
-
-        # Create 3 columns for better layout
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.markdown("**Employment Income**")
-
-            salary = st.number_input(
-                "Salary Income (₹)",
-                min_value=0.0,
-                step=10000.0,
-                placeholder="Enter amount", # Placeholder added
-                value=None,                 # Value set to None
-                help="Enter your annual salary before standard deduction"
-            )
-
-            business_income = st.number_input(
-                "Business/Professional Income (₹)",
-                min_value=0.0,
-                step=10000.0,
-                placeholder="Enter amount", # Placeholder added
-                value=None,                 # Value set to None
-                help="Net business or professional income"
-            )
-
-        with col2:
-            st.markdown("**Property & Other Income**")
-
-            house_income = st.number_input(
-                "House Property Income (₹)",
-                min_value=0.0,
-                step=5000.0,
-                placeholder="Enter amount", # Placeholder added
-                value=None,                 # Value set to None
-                help="Net Annual Value (after municipal taxes)"
-            )
-
-            house_loan_interest = st.number_input(
-                "Interest on House Property Loan (₹)",
-                min_value=0.0,
-                step=5000.0,
-                placeholder="Enter amount", # Placeholder added
-                value=None,                 # Value set to None
-                help="Annual interest paid on loan for let-out or self-occupied property"
-            )
+# Sidebar for regime comparison
+with st.sidebar:
+    st.markdown("### 📊 Quick Regime Comparison")
+    st.info("""
+    **Old Regime Features:**
+    - Standard deduction (₹50,000)
+    - Multiple deductions available
+    - Basic exemption: ₹2.5L
+    - **Rebate: Up to ₹5L income, max ₹12.5K**
+    
+    **New Regime Features:**
+    - Higher standard deduction (₹75,000)
+    - Limited deductions
+    - Basic exemption: ₹4L
+    - **Rebate: Up to ₹12L income, max ₹60K**
+    - **🆕 Marginal Relief: ₹12L-₹12.6L income**
+    - **Smart CG exemption utilization**
+    """)
 
-            other_sources = st.number_input(
-                "Other Sources Income (₹)",
-                min_value=0.0,
-                step=5000.0,
-                placeholder="Enter amount", # Placeholder added
-                value=None,                 # Value set to None
-                help="Interest, dividends, etc."
-            )
+    regime_slabs_view()
 
-        with col3:
-            st.markdown("**Capital Gains & TDS**")
+if page_stages:
+    page_stages.mark('header_and_sidebar')
 
-            stcg = st.number_input(
-                "Short-Term Capital Gains (₹)",
-                min_value=0.0,
-                step=5000.0,
-                placeholder="Enter amount", # Placeholder added
-                value=None,                 # Value set to None
-                help="STCG from equity/mutual funds (20% tax rate)"
-            )
+# Main content area with tabs - UPDATED WITH 4TH TAB
+tab1, tab2, tab3, tab4 = st.tabs(["🧮 Calculate Tax", "📊 Analysis", "📅 Advance Tax", "📋 Tax Planning"])
 
-            ltcg = st.number_input(
-                "Long-Term Capital Gains (₹)",
-                min_value=0.0,
-                step=5000.0,
-                placeholder="Enter amount", # Placeholder added
-                value=None,                 # Value set to None
-                help="LTCG total amount (₹1.25L exemption + 12.5% tax)"
-            )
+@st.fragment
+def results_view(inputs, computation):
+    regime, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg, tds_paid = inputs
 
-            tds_paid = st.number_input(
-                "TDS/Advance Tax Paid (₹)",
-                min_value=0.0,
-                step=1000.0,
-                placeholder="Enter amount", # Placeholder added
-                value=None,                 # Value set to None
-                help="Total tax already paid or deducted at source"
-            )
+    if computation is not None:
+        import pandas as pd
 
-        # The submit button MUST be inside the form block
-        submitted = st.form_submit_button("🧮 Calculate Tax", use_container_width=True)
+        total_income = computation.total_income
+        base_tax = computation.base_tax
+        surcharge = computation.surcharge
+        cess = computation.cess
+        rebate_applied = computation.rebate_applied
+        marginal_relief_applied = computation.marginal_relief_applied
+        total_tax = computation.total_tax
+        total_taxable_income = computation.total_taxable_income
 
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    # Calculate and display results
-    if submitted:
-        # IMPORTANT: Convert any empty (None) inputs to 0.0 before calculating
-        salary = salary or 0.0
-        business_income = business_income or 0.0
-        house_income = house_income or 0.0
-        house_loan_interest = house_loan_interest or 0.0
-        other_sources = other_sources or 0.0
-        stcg = stcg or 0.0
-        ltcg = ltcg or 0.0
-        tds_paid = tds_paid or 0.0
-        
-        total_income = calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest)
-        
-        if regime == 'old':
-            base_tax, surcharge, cess, rebate_applied, marginal_relief_applied = calculate_tax_old_regime(total_income, stcg, ltcg)
-        else:
-            base_tax, surcharge, cess, rebate_applied, marginal_relief_applied = calculate_tax_new_regime(total_income, stcg, ltcg)
-        
-        total_tax = base_tax + surcharge + cess
-        net_tax = total_tax - tds_paid
-        total_taxable_income = total_income + stcg + ltcg
-        
         # Results with enhanced styling
         st.markdown('<div class="result-container">', unsafe_allow_html=True)
         st.markdown("### 📊 Tax Calculation Results")
         
-        # Create metrics in columns
-        col1, col2, col3, col4 = st.columns(4)
+        # Create metrics in columns (the amount payable after TDS is shown
+        # by tax_payable_view)
+        col1, col2, col3 = st.columns(3)
         
         with col1:
             st.metric(
@@ -942,15 +511,7 @@ with tab1:
                 f"₹{total_tax:,.0f}",
                 delta=f"Including surcharge & cess"
             )
-            
-        with col4:
-            status_emoji = "💵 Refund" if net_tax < 0 else "📌 Payable"
-            st.metric(
-                f"{status_emoji}",
-                f"₹{abs(net_tax):,.0f}",
-                delta=f"After TDS adjustment"
-            )
-        
+
         # Show rebate and marginal relief information
         if rebate_applied > 0 or marginal_relief_applied > 0:
             st.markdown("### 🎯 Tax Benefits Applied")
@@ -985,7 +546,7 @@ with tab1:
         # Show house property calculation breakdown
         if house_income > 0 or house_loan_interest > 0:
             st.markdown("### 🏠 House Property Income Breakdown")
-            net_house_income = (house_income * 0.70) - house_loan_interest
+            net_house_income = computation.processed_house
             
             house_breakdown = {
                 "Component": ["Gross Annual Value", "Less: 30% Standard Deduction", "Less: Interest on Loan", "Net House Property Income"],
@@ -1065,25 +626,24 @@ with tab1:
         
         # Detailed breakdown
         st.markdown("### 📋 Detailed Tax Breakdown")
-        breakdown_components = ["Base Tax", "Surcharge", "Cess", "Total Tax", "TDS Paid", "Net Amount"]
-        breakdown_amounts = [f"{base_tax:,.2f}", f"{surcharge:,.2f}", f"{cess:,.2f}", 
-                           f"{total_tax:,.2f}", f"{tds_paid:,.2f}", f"{abs(net_tax):,.2f}"]
+        breakdown_components = ["Base Tax", "Surcharge", "Cess", "Total Tax"]
+        breakdown_amounts = [f"{base_tax:,.2f}", f"{surcharge:,.2f}", f"{cess:,.2f}", f"{total_tax:,.2f}"]
         breakdown_percentages = [f"{(base_tax/total_tax*100):.1f}%" if total_tax > 0 else "0%",
                                f"{(surcharge/total_tax*100):.1f}%" if total_tax > 0 else "0%",
                                f"{(cess/total_tax*100):.1f}%" if total_tax > 0 else "0%",
-                               "100%", "-", "-"]
-        
+                               "100%"]
+
         # Add rebate and marginal relief to breakdown if applicable
         if rebate_applied > 0 or marginal_relief_applied > 0:
             if rebate_applied > 0:
-                breakdown_components.insert(-3, "Less: Rebate Applied")
-                breakdown_amounts.insert(-3, f"({rebate_applied:,.2f})")
-                breakdown_percentages.insert(-3, "-")
-            
+                breakdown_components.insert(-1, "Less: Rebate Applied")
+                breakdown_amounts.insert(-1, f"({rebate_applied:,.2f})")
+                breakdown_percentages.insert(-1, "-")
+
             if marginal_relief_applied > 0:
-                breakdown_components.insert(-3, "Less: Marginal Relief")
-                breakdown_amounts.insert(-3, f"({marginal_relief_applied:,.2f})")
-                breakdown_percentages.insert(-3, "-")
+                breakdown_components.insert(-1, "Less: Marginal Relief")
+                breakdown_amounts.insert(-1, f"({marginal_relief_applied:,.2f})")
+                breakdown_percentages.insert(-1, "-")
         
         breakdown_data = {
             "Component": breakdown_components,
@@ -1094,7 +654,157 @@ with tab1:
         df = pd.DataFrame(breakdown_data)
         st.dataframe(df, use_container_width=True)
 
-with tab2:
+@st.fragment
+def tax_payable_view(inputs):
+    # TDS only changes what is still payable, so it is entered here rather
+    # than in the form: a new figure reruns this fragment alone.  The advance
+    # tax tabs and the Excel report take it with the next full rerun.
+    st.markdown("### 💳 TDS & Net Payable")
+    tds_paid = st.number_input(
+        "TDS/Advance Tax Paid (₹)",
+        min_value=0.0,
+        step=1000.0,
+        placeholder="Enter amount",
+        value=None,
+        help="Total tax already paid or deducted at source",
+        key="tds_paid",
+    )
+
+    if st.session_state.get("tax_calculated"):
+        computation = compute_tax_cached(inputs[:-1] + (float(tds_paid or 0.0),))
+        net_tax = computation.net_tax
+
+        pay_col1, pay_col2, pay_col3 = st.columns(3)
+        with pay_col1:
+            st.metric("📈 Total Liability", f"₹{computation.total_tax:,.0f}")
+        with pay_col2:
+            st.metric("🧾 TDS Paid", f"₹{computation.tds_paid:,.0f}")
+        with pay_col3:
+            status_emoji = "💵 Refund" if net_tax < 0 else "📌 Payable"
+            st.metric(
+                f"{status_emoji}",
+                f"₹{abs(net_tax):,.0f}",
+                delta=f"After TDS adjustment"
+            )
+
+        if computation.advance_tax_applicable:
+            st.warning(f"⚠️ Advance tax applies on the net liability of ₹{computation.net_tax_liability:,.0f} - see the Advance Tax tab")
+        else:
+            st.success("✅ Advance tax not applicable (net liability below ₹10,000)")
+
+with tab1:
+    # Input form with enhanced styling
+    st.markdown("<h3 style='text-align: center;'>Use New Tax Regime For better results</h3>", unsafe_allow_html=True)
+
+    with st.form("tax_form"):
+        st.markdown("### 🔧 Tax Regime Selection")
+        regime = st.radio(
+            "Select Tax Regime",
+            ["new", "old"], # CHANGED: New regime is now first (default)
+            horizontal=True,
+            help="New regime: ₹4L basic exemption + ₹60K rebate + Marginal Relief | Old regime: ₹2.5L basic exemption + ₹12.5K rebate"
+        )
+
+        st.markdown("### 💰 Income Details")
+
+        # Create 3 columns for better layout
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown("**Employment Income**")
+
+            salary = st.number_input(
+                "Salary Income (₹)",
+                min_value=0.0,
+                step=10000.0,
+                placeholder="Enter amount", # Placeholder added
+                value=None,                 # Value set to None
+                help="Enter your annual salary before standard deduction"
+            )
+
+            business_income = st.number_input(
+                "Business/Professional Income (₹)",
+                min_value=0.0,
+                step=10000.0,
+                placeholder="Enter amount", # Placeholder added
+                value=None,                 # Value set to None
+                help="Net business or professional income"
+            )
+
+        with col2:
+            st.markdown("**Property & Other Income**")
+
+            house_income = st.number_input(
+                "House Property Income (₹)",
+                min_value=0.0,
+                step=5000.0,
+                placeholder="Enter amount", # Placeholder added
+                value=None,                 # Value set to None
+                help="Net Annual Value (after municipal taxes)"
+            )
+
+            house_loan_interest = st.number_input(
+                "Interest on House Property Loan (₹)",
+                min_value=0.0,
+                step=5000.0,
+                placeholder="Enter amount", # Placeholder added
+                value=None,                 # Value set to None
+                help="Annual interest paid on loan for let-out or self-occupied property"
+            )
+
+            other_sources = st.number_input(
+                "Other Sources Income (₹)",
+                min_value=0.0,
+                step=5000.0,
+                placeholder="Enter amount", # Placeholder added
+                value=None,                 # Value set to None
+                help="Interest, dividends, etc."
+            )
+
+        with col3:
+            st.markdown("**Capital Gains**")
+
+            stcg = st.number_input(
+                "Short-Term Capital Gains (₹)",
+                min_value=0.0,
+                step=5000.0,
+                placeholder="Enter amount", # Placeholder added
+                value=None,                 # Value set to None
+                help="STCG from equity/mutual funds (20% tax rate)"
+            )
+
+            ltcg = st.number_input(
+                "Long-Term Capital Gains (₹)",
+                min_value=0.0,
+                step=5000.0,
+                placeholder="Enter amount", # Placeholder added
+                value=None,                 # Value set to None
+                help="LTCG total amount (₹1.25L exemption + 12.5% tax)"
+            )
+
+        # The submit button MUST be inside the form block
+        submitted = st.form_submit_button("🧮 Calculate Tax", use_container_width=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # IMPORTANT: Convert any empty (None) inputs to 0.0 before calculating.
+    # TDS is entered in tax_payable_view below, outside the form
+    inputs = normalize_inputs(regime, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg,
+                              st.session_state.get("tds_paid"))
+    regime, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg, tds_paid = inputs
+
+    # Calculate and display results.  The results stay up after the first
+    # calculation, through reruns that the form did not start
+    if submitted:
+        st.session_state.tax_calculated = True
+    computation = compute_tax_cached(inputs) if st.session_state.get("tax_calculated") else None
+    results_view(inputs, computation)
+    tax_payable_view(inputs)
+
+if page_stages:
+    page_stages.mark('tab.calculate')
+
+@st.fragment
+def analysis_charts_view(amounts, computation):
     st.markdown("## 📊 Analysis & Visualizations")
 
     col1, col2 = st.columns(2)
@@ -1102,23 +812,9 @@ with tab2:
     with col1:
         # Pie chart for income breakdown
         st.markdown("### Income Component Breakdown")
-        income_data = {
-            "Income Source": ["Salary", "Business", "House Property", "Other Sources", "STCG", "LTCG"],
-            "Amount": [salary, business_income, house_income, other_sources, stcg, ltcg]
-        }
-        df_income = pd.DataFrame(income_data)
-        df_income = df_income[df_income["Amount"] > 0]
-
-        if not df_income.empty:
-            fig_pie = px.pie(
-                df_income,
-                values="Amount",
-                names="Income Source",
-                title="Income Distribution",
-                hole=0.4,
-                color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', '#F7DC6F']
-            )
-            fig_pie.update_layout(title="Income Component Breakdown", height=400)
+        fig_pie = build_income_pie_chart(amounts)
+
+        if fig_pie is not None:
             st.plotly_chart(fig_pie, use_container_width=True)
         else:
             st.info("Enter income details to see the breakdown.")
@@ -1127,49 +823,14 @@ with tab2:
         # Bar chart for tax breakdown
         st.markdown("### Tax Component Analysis")
 
-        # Calculate tax components when Calculate button is clicked
-        if 'total_tax' in locals():
+        # Tax components from the shared computation
+        if computation is not None:
             try:
-                # Calculate capital gains tax separately
-                stcg_tax_component = stcg * 0.20
-                ltcg_tax_component = max(0, ltcg - 125000) * 0.125
-                total_cg_tax = stcg_tax_component + ltcg_tax_component
-
-                # Calculate regular income tax (tax on other income excluding CG)
-                # Use basetax if available (tax before surcharge/cess)
-                if 'basetax' in locals():
-                    regular_tax_component = max(0, basetax - total_cg_tax)
-                else:
-                    # Fallback: estimate from total_tax
-                    regular_tax_component = max(0, (total_tax / 1.04) - total_cg_tax)
-
-                # Prepare data for bar chart - include BOTH components
-                tax_data = {
-                    "Tax Component": ["Tax on Other Income", "Tax on Capital Gains"],
-                    "Tax Amount": [regular_tax_component, total_cg_tax]
-                }
-
-                df_tax = pd.DataFrame(tax_data)
-
-                # Create bar chart showing BOTH bars
-                fig_bar = go.Figure(data=[
-                    go.Bar(
-                        x=df_tax["Tax Component"],
-                        y=df_tax["Tax Amount"],
-                        marker_color=['#3498db', '#e74c3c'],
-                        text=[f'₹{val:,.0f}' for val in df_tax["Tax Amount"]],
-                        textposition='outside',
-                        textfont=dict(size=12)
-                    )
-                ])
-
-                fig_bar.update_layout(
-                    title="Tax Breakdown: Other Income vs Capital Gains",
-                    yaxis_title="Tax Amount (₹)",
-                    xaxis_title="",
-                    height=400,
-                    showlegend=False
-                )
+                regular_tax_component = computation.regular_tax_component
+                total_cg_tax = computation.cg_tax_component
+
+                # Bar chart showing BOTH components (cached per component pair)
+                fig_bar = build_tax_component_chart(regular_tax_component, total_cg_tax)
 
                 st.plotly_chart(fig_bar, use_container_width=True)
 
@@ -1187,53 +848,294 @@ with tab2:
 
     # Effective tax rate
     st.markdown("### 📈 Effective Tax Rate")
-    if 'total_tax' in locals() and 'total_taxable_income' in locals():
-        try:
-            if total_taxable_income > 0:
-                effective_rate = (total_tax / total_taxable_income) * 100
-                st.success(f"🎯 Your effective tax rate is **{effective_rate:.2f}%**")
-        except:
-            pass
+    if computation is not None and computation.total_taxable_income > 0:
+        st.success(f"🎯 Your effective tax rate is **{computation.effective_rate:.2f}%**")
 
     # Show marginal relief if applicable
-    if 'marginal_relief_applied' in locals():
-        try:
-            if marginal_relief_applied > 0:
-                st.info(f"⚡ **Marginal Relief Saved:** ₹{marginal_relief_applied:,.0f}")
-        except:
-            pass
-with tab3:
+    if computation is not None and computation.marginal_relief_applied > 0:
+        st.info(f"⚡ **Marginal Relief Saved:** ₹{computation.marginal_relief_applied:,.0f}")
+
+@st.fragment
+def what_if_heatmap_view(amounts):
+    # What-if grid: any two inputs varied, the rest as entered in the form
+    st.markdown("### 🔥 What-if Heatmap")
+    # Built on request only: the grid and figures import NumPy and plotly,
+    # which a first visit to the page should not pay for
+    if st.toggle("Show what-if heatmap of any two inputs, both regimes"):
+        field_names = list(WHAT_IF_FIELDS)
+        grid_col1, grid_col2 = st.columns(2)
+        with grid_col1:
+            x_field = st.selectbox("Horizontal axis", field_names, index=field_names.index("salary"),
+                                   format_func=WHAT_IF_FIELDS.get)
+            x_default = max(2 * dict(zip(field_names, amounts))[x_field], 3000000.0)
+            x_range = st.slider(f"{WHAT_IF_FIELDS[x_field]} range (₹)", 0.0, max(4 * x_default, 10000000.0),
+                                (0.0, x_default), step=10000.0, key=f"what_if_x_{x_field}")
+        with grid_col2:
+            y_field = st.selectbox("Vertical axis", [name for name in field_names if name != x_field],
+                                   index=field_names.index("ltcg") - 1, format_func=WHAT_IF_FIELDS.get)
+            y_default = max(2 * dict(zip(field_names, amounts))[y_field], 1000000.0)
+            y_range = st.slider(f"{WHAT_IF_FIELDS[y_field]} range (₹)", 0.0, max(4 * y_default, 10000000.0),
+                                (0.0, y_default), step=10000.0, key=f"what_if_y_{y_field}")
+        grid_col3, grid_col4 = st.columns(2)
+        with grid_col3:
+            grid_size = st.select_slider("Grid points per axis", options=[50, 100, 200, 300, 500], value=200)
+        with grid_col4:
+            heatmap_metric = st.radio("Show", ["total_tax", "effective_rate"], horizontal=True,
+                                      format_func={"total_tax": "Total Tax", "effective_rate": "Effective Rate"}.get)
+
+        fig_new_grid, fig_old_grid, fig_diff_grid = build_what_if_heatmaps(
+            amounts, x_field, x_range, y_field, y_range, grid_size, heatmap_metric)
+        heat_col1, heat_col2 = st.columns(2)
+        with heat_col1:
+            st.plotly_chart(fig_new_grid, use_container_width=True)
+        with heat_col2:
+            st.plotly_chart(fig_old_grid, use_container_width=True)
+        st.plotly_chart(fig_diff_grid, use_container_width=True)
+
+with tab2:
+    analysis_charts_view(income_amounts(inputs), computation)
+    what_if_heatmap_view(income_amounts(inputs))
+
+if page_stages:
+    page_stages.mark('tab.analysis')
+
+@st.fragment
+def advance_tax_schedule_view(computation):
     st.markdown("## 📅 Advance Tax Schedule")
     st.info("Advance tax is payable if tax liability exceeds ₹10,000 after TDS/TCS")
 
-    if 'total_tax' in locals() and 'tds_paid' in locals():
-        try:
-            net_liability = max(0, total_tax - tds_paid)
-            if net_liability >= 10000:
-                st.markdown("### Quarterly Installment Schedule")
-
-                q1_amt = round(net_liability * 0.15)
-                q2_amt = round(net_liability * 0.45) - q1_amt
-                q3_amt = round(net_liability * 0.75) - (q1_amt + q2_amt)
-                q4_amt = round(net_liability) - (q1_amt + q2_amt + q3_amt)
-
-                schedule_df = pd.DataFrame({
-                    "Quarter": ["Q1", "Q2", "Q3", "Q4"],
-                    "Due Date": ["15 June", "15 September", "15 December", "15 March"],
-                    "Cumulative %": ["15%", "45%", "75%", "100%"],
-                    "Installment Amount": [f"₹{q1_amt:,.0f}", f"₹{q2_amt:,.0f}", f"₹{q3_amt:,.0f}", f"₹{q4_amt:,.0f}"],
-                    "Total Tax Paid": [f"₹{q1_amt:,.0f}", f"₹{q1_amt+q2_amt:,.0f}", f"₹{q1_amt+q2_amt+q3_amt:,.0f}", f"₹{net_liability:,.0f}"]
-                })
-
-                st.table(schedule_df)
-                st.warning("⚠️ Interest under sections 234B/234C applies for delay or short payment")
-            else:
-                st.success("✅ Advance tax not applicable (net liability below ₹10,000)")
-        except:
-            pass
+    if computation is not None:
+        if computation.advance_tax_applicable:
+            st.markdown("### Quarterly Installment Schedule")
+
+            schedule_df, _, _ = build_advance_tax_schedule(computation.installments, computation.net_tax_liability)
+
+            st.table(schedule_df)
+            st.warning("⚠️ Interest under sections 234B/234C applies for delay or short payment")
+        else:
+            st.success("✅ Advance tax not applicable (net liability below ₹10,000)")
     else:
         st.info("Calculate tax first to see advance tax schedule")
 
+@st.fragment
+def advance_tax_interest_view(inputs):
+    # 234B/234C interest on the payments actually made, for the liability of
+    # the income entered in the form (no need to press Calculate first)
+    st.markdown("### 🧾 Interest u/s 234B/234C on Your Payments")
+    interest_liability = compute_tax_cached(inputs).net_tax_liability if any(amount > 0 for amount in income_amounts(inputs)) else 0
+    if interest_liability >= ADVANCE_TAX_THRESHOLD:
+        from tax_engine.interest import advance_tax_interest, default_filing_date
+
+        due_dates = installment_due_dates(DEFAULT_ASSESSMENT_YEAR)
+        planned_installments = advance_tax_installments(interest_liability)
+        payments = st.data_editor(
+            [{"Payment Date": due_date, "Amount (₹)": float(amount)}
+             for due_date, amount in zip(due_dates, planned_installments)],
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "Payment Date": st.column_config.DateColumn(format="DD MMM YYYY"),
+                "Amount (₹)": st.column_config.NumberColumn(min_value=0.0, step=1000.0, format="₹%.0f"),
+            },
+            key="advance_tax_payments",
+        )
+        filing_date = st.date_input("Return filed on", value=default_filing_date(DEFAULT_ASSESSMENT_YEAR))
+
+        payments = [payment for payment in payments if payment["Payment Date"] and payment["Amount (₹)"]]
+        interest = advance_tax_interest(
+            [interest_liability],
+            [0] * len(payments),
+            [payment["Payment Date"] for payment in payments],
+            [payment["Amount (₹)"] for payment in payments],
+            filing_date,
+        )
+
+        int_col1, int_col2, int_col3 = st.columns(3)
+        with int_col1:
+            st.metric("Interest u/s 234C", f"₹{interest['interest_234c'][0]:,.0f}")
+        with int_col2:
+            st.metric("Interest u/s 234B", f"₹{interest['interest_234b'][0]:,.0f}",
+                      delta=f"{interest['months_234b'][0]} months", delta_color="off")
+        with int_col3:
+            st.metric("Total Interest", f"₹{interest['total_interest'][0]:,.0f}")
+
+        st.table({
+            "Quarter": [quarter for quarter, _, _ in INSTALLMENT_SCHEDULE],
+            "Due Date": [due_date.strftime("%d %b %Y") for due_date in due_dates],
+            "Due by Date": [f"₹{interest_liability * share:,.0f}" for _, _, share in INSTALLMENT_SCHEDULE],
+            "Paid by Date": [f"₹{interest[f'paid_q{i}'][0]:,.0f}" for i in range(1, 5)],
+            "Shortfall (234C)": [f"₹{interest[f'shortfall_q{i}'][0]:,.0f}" for i in range(1, 5)],
+        })
+        st.caption("Edit the rows to match your challans. Shortfalls are rounded down to ₹100; interest is 1% per "
+                   "month (part of a month counts in full). 234B runs from 1 April to the filing date when advance "
+                   "tax paid by 31 March is below 90% of the liability.")
+    else:
+        st.info("No 234B/234C interest - net liability after TDS is below ₹10,000 (or no income entered yet).")
+
+@st.fragment
+def income_simulation_view(inputs):
+    # Monte Carlo plan for income that is not final yet (salary, house
+    # property and TDS stay as entered on the Calculate Tax tab)
+    st.markdown("### 🎲 Plan for Uncertain Income")
+    st.caption("Give a low, most likely and high estimate for each amount that is not final yet. Hundreds of "
+               "thousands of scenarios are computed and the installments cover the chosen percentile.")
+    regime, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg, tds_paid = inputs
+    simulation_labels = {"business_income": "Business/Professional Income", "other_sources": "Other Sources Income",
+                         "stcg": "Short-Term Capital Gains", "ltcg": "Long-Term Capital Gains"}
+    entered = dict(zip(("business_income", "other_sources", "stcg", "ltcg"),
+                       (business_income, other_sources, stcg, ltcg)))
+    estimate_rows = st.data_editor(
+        [{"Income": label, "Low (₹)": entered[field], "Most Likely (₹)": entered[field], "High (₹)": entered[field]}
+         for field, label in simulation_labels.items()],
+        disabled=["Income"],
+        use_container_width=True,
+        column_config={column: st.column_config.NumberColumn(min_value=0.0, step=10000.0, format="₹%.0f")
+                       for column in ("Low (₹)", "Most Likely (₹)", "High (₹)")},
+        key="income_estimates",
+    )
+    sim_col1, sim_col2 = st.columns(2)
+    with sim_col1:
+        confidence = st.slider("Cover the liability in this share of scenarios (%)", 50, 99, 80)
+    with sim_col2:
+        samples = st.select_slider("Scenarios", options=[50000, 100000, 200000, 500000], value=200000)
+
+    ranges = tuple(
+        (field, (row["Low (₹)"] or 0.0, row["Most Likely (₹)"] or 0.0, row["High (₹)"] or 0.0))
+        for field, row in zip(simulation_labels, estimate_rows)
+    )
+    if not any(amount > 0 for amount in income_amounts(inputs)) and not any(max(estimate) > 0 for _, estimate in ranges):
+        st.info("Enter income in the 'Calculate Tax' tab or estimates above to plan advance tax.")
+    elif any(not low <= likely <= high for _, (low, likely, high) in ranges):
+        st.error("Each estimate needs Low ≤ Most Likely ≤ High.")
+    else:
+        simulation, fig_sim = build_income_simulation(inputs, ranges, samples, confidence)
+        percentiles = simulation['percentiles']
+
+        sim_metric1, sim_metric2, sim_metric3, sim_metric4 = st.columns(4)
+        with sim_metric1:
+            st.metric("Expected Liability", f"₹{simulation['mean']:,.0f}")
+        with sim_metric2:
+            st.metric(f"Plan for (P{confidence})", f"₹{simulation['planned_liability']:,.0f}")
+        with sim_metric3:
+            st.metric("Chance of Shortfall", f"{simulation['shortfall_probability'] * 100:.1f}%")
+        with sim_metric4:
+            st.metric("Expected 234B/234C Interest", f"₹{simulation['expected_interest']:,.0f}")
+
+        st.markdown(" | ".join(f"**P{p}:** ₹{value:,.0f}" for p, value in percentiles.items()))
+        if simulation['planned_liability'] >= ADVANCE_TAX_THRESHOLD:
+            st.table({
+                "Quarter": [quarter for quarter, _, _ in INSTALLMENT_SCHEDULE],
+                "Due Date": [due_date for _, due_date, _ in INSTALLMENT_SCHEDULE],
+                "Recommended Installment": [f"₹{amount:,.0f}" for amount in simulation['installments']],
+            })
+        else:
+            st.success(f"✅ At P{confidence} the liability is below ₹10,000 - no advance tax needed")
+        st.plotly_chart(fig_sim, use_container_width=True)
+
+with tab3:
+    advance_tax_schedule_view(computation)
+    advance_tax_interest_view(inputs)
+    income_simulation_view(inputs)
+
+if page_stages:
+    page_stages.mark('tab.advance_tax')
+
+@st.fragment
+def regime_break_even_view(amounts):
+    # Regime break-even for the income entered in the Calculate Tax form
+    st.markdown("#### ⚖️ Old vs New Regime Break-even")
+    if any(amount > 0 for amount in amounts):
+        planned_deductions = st.number_input(
+            "Deductions you can claim under the old regime (₹)",
+            min_value=0.0,
+            step=10000.0,
+            value=150000.0,
+            help="80C, 80D, HRA, LTA and other deductions the new regime does not allow"
+        )
+        break_even, new_regime_tax, old_regime_tax, fig_deductions, fig_curves = build_regime_break_even(
+            amounts, planned_deductions)
+
+        if break_even is None:
+            st.success("✅ **New regime is better** - no amount of deductions brings the old regime's tax down to the new regime's")
+        elif break_even == 0:
+            st.success("✅ **Old regime is better** even without any deductions")
+        else:
+            st.info(f"💡 The old regime beats the new regime once your deductions reach **₹{break_even:,.0f}**")
+
+        be_col1, be_col2 = st.columns(2)
+        with be_col1:
+            st.metric("New Regime Tax", f"₹{new_regime_tax:,.0f}")
+        with be_col2:
+            st.metric("Old Regime Tax", f"₹{old_regime_tax:,.0f}",
+                      delta=f"₹{old_regime_tax - new_regime_tax:,.0f} vs new", delta_color="inverse")
+
+        st.plotly_chart(fig_deductions, use_container_width=True)
+        st.plotly_chart(fig_curves, use_container_width=True)
+    else:
+        st.info("Enter income details in the 'Calculate Tax' tab to find your break-even deduction.")
+
+@st.fragment
+def savings_plan_view(amounts):
+    # Old-regime deductions claimed, and where a savings budget cuts the most tax
+    st.markdown("#### 💰 Old Regime Deductions & Savings Plan")
+    if any(amount > 0 for amount in amounts):
+        ded_col1, ded_col2, ded_col3 = st.columns(3)
+        with ded_col1:
+            basic_salary = st.number_input("Basic Salary + DA (₹)", min_value=0.0, step=10000.0)
+            hra_received = st.number_input("HRA Received (₹)", min_value=0.0, step=10000.0)
+            rent_paid = st.number_input("Rent Paid (₹)", min_value=0.0, step=10000.0)
+            metro = st.checkbox("Metro city (Delhi, Mumbai, Kolkata, Chennai)")
+        with ded_col2:
+            self_occupied_interest = st.number_input(
+                "Home Loan Interest, self-occupied (₹)", min_value=0.0, step=10000.0,
+                help="Section 24(b), up to ₹2,00,000")
+            section_80c = st.number_input("80C Investments made (₹)", min_value=0.0, step=10000.0)
+            section_80ccd_1b = st.number_input("80CCD(1B) NPS Contribution (₹)", min_value=0.0, step=10000.0)
+        with ded_col3:
+            section_80d_self = st.number_input("80D Premium, self & family (₹)", min_value=0.0, step=5000.0)
+            senior_self = st.checkbox("Self is a senior citizen")
+            section_80d_parents = st.number_input("80D Premium, parents (₹)", min_value=0.0, step=5000.0)
+            senior_parents = st.checkbox("Parents are senior citizens")
+
+        budget = st.number_input("Savings you can still invest this year (₹)", min_value=0.0, step=10000.0,
+                                 value=100000.0)
+        claims = (('basic_salary', basic_salary), ('hra_received', hra_received), ('rent_paid', rent_paid),
+                  ('metro', metro), ('self_occupied_interest', self_occupied_interest),
+                  ('section_80c', section_80c), ('section_80ccd_1b', section_80ccd_1b),
+                  ('section_80d_self', section_80d_self), ('section_80d_parents', section_80d_parents),
+                  ('senior_self', senior_self), ('senior_parents', senior_parents))
+        deductions, plan = build_savings_plan(amounts, claims, budget)
+
+        plan_col1, plan_col2, plan_col3, plan_col4 = st.columns(4)
+        with plan_col1:
+            st.metric("Deductions Allowed", f"₹{deductions['total']:,.0f}")
+        with plan_col2:
+            st.metric("Old Regime Tax Now", f"₹{plan['old_tax_before']:,.0f}")
+        with plan_col3:
+            st.metric("After Investing", f"₹{plan['old_tax']:,.0f}",
+                      delta=f"-₹{plan['tax_saving']:,.0f}", delta_color="inverse")
+        with plan_col4:
+            st.metric("New Regime Tax", f"₹{plan['new_tax']:,.0f}")
+
+        if plan['invested'] > 0:
+            st.table({
+                "Section": [label for section, label in SAVINGS_SECTION_LABELS.items() if plan[section] > 0],
+                "Invest": [f"₹{plan[section]:,.0f}" for section in SAVINGS_SECTION_LABELS if plan[section] > 0],
+            })
+            if plan['invested'] < budget:
+                st.caption(f"Investing more than ₹{plan['invested']:,.0f} would not lower the old regime's tax "
+                           f"further (section limits, or taxable income already at a slab or rebate limit).")
+        else:
+            st.caption("No further investment lowers the old regime's tax.")
+
+        if plan['regime'] == 'old':
+            st.success(f"✅ With this plan the **old regime** saves ₹{plan['new_tax'] - plan['old_tax']:,.0f} "
+                       f"over the new regime")
+        else:
+            st.info(f"💡 The **new regime** is still cheaper by ₹{plan['old_tax'] - plan['new_tax']:,.0f} "
+                    f"even after investing")
+    else:
+        st.info("Enter income details in the 'Calculate Tax' tab to plan old-regime deductions.")
 
 with tab4:
     st.markdown("""
@@ -1293,76 +1195,65 @@ with tab4:
         - If above ₹12L, try to stay under **₹12.6L** for marginal relief
         - **Sweet spot:** ₹12L-₹12.6L pays minimal tax due to marginal relief
         """)
-    
+
+    regime_break_even_view(income_amounts(inputs))
+    savings_plan_view(income_amounts(inputs))
+
     # Marginal Relief demonstration table
     if regime == 'new':
         st.markdown("#### 🎯 Marginal Relief Demonstration")
         st.info("See how marginal relief protects you from sudden tax jumps:")
         
-        demo_data = {
-            "Income (₹)": ["11,99,000", "12,01,000", "12,30,000", "12,60,000", "12,61,000"],
-            "Without Relief": ["₹0*", "₹15,000+", "₹45,000+", "₹75,000+", "₹75,300+"],
-            "With Marginal Relief": ["₹0*", "₹1,000", "₹30,000", "₹60,000", "₹75,300"],
-            "Benefit": ["-", "₹14,000 saved", "₹15,000 saved", "₹15,000 saved", "-"]
-        }
-        
-        demo_df = pd.DataFrame(demo_data)
-        st.dataframe(demo_df, use_container_width=True)
+        # Static tables are markdown, so rendering this tab needs no pandas
+        st.markdown("""
+| Income (₹) | Without Relief | With Marginal Relief | Benefit |
+|------------|----------------|----------------------|---------|
+| 11,99,000 | ₹0* | ₹0* | - |
+| 12,01,000 | ₹15,000+ | ₹1,000 | ₹14,000 saved |
+| 12,30,000 | ₹45,000+ | ₹30,000 | ₹15,000 saved |
+| 12,60,000 | ₹75,000+ | ₹60,000 | ₹15,000 saved |
+| 12,61,000 | ₹75,300+ | ₹75,300 | - |
+""")
         st.caption("*After ₹60K rebate. Marginal relief ensures smooth tax progression.")
     
     # Tax calendar
     st.markdown("#### 📅 Important Tax Dates")
-    tax_dates = pd.DataFrame({
-        "Date": ["31st July","15th March","15th December", "15th September", "15th June"],
-        "Event": ["ITR Filing Due Date", "Q4 Advance Tax","Q3 Advance Tax", "Q2 Advance Tax", "Q1 Advance Tax"],
-        "Amount": ["Annual Return", "100% of Tax","75% of Tax", "45% of Tax", "15% of Tax"]
-    })
-    st.dataframe(tax_dates, use_container_width=True)
+    st.markdown("""
+| Date | Event | Amount |
+|------|-------|--------|
+| 31st July | ITR Filing Due Date | Annual Return |
+| 15th March | Q4 Advance Tax | 100% of Tax |
+| 15th December | Q3 Advance Tax | 75% of Tax |
+| 15th September | Q2 Advance Tax | 45% of Tax |
+| 15th June | Q1 Advance Tax | 15% of Tax |
+""")
+
+if page_stages:
+    page_stages.mark('tab.tax_planning')
 
 # NEW TAB FOR ADVANCE TAX
-with tab4:
+@st.fragment
+def advance_tax_liability_view(computation):
     st.markdown("### 📅 Advance Tax Liability Schedule")
     
-    if 'total_tax' in locals() and total_tax > 0:
-        # Logic for Net Tax for Advance Tax purposes
+    if computation is not None and computation.total_tax > 0:
         # Advance Tax is calculated on Tax Liability - TDS
-        net_advance_tax_liability = max(0, total_tax - (tds_paid if 'tds_paid' in locals() else 0))
+        net_advance_tax_liability = computation.net_tax_liability
         
-        if net_advance_tax_liability < 10000:
+        if not computation.advance_tax_applicable:
             st.success(f"✅ **No Advance Tax Liability**")
             st.info(f"Since your net tax payable (₹{net_advance_tax_liability:,.0f}) is less than ₹10,000, you are not required to pay Advance Tax. You can pay the due amount while filing your ITR.")
         else:
             st.warning(f"⚠️ **Advance Tax Applicable**")
             st.write(f"Net Tax Liability for Advance Tax: **₹{net_advance_tax_liability:,.2f}**")
             
-            # Calculate Installments based on cumulative percentages
-            q1_amt = round(net_advance_tax_liability * 0.15)
-            q2_amt = round(net_advance_tax_liability * 0.45) - q1_amt
-            q3_amt = round(net_advance_tax_liability * 0.75) - (q1_amt + q2_amt)
-            q4_amt = round(net_advance_tax_liability) - (q1_amt + q2_amt + q3_amt)
-            
-            # Create Data
-            adv_tax_data = {
-                "Quarter": ["Q1", "Q2", "Q3", "Q4"],
-                "Due Date": ["15th June", "15th September", "15th December", "15th March"],
-                "Cumulative %": ["15%", "45%", "75%", "100%"],
-                "Installment Amount (₹)": [f"₹{q1_amt:,.0f}", f"₹{q2_amt:,.0f}", f"₹{q3_amt:,.0f}", f"₹{q4_amt:,.0f}"],
-                "Cumulative Payable (₹)": [f"₹{q1_amt:,.0f}", f"₹{q1_amt + q2_amt:,.0f}", f"₹{q1_amt + q2_amt + q3_amt:,.0f}", f"₹{q1_amt + q2_amt + q3_amt + q4_amt:,.0f}"]
-            }
-            
+            # Installment tables and chart (cached per schedule)
+            _, adv_df, fig_adv = build_advance_tax_schedule(computation.installments, net_advance_tax_liability)
+
             # Display Table
-            adv_df = pd.DataFrame(adv_tax_data)
             st.dataframe(adv_df, use_container_width=True)
-            
+
             # Chart
-            fig_adv = px.bar(
-                x=["Q1 (June)", "Q2 (Sept)", "Q3 (Dec)", "Q4 (March)"],
-                y=[q1_amt, q2_amt, q3_amt, q4_amt],
-                title="Advance Tax Installments Payment Schedule",
-                labels={'x': 'Quarter', 'y': 'Amount Payable (₹)'},
-                text=[f"₹{x:,.0f}" for x in [q1_amt, q2_amt, q3_amt, q4_amt]]
-            )
-            fig_adv.update_traces(marker_color='#FF8C00', textposition='auto')
             st.plotly_chart(fig_adv, use_container_width=True)
             
             st.info("💡 **Note:** The amounts shown above are the installment amounts payable for that specific quarter, assuming no previous arrears.")
@@ -1370,6 +1261,12 @@ with tab4:
     else:
         st.info("👋 Please calculate your tax in the 'Calculate Tax' tab first to see the Advance Tax schedule.")
 
+with tab4:
+    advance_tax_liability_view(computation)
+
+if page_stages:
+    page_stages.mark('tab.advance_tax_liability')
+
 # Footer
 
 # Excel Export Section with FIXED SYNTAX
@@ -1377,45 +1274,45 @@ st.markdown("---")
 st.markdown("### 📄 Export Tax Computation to Excel")
 st.info("🎨 Generate professional Excel report with clear visibility and FIXED syntax")
 
-if st.button("📊 Generate & Download Excel Report", type="primary"):
-    try:
-        # IMPORTANT: Convert any empty (None) inputs to 0.0 before generating the report
-        salary = salary or 0.0
-        business_income = business_income or 0.0
-        house_income = house_income or 0.0
-        house_loan_interest = house_loan_interest or 0.0
-        other_sources = other_sources or 0.0
-        stcg = stcg or 0.0
-        ltcg = ltcg or 0.0
-        tds_paid = tds_paid or 0.0 # This is now used!
-
-        # Create professional Excel with fixed syntax
-        excel_output = create_professional_excel_report(
-            salary, business_income, house_income, other_sources,
-            stcg, ltcg, regime, house_loan_interest, tds_paid
-        )
+@st.fragment
+def excel_report_view(inputs):
+    client = st.text_input("Client (optional)", help="Stored with the report, so a client's earlier computations can be looked up")
+    if st.button("📊 Generate & Download Excel Report", type="primary"):
+        try:
+            # A report built before for the same inputs and rules is read back
+            # from the on-disk result cache instead of being rebuilt
+            result_cache = get_result_cache()
+            if result_cache is not None:
+                excel_output = result_cache.report(*inputs, client=client.strip() or None)
+            else:
+                excel_output = create_computation_excel_report(compute_tax_cached(inputs))
 
-        st.success("✅ Professional Excel report generated successfully! 🎨")
+            st.success("✅ Professional Excel report generated successfully! 🎨")
 
-        # Download button
-        st.download_button(
-            label="📥 Download Excel Report",
-            data=excel_output.getvalue(),
-            file_name=f"Income_Tax_Computation_AY_2026-27_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            help="Download Excel file with professional formatting and clear visibility"
-        )
+            # Download button
+            st.download_button(
+                label="📥 Download Excel Report",
+                data=excel_output.getvalue(),
+                file_name=f"Income_Tax_Computation_AY_2026-27_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                help="Download Excel file with professional formatting and clear visibility"
+            )
 
-        st.info("✅ FIXED FEATURES:")
-        st.write("• 🔧 **Syntax Error Fixed**: No more quote conflicts")
-        st.write("• 🎨 **Clear Headers**: WHITE text on ORANGE background")
-        st.write("• 📏 **Professional Formatting**: Borders, colors, and alignment")
-        st.write("• 🔢 **Currency Formatting**: Proper ₹ symbol display")
-        st.write("• 📊 **A.Y. 2026-27**: Correct assessment year")
+            st.info("✅ FIXED FEATURES:")
+            st.write("• 🔧 **Syntax Error Fixed**: No more quote conflicts")
+            st.write("• 🎨 **Clear Headers**: WHITE text on ORANGE background")
+            st.write("• 📏 **Professional Formatting**: Borders, colors, and alignment")
+            st.write("• 🔢 **Currency Formatting**: Proper ₹ symbol display")
+            st.write("• 📊 **A.Y. 2026-27**: Correct assessment year")
+
+        except Exception as e:
+            st.error(f"❌ Error generating Excel: {e}")
+            st.info("💡 Install xlsxwriter for best results: pip install xlsxwriter")
+
+excel_report_view(inputs)
+if page_stages:
+    page_stages.mark('excel_export')
 
-    except Exception as e:
-        st.error(f"❌ Error generating Excel: {e}")
-        st.info("💡 Install xlsxwriter for best results: pip install xlsxwriter")
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center; color: #666; padding: 20px;'>
@@ -1425,4 +1322,10 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-
+if timing_records is not None:
+    page_stages.mark('footer')
+    page_stages.done()
+    with st.expander("⏱️ Timing (TAX_ENGINE_TIMING)"):
+        st.caption("Milliseconds per stage of the last full rerun; fragment reruns are not listed. "
+                   "Cached results (st.cache_data hits) run no stages.")
+        st.dataframe(timing_records, use_container_width=True)
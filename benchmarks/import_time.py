@@ -0,0 +1,103 @@
+"""Import-time report: what a cold start of the app spends on importing modules.
+
+Runs the first render of the app (through Streamlit's AppTest) in a fresh
+interpreter with ``-X importtime`` and totals the self time of every module
+by top-level package, so the cost of streamlit, pandas, plotly, xlsxwriter,
+numpy and tax_engine shows up directly.
+
+Usage::
+
+    python benchmarks/import_time.py                 # app first render
+    python benchmarks/import_time.py --rerun         # ... plus a Calculate rerun
+    python benchmarks/import_time.py --module tax_engine --top 10
+    python benchmarks/import_time.py --json
+"""
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP_SCRIPT = REPO_ROOT / 'APMH Tax Calculator.py'
+
+# Runs in the child interpreter.  The AppTest harness's own modules count
+# towards the streamlit total, a few milliseconds compared to `streamlit run`.
+_APP_CODE = '''
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({script!r}, default_timeout=120)
+app.run()
+if {rerun!r}:
+    for widget, value in zip(app.number_input, (1800000, 400000, 300000, 100000, 60000, 150000, 350000, 120000)):
+        widget.set_value(value)
+    app.button[0].click()
+    app.run()
+'''
+
+
+def parse_importtime(text):
+    """(module, self microseconds, cumulative microseconds) per ``-X importtime`` line"""
+    modules = []
+    for line in text.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure(code):
+    """Per-module import times for running ``code`` in a fresh interpreter"""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=REPO_ROOT,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr[-2000:])
+    return parse_importtime(completed.stderr)
+
+
+def by_package(modules):
+    """{top-level package: (total self milliseconds, module count)}, most expensive first"""
+    totals = defaultdict(lambda: [0, 0])
+    for name, self_us, _ in modules:
+        package = totals[name.split('.')[0]]
+        package[0] += self_us
+        package[1] += 1
+    ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+    return {package: (self_us / 1000, count) for package, (self_us, count) in ranked}
+
+
+def app_import_times(rerun=False):
+    """``by_package`` for the app's first render (and a Calculate rerun)"""
+    return by_package(measure(_APP_CODE.format(script=str(APP_SCRIPT), rerun=rerun)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import time per package for an app cold start.")
+    parser.add_argument('--module', help="time 'import MODULE' instead of the app's first render")
+    parser.add_argument('--rerun', action='store_true', help="include a Calculate rerun after the first render")
+    parser.add_argument('--top', type=int, default=15, help="packages to list")
+    parser.add_argument('--json', action='store_true', help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    if args.module:
+        packages = by_package(measure(f'import {args.module}'))
+    else:
+        packages = app_import_times(args.rerun)
+    total_ms = sum(milliseconds for milliseconds, _ in packages.values())
+
+    if args.json:
+        print(json.dumps({
+            'total_ms': total_ms,
+            'packages': {name: {'self_ms': ms, 'modules': count} for name, (ms, count) in packages.items()},
+        }, indent=2))
+        return
+
+    print(f"{'package':30} {'self ms':>10} {'modules':>8}")
+    for name, (milliseconds, count) in list(packages.items())[:args.top]:
+        print(f"{name:30} {milliseconds:10.1f} {count:8}")
+    print(f"{'total':30} {total_ms:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""Benchmark suite for the tax engine, the Excel report and the Streamlit app.
+
+Every benchmark produces named metrics with a unit and a direction, written
+as JSON so runs can be stored and compared.  Timings are the best of several
+repeats, which is the most stable figure on a shared machine.
+
+Usage::
+
+    python benchmarks/run.py                                  # JSON on stdout
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json
+    python benchmarks/run.py --only scalar batch --batch-sizes 1000 100000
+
+With ``--baseline`` the run is compared metric by metric and the exit status
+is 1 when any metric is worse than the baseline by more than ``--tolerance``.
+Regenerate the baseline with ``--output benchmarks/baseline.json`` on the
+reference machine after an intended change.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP_SCRIPT = REPO_ROOT / 'APMH Tax Calculator.py'
+sys.path.insert(0, str(REPO_ROOT))
+
+from tax_engine import (  # noqa: E402
+    calculate_surcharge_separate,
+    calculate_tax_new_regime,
+    calculate_tax_old_regime,
+    create_professional_excel_report,
+)
+
+DEFAULT_BATCH_SIZES = (1000, 100000, 10000000)
+DEFAULT_TOLERANCE = 0.20
+
+# Differences smaller than this never count as a regression (timer noise on
+# metrics of a few milliseconds)
+NOISE_FLOOR = {'ms': 5.0}
+REPEATS = 5
+
+# Rows per compute_tax_batch call for the large batch sizes, so 10M rows
+# measure throughput rather than the machine's memory
+BATCH_CHUNK_ROWS = 1000000
+
+# Total incomes across every band: below the basic exemption, rebate,
+# marginal relief, each slab and each surcharge step
+SCALAR_INCOMES = (
+    250000, 600000, 1150000, 1210000, 1275000, 1600000, 2200000, 2800000,
+    4500000, 5200000, 8000000, 12000000, 25000000, 60000000,
+)
+
+# (salary, business_income, house_income, other_sources, stcg, ltcg, regime, house_loan_interest, tds_paid)
+REPORT_INPUTS = (1800000, 400000, 300000, 60000, 150000, 350000, 'new', 100000, 120000)
+
+
+def _metric(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def _best_time(func, number):
+    """Best wall time of ``REPEATS`` runs of ``number`` calls to ``func``"""
+    return min(timeit.repeat(func, number=number, repeat=REPEATS))
+
+
+def _calls_per_second(func, number):
+    return number / _best_time(func, number)
+
+
+def bench_scalar(args):
+    incomes = SCALAR_INCOMES
+
+    def new_regime():
+        for income in incomes:
+            calculate_tax_new_regime(income, 50000, 200000)
+
+    def old_regime():
+        for income in incomes:
+            calculate_tax_old_regime(income, 50000, 200000)
+
+    def surcharge():
+        for income in incomes:
+            calculate_surcharge_separate(income * 0.3, income * 0.02, income + 250000, 'new')
+
+    number = 2000
+    return {
+        'scalar.calculate_tax_new_regime': _metric(
+            _calls_per_second(new_regime, number) * len(incomes), 'calls/s', True),
+        'scalar.calculate_tax_old_regime': _metric(
+            _calls_per_second(old_regime, number) * len(incomes), 'calls/s', True),
+        'scalar.calculate_surcharge_separate': _metric(
+            _calls_per_second(surcharge, number) * len(incomes), 'calls/s', True),
+    }
+
+
+def _batch_inputs(rows, seed):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    return (
+        rng.random(rows) < 0.3,
+        rng.uniform(0, 5000000, rows).round(2),
+        np.where(rng.random(rows) < 0.1, rng.uniform(0, 2000000, rows), 0.0).round(2),
+        np.where(rng.random(rows) < 0.2, rng.uniform(-200000, 800000, rows), 0.0).round(2),
+        np.where(rng.random(rows) < 0.2, 200000.0, 0.0),
+        np.where(rng.random(rows) < 0.3, rng.uniform(0, 100000, rows), 0.0).round(2),
+        np.where(rng.random(rows) < 0.1, rng.uniform(0, 500000, rows), 0.0).round(2),
+        np.where(rng.random(rows) < 0.1, rng.uniform(0, 800000, rows), 0.0).round(2),
+        rng.uniform(0, 300000, rows).round(2),
+    )
+
+
+def bench_batch(args):
+    from tax_engine.batch import compute_tax_batch
+
+    results = {}
+    for rows in args.batch_sizes:
+        chunk_rows = min(rows, BATCH_CHUNK_ROWS)
+        chunks = [(start, min(start + chunk_rows, rows)) for start in range(0, rows, chunk_rows)]
+        repeats = REPEATS if rows <= BATCH_CHUNK_ROWS else 1
+        # Inputs are generated per chunk outside the timed region
+        elapsed = [0.0] * repeats
+        for index, (start, stop) in enumerate(chunks):
+            inputs = _batch_inputs(stop - start, seed=index)
+            times = timeit.repeat(lambda: compute_tax_batch(*inputs), number=1, repeat=repeats)
+            elapsed = [total + taken for total, taken in zip(elapsed, times)]
+        results[f'batch.compute_tax_batch.{rows}'] = _metric(rows / min(elapsed), 'rows/s', True)
+    return results
+
+
+def bench_report(args):
+    number = 20
+    latency = _best_time(lambda: create_professional_excel_report(*REPORT_INPUTS), number) / number
+    size = len(create_professional_excel_report(*REPORT_INPUTS).getvalue())
+    return {
+        'report.create_professional_excel_report.latency': _metric(latency * 1000, 'ms', False),
+        'report.create_professional_excel_report.size': _metric(size, 'bytes', False),
+    }
+
+
+def bench_app(args):
+    try:
+        import streamlit as st
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("Skipping app benchmark: streamlit is not installed", file=sys.stderr)
+        return {}
+
+    # Bare-mode and deprecation warnings from every run would bury the results
+    logging.disable(logging.WARNING)
+    cold, rerun = [], []
+    for _ in range(REPEATS):
+        # Every repeat computes from scratch rather than hitting st.cache_data
+        st.cache_data.clear()
+        app = AppTest.from_file(str(APP_SCRIPT), default_timeout=120)
+        start = time.perf_counter()
+        app.run()
+        cold.append(time.perf_counter() - start)
+
+        # Fill the form like a user and time the rerun that renders every tab
+        for widget, value in zip(app.number_input, (1800000, 400000, 300000, 100000, 60000, 150000, 350000, 120000)):
+            widget.set_value(value)
+        app.button[0].click()
+        start = time.perf_counter()
+        app.run()
+        rerun.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(f"App raised during the benchmark: {app.exception[0].value}")
+    logging.disable(logging.NOTSET)
+
+    return {
+        'app.first_run': _metric(min(cold) * 1000, 'ms', False),
+        'app.calculate_rerun': _metric(min(rerun) * 1000, 'ms', False),
+    }
+
+
+def bench_imports(args):
+    from import_time import app_import_times
+
+    packages = app_import_times()
+    results = {'imports.app_first_run.total': _metric(sum(ms for ms, _ in packages.values()), 'ms', False)}
+    for package in ('streamlit', 'pandas', 'plotly', 'xlsxwriter', 'numpy', 'tax_engine'):
+        results[f'imports.app_first_run.{package}'] = _metric(packages.get(package, (0.0, 0))[0], 'ms', False)
+    return results
+
+
+BENCHMARKS = {
+    'scalar': bench_scalar,
+    'batch': bench_batch,
+    'report': bench_report,
+    'app': bench_app,
+    'imports': bench_imports,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment():
+    import numpy
+
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """(name, baseline value, current value, relative change, regressed) for metrics in both runs.
+
+    The relative change is positive when the metric got better.  A metric
+    that was 0 in the baseline (e.g. the import time of a package the app no
+    longer loads at startup) counts as infinitely worse once it is not.
+    """
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if not previous['value']:
+            change = 0.0 if not current['value'] else float('inf')
+        else:
+            change = current['value'] / previous['value'] - 1
+        if not current['higher_is_better']:
+            change = -change
+        noise = abs(current['value'] - previous['value']) <= NOISE_FLOOR.get(current['unit'], 0.0)
+        rows.append((name, previous['value'], current['value'], change, change < -tolerance and not noise))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the tax calculator benchmarks.")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="benchmarks to run (default: all)")
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name} benchmarks...", file=sys.stderr)
+        results.update(BENCHMARKS[name](args))
+
+    report = {'environment': _environment(), 'results': results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    else:
+        print(text)
+
+    if not args.baseline:
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text())['results']
+    regressions = 0
+    for name, previous, current, change, regressed in compare(results, baseline, args.tolerance):
+        regressions += regressed
+        flag = 'REGRESSION' if regressed else ''
+        print(f"{name:55} {previous:>14.6g} -> {current:>14.6g} {change:+8.1%} {flag}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Headless income tax engine for the APMH Tax Calculator.
+
+Importing this package pulls in no third-party modules: the scalar functions
+are plain Python, the Excel report imports xlsxwriter/pandas only when a
+report is generated, and the NumPy-based modules are loaded on first use.
+"""
+from .advance import ADVANCE_TAX_THRESHOLD, INSTALLMENT_SCHEDULE, advance_tax_installments, installment_due_dates
+from .capital_gains import CapitalGainsSummary, compute_tax_with_trades, summarize_capital_gains
+from .computation import TaxComputation, compute_tax
+from .core import (
+    calculate_capital_gains_tax,
+    calculate_surcharge_separate,
+    calculate_tax_new_regime,
+    calculate_tax_old_regime,
+    calculate_total_income,
+)
+from .fixedpoint import compute_tax_paise, compute_tax_paise_batch, to_paise, to_paise_array
+from .piecewise import PiecewiseTax, compile_tax_function
+from .report import create_bulk_excel_report, create_computation_excel_report, create_professional_excel_report
+from .rules import DEFAULT_ASSESSMENT_YEAR, SlabTable, TaxRules, load_rules, rule_version
+
+# Names resolved on first access, so that NumPy (and sqlite3) are only imported when needed
+_LAZY_EXPORTS = {
+    'calculate_surcharge_separate_batch': 'batch',
+    'calculate_tax_batch': 'batch',
+    'calculate_tax_new_regime_batch': 'batch',
+    'calculate_tax_old_regime_batch': 'batch',
+    'calculate_total_income_batch': 'batch',
+    'round2': 'batch',
+    'BATCH_RESULT_FIELDS': 'batch',
+    'compute_tax_batch': 'batch',
+    'advance_tax_installments_batch': 'batch',
+    'advance_tax_interest': 'interest',
+    'simulate_advance_tax': 'simulation',
+    'set_off_losses': 'losses',
+    'old_regime_deductions': 'deductions',
+    'old_regime_tax_with_deductions': 'deductions',
+    'allocate_savings': 'deductions',
+    'ParallelBatchExecutor': 'parallel',
+    'compute_tax_parallel': 'parallel',
+    'SharedColumns': 'parallel',
+    'MicroBatcher': 'service',
+    'TaxService': 'service',
+    'break_even_deduction': 'planning',
+    'regime_tax_by_deduction': 'planning',
+    'regime_tax_curves': 'planning',
+    'salary_for_take_home': 'inverse',
+    'salary_for_tax': 'inverse',
+    'ResultCache': 'cache',
+    'run_payroll': 'payroll',
+    'export_payroll_workbook': 'payroll',
+}
+
+__all__ = [
+    'ADVANCE_TAX_THRESHOLD',
+    'INSTALLMENT_SCHEDULE',
+    'advance_tax_installments',
+    'installment_due_dates',
+    'CapitalGainsSummary',
+    'compute_tax_with_trades',
+    'summarize_capital_gains',
+    'TaxComputation',
+    'compute_tax',
+    'calculate_capital_gains_tax',
+    'calculate_surcharge_separate',
+    'calculate_tax_new_regime',
+    'calculate_tax_old_regime',
+    'calculate_total_income',
+    'compute_tax_paise',
+    'compute_tax_paise_batch',
+    'to_paise',
+    'to_paise_array',
+    'PiecewiseTax',
+    'compile_tax_function',
+    'create_bulk_excel_report',
+    'create_computation_excel_report',
+    'create_professional_excel_report',
+    'DEFAULT_ASSESSMENT_YEAR',
+    'SlabTable',
+    'TaxRules',
+    'load_rules',
+    'rule_version',
+    *_LAZY_EXPORTS,
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(f'.{_LAZY_EXPORTS[name]}', __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,38 @@
+"""Advance tax installment schedule (sections 208/211)."""
+import datetime
+
+# Advance tax is payable when net liability after TDS/TCS is at least this much
+ADVANCE_TAX_THRESHOLD = 10000
+
+# (quarter, due date, cumulative share of net liability due by that date)
+INSTALLMENT_SCHEDULE = [
+    ("Q1", "15th June", 0.15),
+    ("Q2", "15th September", 0.45),
+    ("Q3", "15th December", 0.75),
+    ("Q4", "15th March", 1.00),
+]
+
+# (month, day) of each due date; Q4 falls in the next calendar year
+INSTALLMENT_DUE_DAYS = [(6, 15), (9, 15), (12, 15), (3, 15)]
+
+
+def advance_tax_installments(net_liability):
+    """Quarterly installment amounts (rounded to ₹1) that add up to ``net_liability``"""
+    installments = []
+    paid = 0
+    for _, _, cumulative_share in INSTALLMENT_SCHEDULE:
+        cumulative_due = round(net_liability * cumulative_share)
+        installments.append(cumulative_due - paid)
+        paid = cumulative_due
+    return tuple(installments)
+
+
+def financial_year_start(assessment_year):
+    """1 April of the financial year assessed in ``assessment_year`` ('2026-27' -> 2025-04-01)"""
+    return datetime.date(int(assessment_year[:4]) - 1, 4, 1)
+
+
+def installment_due_dates(assessment_year):
+    """Due date of each installment in ``INSTALLMENT_SCHEDULE`` for ``assessment_year``"""
+    year = financial_year_start(assessment_year).year
+    return [datetime.date(year if month >= 4 else year + 1, month, day) for month, day in INSTALLMENT_DUE_DAYS]
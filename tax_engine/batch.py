@@ -0,0 +1,257 @@
+"""Vectorized (NumPy) batch versions of the tax calculation functions.
+
+Every function here mirrors its scalar counterpart operation-for-operation
+(same constants, same order of floating point operations, same rounding) so
+that a batch run over many taxpayers is bit-identical to calling the scalar
+function once per taxpayer.  Slab tax and surcharge rates come from the
+same compiled rule tables as the scalar path (``tax_engine.rules``); all
+per-taxpayer work is done with array operations.
+"""
+import numpy as np
+
+from .advance import ADVANCE_TAX_THRESHOLD, INSTALLMENT_SCHEDULE
+from .rules import DEFAULT_ASSESSMENT_YEAR, load_rules
+
+_SPLITTER = 134217729.0  # 2**27 + 1, used to split a double into two halves
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def round2(values):
+    """Round to 2 decimals exactly like Python's built-in ``round(x, 2)``.
+
+    ``np.round`` scales by 100 and rounds the (inexact) product, which can
+    disagree with ``round`` on values that sit next to a half-paisa.  Here
+    the product error is recovered with an error-free transformation so the
+    half-even decision is taken on the exact decimal value.
+    """
+    x = _as_array(values)
+    product = x * 100.0
+
+    # Exact error of x * 100 (Dekker split of x; 100 needs only 7 bits)
+    c = _SPLITTER * x
+    x_hi = c - (c - x)
+    x_lo = x - x_hi
+    error = (x_hi * 100.0 - product) + x_lo * 100.0
+
+    rounded = np.rint(product)
+    remainder = product - rounded
+    rounded = rounded + ((remainder == 0.5) & (error > 0)) - ((remainder == -0.5) & (error < 0))
+    return rounded / 100.0
+
+
+def calculate_total_income_batch(regime, salary, business_income, house_income, other_sources, house_loan_interest=0,
+                                 assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Array version of calculate_total_income (regime applies to all rows)"""
+    rules = load_rules('new' if regime == 'new' else 'old', assessment_year)
+    salary = _as_array(salary)
+    business_income = _as_array(business_income)
+    house_income = _as_array(house_income)
+    other_sources = _as_array(other_sources)
+    house_loan_interest = _as_array(house_loan_interest)
+
+    # Salary – Apply standard deduction
+    salary = salary - rules.standard_deduction
+
+    # House Property – Apply 30% standard deduction THEN subtract loan interest
+    house_income = house_income * 0.70 - house_loan_interest
+
+    # Total income excluding capital gains
+    return (np.maximum(0, salary) + np.maximum(0, business_income)
+            + np.maximum(0, house_income) + np.maximum(0, other_sources))
+
+
+def calculate_surcharge_separate_batch(tax_other, tax_cg, total_income, regime, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Array version of calculate_surcharge_separate"""
+    rules = load_rules('old' if regime == 'old' else 'new', assessment_year)
+    tax_other = _as_array(tax_other)
+    tax_cg = _as_array(tax_cg)
+    total_income = _as_array(total_income)
+
+    # Determine slab rate based on total income
+    slab_rate = rules.surcharge.rate_array(total_income)
+
+    # Apply surcharge separately
+    surcharge_on_other = tax_other * slab_rate  # No cap
+    surcharge_on_cg = tax_cg * np.minimum(slab_rate, rules.surcharge_cg_cap)  # Capped at 15%
+
+    total_surcharge = surcharge_on_other + surcharge_on_cg
+
+    return total_surcharge, slab_rate
+
+
+def calculate_tax_old_regime_batch(total_income, stcg, ltcg, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Array version of calculate_tax_old_regime"""
+    rules = load_rules('old', assessment_year)
+    total_income = _as_array(total_income)
+    stcg = _as_array(stcg)
+    ltcg = _as_array(ltcg)
+
+    # Base tax (normal income)
+    tax = rules.slabs.tax_array(total_income)
+
+    # Capital gains tax (separate calculation)
+    cg_tax = stcg * rules.stcg_rate
+    cg_tax = np.where(ltcg > rules.ltcg_exemption, cg_tax + (ltcg - rules.ltcg_exemption) * rules.ltcg_rate, cg_tax)
+
+    # Apply rebate ONLY to regular income tax (NOT capital gains)
+    total_taxable_income = total_income + stcg + ltcg
+    rebate_eligible = total_taxable_income <= rules.rebate_limit  # ₹5L limit
+    rebate_applied = np.where(rebate_eligible, np.minimum(rules.rebate_max, tax), 0.0)
+    tax_after_rebate = np.where(rebate_eligible, np.maximum(0, tax - rebate_applied), tax)
+
+    # Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
+    total_tax_before_surcharge = tax_after_rebate + cg_tax
+
+    # Surcharge
+    surcharge, slab_rate = calculate_surcharge_separate_batch(
+        tax_after_rebate, cg_tax, total_income + stcg + ltcg, "old", assessment_year
+    )
+
+    # Cess
+    cess = (total_tax_before_surcharge + surcharge) * rules.cess_rate
+
+    return (round2(np.maximum(total_tax_before_surcharge, 0)), round2(surcharge), round2(cess),
+            round2(rebate_applied), np.zeros_like(total_income))
+
+
+def calculate_tax_new_regime_batch(total_income, stcg, ltcg, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Array version of calculate_tax_new_regime"""
+    rules = load_rules('new', assessment_year)
+    total_income = _as_array(total_income)
+    stcg = _as_array(stcg)
+    ltcg = _as_array(ltcg)
+
+    # Step 1: Apply LTCG exemption of ₹1.25L first
+    exempt_ltcg = np.minimum(ltcg, rules.ltcg_exemption)
+    taxable_ltcg_after_exemption = np.maximum(0, ltcg - exempt_ltcg)
+
+    # Step 2 & 3: Apply the ₹4L basic exemption - other income, then STCG, then LTCG
+    remaining_exemption = rules.slabs.basic_exemption
+    other_income_exempted = np.minimum(total_income, remaining_exemption)
+    remaining_exemption = np.maximum(0, remaining_exemption - other_income_exempted)
+
+    stcg_exempted = np.minimum(stcg, remaining_exemption)
+    remaining_exemption = np.maximum(0, remaining_exemption - stcg_exempted)
+    taxable_stcg = np.maximum(0, stcg - stcg_exempted)
+
+    ltcg_exempted = np.minimum(taxable_ltcg_after_exemption, remaining_exemption)
+    final_taxable_ltcg = np.maximum(0, taxable_ltcg_after_exemption - ltcg_exempted)
+
+    # Step 4: Tax on REGULAR income from the compiled slab table
+    regular_tax = rules.slabs.tax_array(total_income)
+
+    # Step 5: Calculate capital gains tax separately
+    cg_tax = taxable_stcg * rules.stcg_rate + final_taxable_ltcg * rules.ltcg_rate
+
+    # Step 6: Apply rebate ONLY to regular income tax (NOT capital gains)
+    total_taxable_income = total_income + stcg + ltcg
+    rebate_eligible = total_taxable_income <= rules.rebate_limit  # ₹12L limit
+    rebate_applied = np.where(rebate_eligible, np.minimum(rules.rebate_max, regular_tax), 0.0)
+    regular_tax_after_rebate = np.where(rebate_eligible, np.maximum(0, regular_tax - rebate_applied), regular_tax)
+
+    # Step 7: Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
+    total_tax_before_surcharge = regular_tax_after_rebate + cg_tax
+
+    # Step 8: Apply Marginal Relief for income between ₹12L to ₹12.6L
+    marginal_relief_amount = total_taxable_income - rules.rebate_limit
+    relief_due = ((total_taxable_income > rules.rebate_limit) & (total_taxable_income <= rules.marginal_relief_limit)
+                  & (total_tax_before_surcharge > marginal_relief_amount))
+    marginal_relief_applied = np.where(relief_due, total_tax_before_surcharge - marginal_relief_amount, 0.0)
+    total_tax_before_surcharge = np.where(relief_due, marginal_relief_amount, total_tax_before_surcharge)
+
+    # Step 9: Calculate surcharge
+    surcharge, slab_rate = calculate_surcharge_separate_batch(
+        regular_tax_after_rebate, cg_tax, total_income + stcg + ltcg, "new", assessment_year
+    )
+
+    # Step 10: Calculate cess
+    cess = (total_tax_before_surcharge + surcharge) * rules.cess_rate
+
+    return (round2(np.maximum(total_tax_before_surcharge, 0)), round2(surcharge), round2(cess),
+            round2(rebate_applied), round2(marginal_relief_applied))
+
+
+def calculate_tax_batch(regime, total_income, stcg, ltcg, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Dispatch to the batch function for ``regime`` ('new' or 'old').
+
+    Returns a tuple of arrays: (tax, surcharge, cess, rebate, marginal_relief).
+    """
+    if regime == 'old':
+        return calculate_tax_old_regime_batch(total_income, stcg, ltcg, assessment_year)
+    return calculate_tax_new_regime_batch(total_income, stcg, ltcg, assessment_year)
+
+
+def advance_tax_installments_batch(net_liability):
+    """Array version of advance_tax_installments - one (n, 4) row per taxpayer"""
+    net_liability = _as_array(net_liability)
+    installments = np.empty(net_liability.shape + (len(INSTALLMENT_SCHEDULE),))
+    paid = np.zeros(net_liability.shape)
+    for i, (_, _, cumulative_share) in enumerate(INSTALLMENT_SCHEDULE):
+        # np.rint rounds half to even, exactly like round() on a float
+        cumulative_due = np.rint(net_liability * cumulative_share)
+        installments[..., i] = cumulative_due - paid
+        paid = cumulative_due
+    return installments
+
+
+# Result columns of compute_tax_batch, in output order
+BATCH_RESULT_FIELDS = ('total_income', 'total_taxable_income', 'base_tax', 'surcharge', 'cess',
+                       'rebate_applied', 'marginal_relief_applied', 'total_tax', 'net_tax',
+                       'net_tax_liability', 'advance_tax_applicable',
+                       'installment_q1', 'installment_q2', 'installment_q3', 'installment_q4')
+
+
+def compute_tax_batch(regime, salary, business_income, house_income, house_loan_interest, other_sources,
+                      stcg, ltcg, tds_paid, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Array version of compute_tax for many taxpayers at once.
+
+    ``regime`` is one regime for every row, an array of 'new'/'old' per row,
+    or a boolean array that is True for old-regime rows.  Returns a dict of
+    arrays keyed by ``BATCH_RESULT_FIELDS``, matching the corresponding
+    ``TaxComputation`` attributes (installments are split into q1-q4).
+    """
+    salary = _as_array(salary)
+    business_income, house_income, house_loan_interest, other_sources, stcg, ltcg, tds_paid = (
+        np.broadcast_to(_as_array(values), salary.shape)
+        for values in (business_income, house_income, house_loan_interest, other_sources, stcg, ltcg, tds_paid)
+    )
+    # A net capital loss counts as nil, as in compute_tax
+    stcg, ltcg = np.maximum(0.0, stcg), np.maximum(0.0, ltcg)
+    regime = np.asarray(regime)
+    is_old = np.broadcast_to(regime if regime.dtype == bool else regime == 'old', salary.shape)
+
+    results = {name: np.empty(salary.shape) for name in BATCH_RESULT_FIELDS}
+
+    for regime_name, rows in (('new', ~is_old), ('old', is_old)):
+        if not rows.any():
+            continue
+
+        total_income = calculate_total_income_batch(
+            regime_name, salary[rows], business_income[rows], house_income[rows], other_sources[rows],
+            house_loan_interest[rows], assessment_year)
+        base_tax, surcharge, cess, rebate_applied, marginal_relief_applied = calculate_tax_batch(
+            regime_name, total_income, stcg[rows], ltcg[rows], assessment_year)
+        total_tax = base_tax + surcharge + cess
+
+        results['total_income'][rows] = total_income
+        results['total_taxable_income'][rows] = total_income + stcg[rows] + ltcg[rows]
+        results['base_tax'][rows] = base_tax
+        results['surcharge'][rows] = surcharge
+        results['cess'][rows] = cess
+        results['rebate_applied'][rows] = rebate_applied
+        results['marginal_relief_applied'][rows] = marginal_relief_applied
+        results['total_tax'][rows] = total_tax
+        results['net_tax'][rows] = total_tax - tds_paid[rows]
+
+    # Advance tax is calculated on tax liability less TDS
+    net_tax_liability = np.maximum(0, results['total_tax'] - tds_paid)
+    results['net_tax_liability'] = net_tax_liability
+    results['advance_tax_applicable'] = net_tax_liability >= ADVANCE_TAX_THRESHOLD
+    installments = advance_tax_installments_batch(net_tax_liability)
+    for i in range(installments.shape[-1]):
+        results[f'installment_q{i + 1}'] = installments[..., i]
+
+    return results
@@ -0,0 +1,233 @@
+"""Persistent result cache: computations and Excel reports kept on disk.
+
+The same client's computation and report are regenerated many times a day.
+``ResultCache`` stores both in one SQLite file, content-addressed: the key
+is a SHA-256 of the normalized inputs, the assessment year, the rule
+version (``rules.rule_version``) and ``CACHE_FORMAT_VERSION``.  A corrected
+rule table or a new report layout therefore never matches an old entry;
+those simply age out.
+
+A repeat request is one primary-key read that returns the computed figures
+and, once a report has been built for them, the finished .xlsx bytes.
+Every client that asks for a result is recorded against its key in a
+table of its own, so clients whose inputs happen to match each keep the
+shared entry in their list.  The file is bounded to ``max_bytes``: when a write takes it
+over, the least recently used rows are deleted.
+
+Usage::
+
+    from tax_engine.cache import ResultCache
+
+    with ResultCache() as cache:
+        computation = cache.computation('new', salary=1500000, client='ACME-001')
+        workbook = cache.report('new', salary=1500000, client='ACME-001')   # BytesIO
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from io import BytesIO
+
+from . import timing
+from .computation import TaxComputation, compute_tax
+from .report import create_computation_excel_report
+from .rules import DEFAULT_ASSESSMENT_YEAR, rule_version
+
+# Bump when compute_tax or the report layout changes without a rule change
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_CACHE_PATH = os.environ.get('TAX_ENGINE_CACHE') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'tax_engine', 'results.sqlite3')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# A hit rewrites last_used only when it is older than this (seconds), so
+# repeat requests stay a single read
+TOUCH_INTERVAL = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    assessment_year TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    computation TEXT NOT NULL,
+    report BLOB
+);
+-- Covers the size totals and eviction order without touching the blobs
+CREATE INDEX IF NOT EXISTS results_by_last_used ON results (last_used, size);
+-- Which clients asked for which result; a result shared by clients has a row each
+CREATE TABLE IF NOT EXISTS result_clients (
+    client TEXT NOT NULL,
+    key TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (client, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS result_clients_by_key ON result_clients (key);
+"""
+
+
+def normalize_inputs(regime, salary=0, business_income=0, house_income=0, house_loan_interest=0, other_sources=0,
+                     stcg=0, ltcg=0, tds_paid=0):
+    """Inputs in ``INPUT_FIELDS`` order as ``compute_tax`` reads them: 'new'/'old', amounts as floats"""
+    amounts = (salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg, tds_paid)
+    return ('old' if regime == 'old' else 'new', *(float(amount or 0.0) for amount in amounts))
+
+
+def cache_key(inputs, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Content address of one normalized input tuple under the current rules"""
+    payload = json.dumps([CACHE_FORMAT_VERSION, assessment_year, rule_version(assessment_year), list(inputs)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _dump(computation):
+    return json.dumps(computation.as_dict())
+
+
+def _load(text):
+    fields = json.loads(text)
+    fields['installments'] = tuple(fields['installments'])
+    return TaxComputation(**fields)
+
+
+class ResultCache:
+    """Computations and reports in one SQLite file; one instance can be shared between threads"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            # Readers in other processes (app sessions, batch jobs) never block on a writer
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def computation(self, regime, salary=0, business_income=0, house_income=0, house_loan_interest=0,
+                    other_sources=0, stcg=0, ltcg=0, tds_paid=0, assessment_year=DEFAULT_ASSESSMENT_YEAR,
+                    client=None):
+        """Stored ``TaxComputation`` for these inputs, computed and stored on a miss"""
+        inputs = normalize_inputs(regime, salary, business_income, house_income, house_loan_interest,
+                                  other_sources, stcg, ltcg, tds_paid)
+        key = cache_key(inputs, assessment_year)
+        row = self._lookup(key, client)
+        if row is not None:
+            return _load(row[0])
+
+        computation = compute_tax(*inputs, assessment_year=assessment_year)
+        self._store(key, client, computation, None)
+        return computation
+
+    def report(self, regime, salary=0, business_income=0, house_income=0, house_loan_interest=0,
+               other_sources=0, stcg=0, ltcg=0, tds_paid=0, assessment_year=DEFAULT_ASSESSMENT_YEAR,
+               client=None):
+        """Excel computation report for these inputs as a ``BytesIO``, built and stored on a miss"""
+        stages = timing.stages('result_cache') if timing.enabled else None
+        inputs = normalize_inputs(regime, salary, business_income, house_income, house_loan_interest,
+                                  other_sources, stcg, ltcg, tds_paid)
+        key = cache_key(inputs, assessment_year)
+        row = self._lookup(key, client)
+        if stages:
+            stages.mark('lookup')
+        if row is not None and row[1] is not None:
+            if stages:
+                stages.done()
+            return BytesIO(row[1])
+
+        if row is not None:
+            computation = _load(row[0])
+        else:
+            computation = compute_tax(*inputs, assessment_year=assessment_year)
+        report = create_computation_excel_report(computation).getvalue()
+        if stages:
+            stages.mark('build')
+        self._store(key, client, computation, report)
+        if stages:
+            stages.mark('store')
+            stages.done()
+        return BytesIO(report)
+
+    def client_entries(self, client):
+        """Stored results requested for ``client``, most recently used by it first
+
+        A list of dicts with the ``key``, the ``computation``, whether a
+        report is stored (``has_report``) and when ``client`` last used it
+        (``last_used``, epoch seconds).
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT key, results.computation, results.report IS NOT NULL, result_clients.last_used '
+                'FROM result_clients JOIN results USING (key) '
+                'WHERE result_clients.client = ? ORDER BY result_clients.last_used DESC', (client,)).fetchall()
+        return [{'key': key, 'computation': _load(computation), 'has_report': bool(has_report),
+                 'last_used': last_used} for key, computation, has_report, last_used in rows]
+
+    def size_bytes(self):
+        """Total size of the stored computations and reports"""
+        with self._lock:
+            return self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute('DELETE FROM result_clients')
+            self._connection.execute('DELETE FROM results')
+
+    def _record_client(self, key, client, now):
+        if client is not None:
+            self._connection.execute(
+                'INSERT INTO result_clients (client, key, last_used) VALUES (?, ?, ?) '
+                'ON CONFLICT (client, key) DO UPDATE SET last_used = excluded.last_used', (client, key, now))
+
+    def _lookup(self, key, client=None):
+        """(computation JSON, report bytes or None) for ``key``, or None; a hit is recorded for ``client``"""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT computation, report, last_used FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] > TOUCH_INTERVAL:
+                self._connection.execute('UPDATE results SET last_used = ? WHERE key = ?', (now, key))
+            self._record_client(key, client, now)
+        return row[:2]
+
+    def _store(self, key, client, computation, report):
+        text = _dump(computation)
+        size = len(text) + len(report or b'')
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                'INSERT INTO results (key, assessment_year, size, created, last_used, computation, report) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET report = COALESCE(excluded.report, report), '
+                'size = MAX(excluded.size, size), last_used = excluded.last_used',
+                (key, computation.assessment_year, size, now, now, text, report))
+            self._record_client(key, client, now)
+            self._evict()
+
+    def _evict(self):
+        # Keep the most recently used rows that fit in max_bytes
+        total = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        self._connection.execute(
+            'DELETE FROM results WHERE key IN ('
+            ' SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS kept FROM results)'
+            ' WHERE kept > ?)', (self.max_bytes,))
+        # The evicted results' client rows go with them
+        self._connection.execute('DELETE FROM result_clients WHERE key NOT IN (SELECT key FROM results)')
@@ -0,0 +1,298 @@
+"""Capital gains from a broker tradebook: FIFO lot matching, one pass.
+
+A client's tradebook is a list of buy and sell trades in date order, often
+hundreds of thousands of rows spanning several years.  ``match_trades``
+reads it once.  Buys open lots, kept in one queue per ISIN.  Each sell
+closes lots from the front of its ISIN's queue (first in, first out).
+Fully closed lots are dropped, and so is an ISIN's queue once it is empty,
+so memory grows with the lots still open, not with the number of trades.
+
+Each closed lot or part of a lot is one disposal:
+
+- long term when the shares were held more than ``LONG_TERM_MONTHS``
+  (listed equity shares and equity-oriented fund units, STT paid);
+- for shares acquired on or before 31 January 2018, the cost is the higher
+  of the actual cost and the lower of the 31 January 2018 fair market
+  value and the sale value (grandfathering u/s 112A / 55(2)(ac));
+- charges on a buy are added to its cost, charges on a sell come off the
+  sale value.
+
+``summarize_capital_gains`` adds up the disposals of the financial year
+being assessed.  Earlier sales still close lots, so the cost basis is
+right, but their gains are not counted.  Losses are set off within each
+class first.  A short-term loss left over is then set off against
+long-term gains (section 70).  What remains cannot be set off this year.
+The net ``stcg`` and ``ltcg`` go into ``compute_tax``, which taxes them
+through ``calculate_tax_new_regime``/``calculate_tax_old_regime``.
+
+Not modelled: intraday (speculative) trades, short sales, F&O, and
+corporate actions such as splits and bonus issues.  A tradebook with these
+needs adjusting first.
+
+Usage::
+
+    python -m tax_engine.capital_gains tradebook.csv --fmv fmv_2018.csv --disposals disposals.csv
+"""
+import argparse
+import calendar
+import csv
+import datetime
+from collections import deque
+from functools import lru_cache
+
+from .advance import financial_year_start
+from .computation import compute_tax
+from .rules import DEFAULT_ASSESSMENT_YEAR
+
+# Listed equity and equity-oriented funds are long term when held longer than this
+LONG_TERM_MONTHS = 12
+
+# Acquisitions up to this date use the higher of cost and fair market value on it
+GRANDFATHERING_DATE = datetime.date(2018, 1, 31)
+
+# Tradebook columns; ``charges`` (brokerage, exchange and other costs of the trade) is optional
+TRADE_COLUMNS = ('isin', 'trade_date', 'trade_type', 'quantity', 'price')
+CHARGES_COLUMN = 'charges'
+
+BUY_TYPES = ('buy', 'b')
+SELL_TYPES = ('sell', 's')
+
+# One row per lot (or part of a lot) closed by a sale
+DISPOSAL_FIELDS = ('isin', 'acquired', 'sold', 'quantity', 'sale_value', 'cost', 'gain', 'long_term',
+                   'grandfathered')
+
+SUMMARY_FIELDS = ('assessment_year', 'trades', 'disposals', 'short_term_gain', 'short_term_loss',
+                  'long_term_gain', 'long_term_loss', 'stcg', 'ltcg', 'short_term_loss_unabsorbed',
+                  'long_term_loss_unabsorbed', 'open_lots')
+
+
+def add_months(date, months):
+    """Same day ``months`` later, clamped to the end of a shorter month"""
+    month_index = date.month - 1 + months
+    year, month = date.year + month_index // 12, month_index % 12 + 1
+    return date.replace(year=year, month=month, day=min(date.day, calendar.monthrange(year, month)[1]))
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(text):
+    # Tradebooks give an ISO date, sometimes with a time after it; a year
+    # of trades has a few hundred distinct dates
+    return datetime.date.fromisoformat(text.strip()[:10])
+
+
+def read_tradebook(path):
+    """Yield the trades in a CSV tradebook as dicts of strings, one row in memory at a time"""
+    with open(path, newline='') as file:
+        reader = csv.DictReader(file)
+        missing = [column for column in TRADE_COLUMNS if column not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"{path}: tradebook is missing column(s) {', '.join(missing)}")
+        yield from reader
+
+
+def read_fair_market_values(path):
+    """{ISIN: 31 January 2018 price per unit} from a CSV with ``isin`` and ``fmv`` columns"""
+    with open(path, newline='') as file:
+        return {row['isin'].strip(): float(row['fmv']) for row in csv.DictReader(file) if row['fmv'].strip()}
+
+
+class LotMatcher:
+    """Open lots per ISIN, closed first in, first out as sales are matched
+
+    ``fair_market_values`` maps an ISIN to its 31 January 2018 price per
+    unit, for grandfathering; ISINs not in it are taxed on actual cost.
+    """
+
+    def __init__(self, fair_market_values=None):
+        self.fair_market_values = fair_market_values or {}
+        # Per ISIN with open lots: deque of [acquired, quantity, cost per unit,
+        # last short-term date], quantity held and its latest trade date.  The
+        # last short-term date is ``LONG_TERM_MONTHS`` after acquisition; a
+        # sale on it is still short term, a sale after it long term
+        self.lots = {}
+        self.held = {}
+        self.last_dates = {}
+        self.trades = 0
+
+    @property
+    def open_lots(self):
+        return sum(len(queue) for queue in self.lots.values())
+
+    def match(self, trades):
+        """Yield one disposal tuple (``DISPOSAL_FIELDS``) per lot closed by ``trades``
+
+        ``trades`` is any iterable of mappings with the ``TRADE_COLUMNS``
+        (strings as read from a CSV, or numbers and dates) in date order.
+        A sale of more than the open quantity, or a trade dated before the
+        previous trade in the same ISIN, raises ``ValueError``.
+        """
+        for trade in trades:
+            self.trades += 1
+            yield from self._trade(trade)
+
+    def _trade(self, trade):
+        row = self.trades
+        isin = str(trade['isin']).strip()
+        date = trade['trade_date']
+        if not isinstance(date, datetime.date):
+            date = _parse_date(date)
+        side = str(trade['trade_type']).strip().lower()
+        quantity = float(trade['quantity'])
+        price = float(trade['price'])
+        charges = float(trade.get(CHARGES_COLUMN) or 0.0)
+        if quantity <= 0:
+            raise ValueError(f"Trade {row}: quantity must be positive, got {trade['quantity']!r}")
+        if isin in self.last_dates and date < self.last_dates[isin]:
+            raise ValueError(f"Trade {row}: {isin} trade on {date} follows one on {self.last_dates[isin]}; "
+                             f"the tradebook must be in date order")
+
+        if side in BUY_TYPES:
+            lot = [date, quantity, (quantity * price + charges) / quantity, add_months(date, LONG_TERM_MONTHS)]
+            self.lots.setdefault(isin, deque()).append(lot)
+            self.held[isin] = self.held.get(isin, 0.0) + quantity
+            self.last_dates[isin] = date
+            return
+        if side not in SELL_TYPES:
+            raise ValueError(f"Trade {row}: trade_type must be buy or sell, got {trade['trade_type']!r}")
+
+        queue = self.lots.get(isin)
+        held = self.held.get(isin, 0.0)
+        # Tolerance for float dust from fractional fund units
+        if quantity > held * (1 + 1e-9) + 1e-9:
+            raise ValueError(f"Trade {row}: sells {quantity:g} of {isin} on {date} with {held:g} held")
+        sale_price = (quantity * price - charges) / quantity
+        fair_market_value = self.fair_market_values.get(isin)
+        remaining = quantity
+        while remaining > 1e-9 and queue:
+            lot = queue[0]
+            acquired, lot_quantity, unit_cost, last_short_term_date = lot
+            closed = min(remaining, lot_quantity)
+            sale_value = closed * sale_price
+            cost = closed * unit_cost
+            grandfathered = fair_market_value is not None and acquired <= GRANDFATHERING_DATE
+            if grandfathered:
+                cost = max(cost, min(closed * fair_market_value, sale_value))
+            yield (isin, acquired, date, closed, sale_value, cost, sale_value - cost, date > last_short_term_date,
+                   grandfathered)
+
+            remaining -= closed
+            if closed >= lot_quantity - 1e-9:
+                queue.popleft()
+            else:
+                lot[1] = lot_quantity - closed
+        if queue:
+            self.held[isin] = held - quantity
+            self.last_dates[isin] = date
+        else:
+            del self.lots[isin], self.held[isin], self.last_dates[isin]
+
+
+def match_trades(trades, fair_market_values=None):
+    """Disposals of ``trades``, FIFO per ISIN (see ``LotMatcher.match``)"""
+    return LotMatcher(fair_market_values).match(trades)
+
+
+class CapitalGainsSummary:
+    """Gains and losses of one financial year from a tradebook (read-only)
+
+    ``short_term_gain`` etc. are the gross gains and losses (losses as
+    positive amounts); ``stcg`` and ``ltcg`` are what is left after set-off,
+    ready for ``compute_tax``; the ``*_unabsorbed`` losses are what could
+    not be set off this year.
+    """
+
+    __slots__ = SUMMARY_FIELDS
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self):
+        return f"CapitalGainsSummary(stcg={self.stcg!r}, ltcg={self.ltcg!r})"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def summarize_capital_gains(trades, fair_market_values=None, assessment_year=DEFAULT_ASSESSMENT_YEAR,
+                            disposal_sink=None):
+    """Match ``trades`` (see ``match_trades``) and add up the year's gains into a ``CapitalGainsSummary``
+
+    ``disposal_sink``, if given, is called with each disposal tuple of the
+    year as it is matched, e.g. a ``csv.writer``'s ``writerow``.
+    """
+    year_start = financial_year_start(assessment_year)
+    year_end = year_start.replace(year=year_start.year + 1) - datetime.timedelta(days=1)
+    matcher = LotMatcher(fair_market_values)
+    disposals = 0
+    # (long term, gain) -> total; losses as positive amounts
+    totals = {(False, True): 0.0, (False, False): 0.0, (True, True): 0.0, (True, False): 0.0}
+    for disposal in matcher.match(trades):
+        sold, gain, long_term = disposal[2], disposal[6], disposal[7]
+        if not year_start <= sold <= year_end:
+            continue
+        disposals += 1
+        totals[long_term, gain >= 0] += abs(gain)
+        if disposal_sink is not None:
+            disposal_sink(disposal)
+
+    short_term_gain, short_term_loss = totals[False, True], totals[False, False]
+    long_term_gain, long_term_loss = totals[True, True], totals[True, False]
+    net_short_term = short_term_gain - short_term_loss
+    net_long_term = long_term_gain - long_term_loss
+    # A net short-term loss can be set off against long-term gains, a long-term loss only within its class
+    short_term_loss_unabsorbed = max(0.0, -net_short_term - max(0.0, net_long_term))
+    ltcg = max(0.0, net_long_term - max(0.0, -net_short_term))
+    return CapitalGainsSummary(
+        assessment_year=assessment_year,
+        trades=matcher.trades,
+        disposals=disposals,
+        short_term_gain=round(short_term_gain, 2),
+        short_term_loss=round(short_term_loss, 2),
+        long_term_gain=round(long_term_gain, 2),
+        long_term_loss=round(long_term_loss, 2),
+        stcg=round(max(0.0, net_short_term), 2),
+        ltcg=round(ltcg, 2),
+        short_term_loss_unabsorbed=round(short_term_loss_unabsorbed, 2),
+        long_term_loss_unabsorbed=round(max(0.0, -net_long_term), 2),
+        open_lots=matcher.open_lots,
+    )
+
+
+def compute_tax_with_trades(regime, trades, salary=0, business_income=0, house_income=0, house_loan_interest=0,
+                            other_sources=0, tds_paid=0, fair_market_values=None,
+                            assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """``(TaxComputation, CapitalGainsSummary)`` with the tradebook's net STCG and LTCG as the capital gains"""
+    summary = summarize_capital_gains(trades, fair_market_values, assessment_year)
+    computation = compute_tax(regime, salary, business_income, house_income, house_loan_interest, other_sources,
+                              summary.stcg, summary.ltcg, tds_paid, assessment_year)
+    return computation, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Short and long term capital gains from a broker tradebook.")
+    parser.add_argument('tradebook', help="CSV with " + ", ".join(TRADE_COLUMNS) + " (and optional charges)")
+    parser.add_argument('--fmv', help="CSV of isin, fmv: 31 January 2018 prices for grandfathering")
+    parser.add_argument('--disposals', help="write one row per lot sold in the year to this CSV")
+    parser.add_argument('--assessment-year', default=DEFAULT_ASSESSMENT_YEAR)
+    args = parser.parse_args(argv)
+
+    fair_market_values = read_fair_market_values(args.fmv) if args.fmv else None
+    trades = read_tradebook(args.tradebook)
+    if args.disposals:
+        with open(args.disposals, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(DISPOSAL_FIELDS)
+            summary = summarize_capital_gains(trades, fair_market_values, args.assessment_year, writer.writerow)
+    else:
+        summary = summarize_capital_gains(trades, fair_market_values, args.assessment_year)
+
+    for name, value in summary.as_dict().items():
+        print(f"{name:28} {value:,.2f}" if isinstance(value, float) else f"{name:28} {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""One immutable result object per set of inputs, shared by every consumer.
+
+``compute_tax`` runs the income aggregation, regime tax and advance-tax
+schedule once.  The results screen, Analysis charts, Advance Tax tabs and
+Excel report all read the same ``TaxComputation`` instead of re-deriving
+the numbers themselves.
+"""
+from . import timing
+from .advance import ADVANCE_TAX_THRESHOLD, advance_tax_installments
+from .core import (
+    calculate_capital_gains_tax,
+    calculate_tax_new_regime,
+    calculate_tax_old_regime,
+    calculate_total_income,
+)
+from .rules import DEFAULT_ASSESSMENT_YEAR, load_rules
+
+INPUT_FIELDS = ('regime', 'salary', 'business_income', 'house_income', 'house_loan_interest',
+                'other_sources', 'stcg', 'ltcg', 'tds_paid')
+
+RESULT_FIELDS = ('assessment_year', 'standard_deduction', 'processed_salary', 'processed_house',
+                 'total_income', 'total_taxable_income', 'base_tax', 'surcharge', 'cess',
+                 'rebate_applied', 'marginal_relief_applied', 'total_tax', 'net_tax',
+                 'cg_tax_component', 'regular_tax_component', 'net_tax_liability',
+                 'advance_tax_applicable', 'installments')
+
+
+class TaxComputation:
+    """Inputs and every derived figure for one taxpayer (read-only)"""
+
+    __slots__ = INPUT_FIELDS + RESULT_FIELDS
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        # Slots plus a blocked __setattr__ need an explicit pickle recipe
+        # (Streamlit's cache pickles return values)
+        return (_restore, (self.as_dict(),))
+
+    def __eq__(self, other):
+        if not isinstance(other, TaxComputation):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        return hash(self.inputs)
+
+    def __repr__(self):
+        return f"TaxComputation(regime={self.regime!r}, total_tax={self.total_tax!r})"
+
+    @property
+    def inputs(self):
+        """Normalized input tuple in ``INPUT_FIELDS`` order"""
+        return tuple(getattr(self, name) for name in INPUT_FIELDS)
+
+    @property
+    def effective_rate(self):
+        """Total tax as a percentage of total taxable income"""
+        if self.total_taxable_income > 0:
+            return (self.total_tax / self.total_taxable_income) * 100
+        return 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _restore(fields):
+    return TaxComputation(**fields)
+
+
+def compute_tax(regime, salary=0, business_income=0, house_income=0, house_loan_interest=0, other_sources=0,
+                stcg=0, ltcg=0, tds_paid=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Run the full computation for one taxpayer; empty (None) amounts count as 0"""
+    regime = 'old' if regime == 'old' else 'new'
+    salary = salary or 0.0
+    business_income = business_income or 0.0
+    house_income = house_income or 0.0
+    house_loan_interest = house_loan_interest or 0.0
+    other_sources = other_sources or 0.0
+    # A net capital loss counts as nil, like a loss under any other head
+    # (``set_off_losses`` sets losses off instead)
+    stcg = max(0.0, stcg or 0.0)
+    ltcg = max(0.0, ltcg or 0.0)
+    tds_paid = tds_paid or 0.0
+
+    stages = timing.stages('compute_tax') if timing.enabled else None
+    rules = load_rules(regime, assessment_year)
+
+    total_income = calculate_total_income(regime, salary, business_income, house_income, other_sources,
+                                          house_loan_interest, assessment_year)
+    if stages:
+        stages.mark('total_income')
+
+    if regime == 'old':
+        base_tax, surcharge, cess, rebate_applied, marginal_relief_applied = calculate_tax_old_regime(
+            total_income, stcg, ltcg, assessment_year)
+    else:
+        base_tax, surcharge, cess, rebate_applied, marginal_relief_applied = calculate_tax_new_regime(
+            total_income, stcg, ltcg, assessment_year)
+    if stages:
+        stages.mark('regime_tax')
+
+    total_tax = base_tax + surcharge + cess
+
+    # Split of base tax between capital gains and other income
+    cg_tax_component = calculate_capital_gains_tax(regime, total_income, stcg, ltcg, assessment_year)
+    regular_tax_component = max(0, base_tax - cg_tax_component)
+    if stages:
+        stages.mark('capital_gains_split')
+
+    # Advance tax is calculated on tax liability less TDS
+    net_tax_liability = max(0, total_tax - tds_paid)
+    advance_tax_applicable = net_tax_liability >= ADVANCE_TAX_THRESHOLD
+
+    computation = TaxComputation(
+        regime=regime,
+        salary=salary,
+        business_income=business_income,
+        house_income=house_income,
+        house_loan_interest=house_loan_interest,
+        other_sources=other_sources,
+        stcg=stcg,
+        ltcg=ltcg,
+        tds_paid=tds_paid,
+        assessment_year=assessment_year,
+        standard_deduction=rules.standard_deduction,
+        processed_salary=salary - rules.standard_deduction,
+        processed_house=(house_income * 0.70) - house_loan_interest,
+        total_income=total_income,
+        total_taxable_income=total_income + stcg + ltcg,
+        base_tax=base_tax,
+        surcharge=surcharge,
+        cess=cess,
+        rebate_applied=rebate_applied,
+        marginal_relief_applied=marginal_relief_applied,
+        total_tax=total_tax,
+        net_tax=total_tax - tds_paid,
+        cg_tax_component=cg_tax_component,
+        regular_tax_component=regular_tax_component,
+        net_tax_liability=net_tax_liability,
+        advance_tax_applicable=advance_tax_applicable,
+        installments=advance_tax_installments(net_tax_liability),
+    )
+    if stages:
+        stages.mark('advance_tax')
+        stages.done()
+    return computation
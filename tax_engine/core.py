@@ -0,0 +1,183 @@
+"""Scalar income tax calculation functions (one taxpayer per call)."""
+from . import timing
+from .rules import DEFAULT_ASSESSMENT_YEAR, load_rules
+
+
+# TAX CALCULATION FUNCTIONS (Final Corrected Version with Marginal Relief)
+def calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest=0,
+                           assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    stages = timing.stages('total_income') if timing.enabled else None
+
+    # Salary – Apply standard deduction
+    rules = load_rules('new' if regime == 'new' else 'old', assessment_year)
+    salary -= rules.standard_deduction
+    if stages:
+        stages.mark('salary')
+
+    # House Property – Apply 30% standard deduction THEN subtract loan interest
+    house_income *= 0.70
+    house_income -= house_loan_interest  # Deduct interest on house property loan
+    if stages:
+        stages.mark('house_property')
+
+    # Total income excluding capital gains
+    total = max(0, salary) + max(0, business_income) + max(0, house_income) + max(0, other_sources)
+    if stages:
+        stages.mark('aggregation')
+        stages.done()
+    return total
+
+def calculate_surcharge_separate(tax_other, tax_cg, total_income, regime, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Calculate surcharge separately for regular and CG income"""
+    rules = load_rules('old' if regime == 'old' else 'new', assessment_year)
+
+    # Determine slab rate based on total income
+    slab_rate = rules.surcharge.rate(total_income)
+
+    # Apply surcharge separately
+    surcharge_on_other = tax_other * slab_rate  # No cap
+    surcharge_on_cg = tax_cg * min(slab_rate, rules.surcharge_cg_cap)  # Capped at 15%
+
+    total_surcharge = surcharge_on_other + surcharge_on_cg
+
+    return total_surcharge, slab_rate
+
+def calculate_capital_gains_tax(regime, total_income, stcg, ltcg, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Tax on STCG and LTCG, before rebate, surcharge and cess"""
+    if regime == 'old':
+        rules = load_rules('old', assessment_year)
+        cg_tax = stcg * rules.stcg_rate
+        if ltcg > rules.ltcg_exemption:
+            cg_tax += (ltcg - rules.ltcg_exemption) * rules.ltcg_rate
+        return cg_tax
+
+    rules = load_rules('new', assessment_year)
+
+    # Step 1: Apply LTCG exemption of ₹1.25L first
+    exempt_ltcg = min(ltcg, rules.ltcg_exemption)
+    taxable_ltcg_after_exemption = max(0, ltcg - exempt_ltcg)
+
+    # Step 2: Calculate available basic exemption (₹4,00,000 for new regime)
+    basic_exemption_limit = rules.slabs.basic_exemption
+
+    # Step 3: Apply basic exemption in priority order
+    # Priority: 1. Other income, 2. STCG, 3. Taxable LTCG
+    remaining_exemption = basic_exemption_limit
+
+    # Use exemption for other income first
+    other_income_exempted = min(total_income, remaining_exemption)
+    remaining_exemption = max(0, remaining_exemption - other_income_exempted)
+
+    # Use remaining exemption for STCG
+    stcg_exempted = min(stcg, remaining_exemption)
+    remaining_exemption = max(0, remaining_exemption - stcg_exempted)
+    taxable_stcg = max(0, stcg - stcg_exempted)
+
+    # Use remaining exemption for taxable LTCG
+    ltcg_exempted = min(taxable_ltcg_after_exemption, remaining_exemption)
+    final_taxable_ltcg = max(0, taxable_ltcg_after_exemption - ltcg_exempted)
+
+    return taxable_stcg * rules.stcg_rate + final_taxable_ltcg * rules.ltcg_rate
+
+def calculate_tax_old_regime(total_income, stcg, ltcg, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    stages = timing.stages('old_regime') if timing.enabled else None
+    rules = load_rules('old', assessment_year)
+
+    # Base tax (normal income)
+    tax = rules.slabs.tax(total_income)
+    if stages:
+        stages.mark('slab_tax')
+
+    # Capital gains tax (separate calculation)
+    cg_tax = calculate_capital_gains_tax('old', total_income, stcg, ltcg, assessment_year)
+    if stages:
+        stages.mark('capital_gains_tax')
+
+    # Apply rebate ONLY to regular income tax (NOT capital gains)
+    rebate_applied = 0
+    total_taxable_income = total_income + stcg + ltcg
+    if total_taxable_income <= rules.rebate_limit:  # ₹5L limit
+        rebate_applied = min(rules.rebate_max, tax)  # Max ₹12.5K rebate on regular tax only
+        tax_after_rebate = max(0, tax - rebate_applied)
+    else:
+        tax_after_rebate = tax
+    if stages:
+        stages.mark('rebate')
+
+    # Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
+    total_tax_before_surcharge = tax_after_rebate + cg_tax
+
+    # Surcharge
+    surcharge, slab_rate = calculate_surcharge_separate(
+    tax_after_rebate, cg_tax, total_income + stcg + ltcg, "old", assessment_year
+    )
+    if stages:
+        stages.mark('surcharge')
+
+    # Cess
+    cess = (total_tax_before_surcharge + surcharge) * rules.cess_rate
+    if stages:
+        stages.mark('cess')
+        stages.done()
+
+    return round(max(total_tax_before_surcharge, 0), 2), round(surcharge, 2), round(cess, 2), round(rebate_applied, 2), 0
+
+def calculate_tax_new_regime(total_income, stcg, ltcg, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    stages = timing.stages('new_regime') if timing.enabled else None
+    rules = load_rules('new', assessment_year)
+
+    # Step 1: Calculate tax on REGULAR income from the compiled slab table.
+    # Other income only becomes taxable once it has used the full ₹4L
+    # exemption, so this is the slab walk starting from the ₹4L-8L slab.
+    regular_tax = rules.slabs.tax(total_income)
+    if stages:
+        stages.mark('slab_tax')
+
+    # Step 2: Calculate capital gains tax separately (LTCG exemption, then
+    # the rest of the basic exemption in priority order)
+    cg_tax = calculate_capital_gains_tax('new', total_income, stcg, ltcg, assessment_year)
+    if stages:
+        stages.mark('capital_gains_tax')
+
+    # Step 3: Apply rebate ONLY to regular income tax (NOT capital gains)
+    rebate_applied = 0
+    total_taxable_income = total_income + stcg + ltcg
+    if total_taxable_income <= rules.rebate_limit:  # ₹12L limit
+        rebate_applied = min(rules.rebate_max, regular_tax)  # Max ₹60K rebate on regular tax only
+        regular_tax_after_rebate = max(0, regular_tax - rebate_applied)
+    else:
+        regular_tax_after_rebate = regular_tax
+    if stages:
+        stages.mark('rebate')
+
+    # Step 4: Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
+    total_tax_before_surcharge = regular_tax_after_rebate + cg_tax
+
+    # Step 5: Apply Marginal Relief for income between ₹12L to ₹12.6L
+    marginal_relief_applied = 0
+
+    if rules.rebate_limit < total_taxable_income <= rules.marginal_relief_limit:
+        # Marginal relief calculation
+        marginal_relief_amount = total_taxable_income - rules.rebate_limit
+
+        # Apply marginal relief - tax cannot exceed the excess over ₹12L
+        if total_tax_before_surcharge > marginal_relief_amount:
+            marginal_relief_applied = total_tax_before_surcharge - marginal_relief_amount
+            total_tax_before_surcharge = marginal_relief_amount
+    if stages:
+        stages.mark('marginal_relief')
+
+    # Step 6: Calculate surcharge
+    surcharge, slab_rate = calculate_surcharge_separate(
+    regular_tax_after_rebate, cg_tax, total_income + stcg + ltcg, "new", assessment_year
+    )
+    if stages:
+        stages.mark('surcharge')
+
+    # Step 7: Calculate cess
+    cess = (total_tax_before_surcharge + surcharge) * rules.cess_rate
+    if stages:
+        stages.mark('cess')
+        stages.done()
+
+    return round(max(total_tax_before_surcharge, 0), 2), round(surcharge, 2), round(cess, 2), round(rebate_applied, 2), round(marginal_relief_applied, 2)
@@ -0,0 +1,195 @@
+"""Old-regime deductions and where a savings budget saves the most tax.
+
+The old regime allows exemptions and deductions that the new regime does
+not; the form's income fields are before any of them.
+``old_regime_deductions`` turns what a taxpayer paid or invested into the
+amounts allowed, each capped by its section:
+
+- HRA exemption (section 10(13A)): the least of the HRA received, rent paid
+  less 10% of basic salary, and 50% of basic salary (40% outside the
+  metros);
+- interest on a loan for a self-occupied home (section 24(b)), up to
+  ``SELF_OCCUPIED_INTEREST_LIMIT``;
+- 80C (PF, PPF, ELSS, life insurance, principal repaid), 80CCD(1B) (own
+  NPS contribution) and 80D (health insurance for self and family, and for
+  parents, with a higher limit for senior citizens).
+
+``old_regime_tax_with_deductions`` takes them off normal income - never
+capital gains - and taxes the rest like ``calculate_tax_old_regime``.
+
+``allocate_savings`` answers "I can put aside ₹X this year - where?".
+Budget can go into the room left under 80C, 80CCD(1B) and 80D.  Every
+rupee there comes off income in full, so the tax depends only on the
+amount invested, and never rises with it.  The tax is piecewise linear in
+that amount, with kinks and drops only where income crosses a slab
+boundary, the rebate limit or a surcharge threshold.  Those points, plus
+none and the whole budget, are evaluated for every taxpayer in one batch
+call.  The answer is the smallest amount that reaches the lowest tax:
+money beyond it saves nothing.  The amount is then filled into the
+sections in ``SAVINGS_SECTIONS`` order.
+"""
+import numpy as np
+
+from .batch import calculate_tax_batch, calculate_total_income_batch
+from .rules import DEFAULT_ASSESSMENT_YEAR, load_rules
+
+SECTION_80C_LIMIT = 150000
+SECTION_80CCD_1B_LIMIT = 50000
+SECTION_80D_LIMIT = 25000
+SECTION_80D_SENIOR_LIMIT = 50000
+SELF_OCCUPIED_INTEREST_LIMIT = 200000
+
+# HRA exemption: share of basic salary in a metro / elsewhere, and the part
+# of basic salary that rent must exceed
+HRA_METRO_SHARE = 0.50
+HRA_OTHER_SHARE = 0.40
+HRA_RENT_OVER_BASIC = 0.10
+
+# Allowed amounts returned by old_regime_deductions, besides 'total'
+DEDUCTION_FIELDS = ('hra_exemption', 'self_occupied_interest', 'section_80c', 'section_80ccd_1b',
+                    'section_80d_self', 'section_80d_parents')
+
+# Sections a savings budget can go into, filled in this order
+SAVINGS_SECTIONS = ('section_80c', 'section_80ccd_1b', 'section_80d_self', 'section_80d_parents')
+
+# Result arrays of allocate_savings besides one per SAVINGS_SECTIONS entry
+SAVINGS_RESULT_FIELDS = ('invested', 'old_tax_before', 'old_tax', 'tax_saving', 'new_tax', 'regime')
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _section_limits(senior_self, senior_parents):
+    return {
+        'section_80c': SECTION_80C_LIMIT,
+        'section_80ccd_1b': SECTION_80CCD_1B_LIMIT,
+        'section_80d_self': np.where(senior_self, SECTION_80D_SENIOR_LIMIT, SECTION_80D_LIMIT),
+        'section_80d_parents': np.where(senior_parents, SECTION_80D_SENIOR_LIMIT, SECTION_80D_LIMIT),
+    }
+
+
+def old_regime_deductions(basic_salary=0, hra_received=0, rent_paid=0, metro=False, self_occupied_interest=0,
+                          section_80c=0, section_80ccd_1b=0, section_80d_self=0, section_80d_parents=0,
+                          senior_self=False, senior_parents=False):
+    """Allowed exemption and deductions for amounts paid or invested (scalars or arrays)
+
+    Returns a dict of arrays keyed by ``DEDUCTION_FIELDS``, each capped by
+    its section, plus their ``total``.
+    """
+    basic_salary = _as_array(basic_salary)
+    share = np.where(metro, HRA_METRO_SHARE, HRA_OTHER_SHARE)
+    hra_exemption = np.minimum(_as_array(hra_received), np.minimum(
+        np.maximum(0, _as_array(rent_paid) - HRA_RENT_OVER_BASIC * basic_salary), share * basic_salary))
+
+    limits = _section_limits(senior_self, senior_parents)
+    claimed = {'section_80c': section_80c, 'section_80ccd_1b': section_80ccd_1b,
+               'section_80d_self': section_80d_self, 'section_80d_parents': section_80d_parents}
+    allowed = {
+        'hra_exemption': np.maximum(0, hra_exemption),
+        'self_occupied_interest': np.clip(_as_array(self_occupied_interest), 0, SELF_OCCUPIED_INTEREST_LIMIT),
+        **{section: np.clip(_as_array(amount), 0, limits[section]) for section, amount in claimed.items()},
+    }
+    allowed['total'] = sum(allowed[field] for field in DEDUCTION_FIELDS)
+    return allowed
+
+
+def _total_deductions(deductions):
+    if isinstance(deductions, dict):
+        return _as_array(deductions['total'])
+    return _as_array(deductions)
+
+
+def old_regime_tax_with_deductions(deductions, salary=0, business_income=0, house_income=0, house_loan_interest=0,
+                                   other_sources=0, stcg=0, ltcg=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Old-regime tax after ``deductions`` (an amount, or ``old_regime_deductions`` output)
+
+    Returns a dict of arrays: ``total_income`` (normal income after
+    deductions), ``base_tax``, ``surcharge``, ``cess``, ``rebate_applied``
+    and ``total_tax``.
+    """
+    total_income = calculate_total_income_batch('old', salary, business_income, house_income, other_sources,
+                                                house_loan_interest, assessment_year)
+    # Deductions come off normal income only, never below zero
+    total_income = np.maximum(0, total_income - _total_deductions(deductions))
+    base_tax, surcharge, cess, rebate_applied, _ = calculate_tax_batch('old', total_income, _as_array(stcg),
+                                                                       _as_array(ltcg), assessment_year)
+    return {'total_income': total_income, 'base_tax': base_tax, 'surcharge': surcharge, 'cess': cess,
+            'rebate_applied': rebate_applied, 'total_tax': base_tax + surcharge + cess}
+
+
+def _tax_kinks(rules):
+    """Normal incomes and total incomes at which old-regime tax changes slope or drops"""
+    normal = set(rules.slabs.lower_bounds)
+    normal.add(rules.slabs.income_for_tax(rules.rebate_max))
+    total = {rules.rebate_limit, *rules.surcharge.thresholds}
+    return np.array(sorted(normal), dtype=np.float64), np.array(sorted(total), dtype=np.float64)
+
+
+def allocate_savings(budget, salary=0, business_income=0, house_income=0, house_loan_interest=0, other_sources=0,
+                     stcg=0, ltcg=0, claimed=None, senior_self=False, senior_parents=False,
+                     assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Least amount of ``budget`` to invest, and in which sections, for the lowest old-regime tax
+
+    Amounts are as on the Calculate Tax form, for one taxpayer or arrays of
+    them.  ``claimed`` is ``old_regime_deductions`` output (or a dict with
+    some of its fields) for what is already claimed; the budget only goes
+    into the room left under ``SAVINGS_SECTIONS``.
+
+    Returns a dict of arrays: the amount ``invested`` and its split by
+    section, old-regime tax before and after, ``tax_saving``, the
+    new-regime tax (which allows none of these) and the cheaper ``regime``.
+    """
+    claimed = claimed or {}
+    budget, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg = (
+        np.atleast_1d(values) for values in np.broadcast_arrays(*(_as_array(values) for values in (
+            budget, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg))))
+    rules = load_rules('old', assessment_year)
+
+    limits = _section_limits(senior_self, senior_parents)
+    room = {section: np.maximum(0, limits[section] - _as_array(claimed.get(section, 0.0)))
+            for section in SAVINGS_SECTIONS}
+    most = np.minimum(np.maximum(0, budget), sum(room.values()))
+
+    total_income = calculate_total_income_batch('old', salary, business_income, house_income, other_sources,
+                                                house_loan_interest, assessment_year)
+    claimed_total = sum(_as_array(claimed.get(field, 0.0)) for field in DEDUCTION_FIELDS)
+    total_income = np.maximum(0, total_income - claimed_total)
+
+    # Candidate amounts: none, the whole budget, and each point where
+    # normal or total income reaches a kink
+    normal_kinks, total_kinks = _tax_kinks(rules)
+    gains = stcg + ltcg
+    candidates = np.column_stack([
+        np.zeros_like(most), most,
+        total_income[:, None] - normal_kinks[None, :],
+        (total_income + gains)[:, None] - total_kinks[None, :],
+    ])
+    # In whole rupees, so that income landing on a limit stays within it
+    candidates = np.minimum(np.ceil(np.maximum(candidates, 0)), most[:, None])
+    base_tax, surcharge, cess, _, _ = calculate_tax_batch(
+        'old', np.maximum(0, total_income[:, None] - candidates), stcg[:, None], ltcg[:, None], assessment_year)
+    tax = base_tax + surcharge + cess
+
+    # Tax never rises with the amount invested: take the least amount that
+    # reaches the lowest (the whole budget's) tax
+    lowest = tax[:, 1]
+    invested = np.where(tax <= lowest[:, None] + 0.005, candidates, np.inf).min(axis=1)
+
+    results = {'invested': invested}
+    left = invested
+    for section in SAVINGS_SECTIONS:
+        results[section] = np.minimum(left, room[section])
+        left = left - results[section]
+
+    new_income = calculate_total_income_batch('new', salary, business_income, house_income, other_sources,
+                                              house_loan_interest, assessment_year)
+    new_tax = sum(calculate_tax_batch('new', new_income, stcg, ltcg, assessment_year)[:3])
+    results.update({
+        'old_tax_before': tax[:, 0],
+        'old_tax': lowest,
+        'tax_saving': tax[:, 0] - lowest,
+        'new_tax': new_tax,
+        'regime': np.where(lowest < new_tax, 'old', 'new'),
+    })
+    return results
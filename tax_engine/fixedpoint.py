@@ -0,0 +1,317 @@
+"""Fixed-point calculation mode: every amount is an integer number of paise.
+
+The float engine (``core``/``batch``) computes in rupees and rounds each
+figure to 2 decimals at the end, so a ₹-and-paise amount such as 70% of a
+house property's annual value is only as exact as a double.  Here amounts
+are ints (int64 on the array path), rates are integer basis points and
+every division rounds in a stated direction, so results are reproducible
+to the paisa and totals over any number of rows reconcile exactly.
+
+Rounding follows the statutory rules rather than the float engine's:
+
+- the 30% house property deduction is rounded to the paisa;
+- total income is rounded u/s 288A - its paise ignored, then to the
+  nearest ₹10 (₹5 rounds up) - and normal income is that total less the
+  capital gains;
+- slab, capital gains and surcharge tax are computed to the paisa (part of
+  a paisa dropped), then tax, surcharge, cess, rebate and marginal relief
+  are each rounded to the nearest ₹1 (50 paise round up); cess is 4% of
+  the rounded tax plus surcharge;
+- advance tax installments are the cumulative due amounts rounded to ₹1.
+
+So figures can differ from the float engine by a few rupees; they are the
+ones a return or Form 16 would show.  Amounts are expected to be
+non-negative and at most ``MAX_AMOUNT`` paise.
+
+The calculation is written once, in ``_compute``, against a small set of
+operations (minimum, maximum, where, table lookup).  ``compute_tax_paise``
+runs it on Python ints for one taxpayer and ``compute_tax_paise_batch`` on
+int64 arrays for many, so the two paths give identical results by
+construction.
+"""
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+from .advance import ADVANCE_TAX_THRESHOLD, INSTALLMENT_SCHEDULE
+from .rules import DEFAULT_ASSESSMENT_YEAR, load_rules
+
+PAISE_PER_RUPEE = 100
+
+# Rates are integer basis points: amount * rate // RATE_SCALE
+RATE_SCALE = 10000
+
+# Share of a house property's annual value deducted u/s 24(a)
+HOUSE_PROPERTY_DEDUCTION = 3000
+
+# ₹10,000 crore: the largest amount (in paise) whose products with a rate
+# still fit in int64
+MAX_AMOUNT = 10 ** 13
+
+# Result keys, the same as compute_tax_batch's, every amount in paise
+PAISE_RESULT_FIELDS = ('total_income', 'total_taxable_income', 'base_tax', 'surcharge', 'cess',
+                       'rebate_applied', 'marginal_relief_applied', 'total_tax', 'net_tax',
+                       'net_tax_liability', 'advance_tax_applicable',
+                       'installment_q1', 'installment_q2', 'installment_q3', 'installment_q4')
+
+
+def _basis_points(rate):
+    points = round(rate * RATE_SCALE)
+    if abs(points - rate * RATE_SCALE) > 1e-6:
+        raise ValueError(f"Rate {rate!r} is not a whole number of basis points")
+    return points
+
+
+def _paise(rupees):
+    return round(rupees * PAISE_PER_RUPEE)
+
+
+class _PaiseRules:
+    """``TaxRules`` with amounts in paise and rates in basis points"""
+
+    def __init__(self, rules):
+        self.standard_deduction = _paise(rules.standard_deduction)
+        self.slab_bounds = tuple(_paise(lower) for lower in rules.slabs.lower_bounds)
+        self.slab_rates = tuple(_basis_points(rate) for rate in rules.slabs.rates)
+        cumulative = [0]
+        for i in range(1, len(self.slab_bounds)):
+            width_tax = (self.slab_bounds[i] - self.slab_bounds[i - 1]) * self.slab_rates[i - 1]
+            if width_tax % RATE_SCALE:
+                raise ValueError("Slab widths must give a whole number of paise of tax")
+            cumulative.append(cumulative[-1] + width_tax // RATE_SCALE)
+        self.slab_cumulative_tax = tuple(cumulative)
+        self.basic_exemption = self.slab_bounds[1]
+        self.rebate_limit = _paise(rules.rebate_limit)
+        self.rebate_max = _paise(rules.rebate_max)
+        self.marginal_relief_limit = (None if rules.marginal_relief_limit is None
+                                      else _paise(rules.marginal_relief_limit))
+        self.stcg_rate = _basis_points(rules.stcg_rate)
+        self.ltcg_rate = _basis_points(rules.ltcg_rate)
+        self.ltcg_exemption = _paise(rules.ltcg_exemption)
+        self.surcharge_thresholds = tuple(_paise(threshold) for threshold in rules.surcharge.thresholds)
+        self.surcharge_rates = tuple(_basis_points(rate) for rate in rules.surcharge.rates)
+        self.surcharge_cg_cap = _basis_points(rules.surcharge_cg_cap)
+        self.cess_rate = _basis_points(rules.cess_rate)
+
+
+@lru_cache(maxsize=None)
+def _load_paise_rules(regime, assessment_year):
+    return _PaiseRules(load_rules(regime, assessment_year))
+
+
+ADVANCE_TAX_THRESHOLD_PAISE = _paise(ADVANCE_TAX_THRESHOLD)
+INSTALLMENT_SHARES = tuple(_basis_points(share) for _, _, share in INSTALLMENT_SCHEDULE)
+
+
+class _ScalarOps:
+    minimum = staticmethod(min)
+    maximum = staticmethod(max)
+
+    @staticmethod
+    def where(condition, x, y):
+        return x if condition else y
+
+    @staticmethod
+    def segment(bounds, values, side):
+        """Index into ``bounds`` like bisect / np.searchsorted on ``side``"""
+        return (bisect_right if side == 'right' else bisect_left)(bounds, values)
+
+    @staticmethod
+    def take(table, index):
+        return table[index]
+
+
+class _ArrayOps:
+    def __init__(self):
+        import numpy as np
+        self.np = np
+        self.minimum = np.minimum
+        self.maximum = np.maximum
+        self.where = np.where
+
+    @lru_cache(maxsize=None)
+    def _table(self, values):
+        return self.np.asarray(values, dtype=self.np.int64)
+
+    def segment(self, bounds, values, side):
+        return self.np.searchsorted(self._table(bounds), values, side=side)
+
+    def take(self, table, index):
+        return self._table(table)[index]
+
+
+def _round_half_up(amount, unit):
+    """``amount`` (non-negative) divided by ``unit``, rounded half up"""
+    return (amount + unit // 2) // unit
+
+
+def _round_rupee(amount):
+    return _round_half_up(amount, PAISE_PER_RUPEE) * PAISE_PER_RUPEE
+
+
+def _slab_tax(ops, rules, income):
+    i = ops.maximum(ops.segment(rules.slab_bounds, income, 'right') - 1, 0)
+    return (ops.take(rules.slab_cumulative_tax, i)
+            + (income - ops.take(rules.slab_bounds, i)) * ops.take(rules.slab_rates, i) // RATE_SCALE)
+
+
+def _capital_gains_tax(ops, regime, rules, normal_income, stcg, ltcg):
+    taxable_ltcg = ops.maximum(0, ltcg - rules.ltcg_exemption)
+    if regime == 'old':
+        return stcg * rules.stcg_rate // RATE_SCALE + taxable_ltcg * rules.ltcg_rate // RATE_SCALE
+
+    # New regime: the basic exemption left over by normal income goes to
+    # STCG first, then to taxable LTCG
+    remaining_exemption = ops.maximum(0, rules.basic_exemption - normal_income)
+    taxable_stcg = ops.maximum(0, stcg - remaining_exemption)
+    remaining_exemption = ops.maximum(0, remaining_exemption - stcg)
+    taxable_ltcg = ops.maximum(0, taxable_ltcg - remaining_exemption)
+    return taxable_stcg * rules.stcg_rate // RATE_SCALE + taxable_ltcg * rules.ltcg_rate // RATE_SCALE
+
+
+def _compute(ops, regime, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg,
+             tds_paid, assessment_year):
+    """The whole computation for one regime; ``ops`` decides between ints and arrays"""
+    rules = _load_paise_rules(regime, assessment_year)
+    # A net capital loss counts as nil, as in compute_tax
+    stcg, ltcg = ops.maximum(0, stcg), ops.maximum(0, ltcg)
+
+    # Income under each head
+    salary = salary - rules.standard_deduction
+    house_income = (house_income - _round_half_up(house_income * HOUSE_PROPERTY_DEDUCTION, RATE_SCALE)
+                    - house_loan_interest)
+    normal_income = (ops.maximum(0, salary) + ops.maximum(0, business_income)
+                     + ops.maximum(0, house_income) + ops.maximum(0, other_sources))
+
+    # Section 288A: paise of the total income ignored, then the total rounded
+    # to the nearest ₹10.  Normal income takes the rounding; when the total
+    # rounds below the gains alone, the gains give up the difference (LTCG
+    # first)
+    total_rupees = (normal_income + stcg + ltcg) // PAISE_PER_RUPEE
+    total_taxable_income = _round_half_up(total_rupees, 10) * 10 * PAISE_PER_RUPEE
+    shortfall = ops.maximum(0, stcg + ltcg - total_taxable_income)
+    ltcg_cut = ops.minimum(ltcg, shortfall)
+    ltcg = ltcg - ltcg_cut
+    stcg = stcg - (shortfall - ltcg_cut)
+    normal_income = total_taxable_income - stcg - ltcg
+
+    regular_tax = _slab_tax(ops, rules, normal_income)
+    cg_tax = _capital_gains_tax(ops, regime, rules, normal_income, stcg, ltcg)
+
+    # Rebate u/s 87A on tax on normal income only
+    rebate = ops.where(total_taxable_income <= rules.rebate_limit, ops.minimum(rules.rebate_max, regular_tax), 0)
+    regular_tax_after_rebate = regular_tax - rebate
+    tax = regular_tax_after_rebate + cg_tax
+
+    # Marginal relief: tax no more than the income above the rebate limit
+    marginal_relief = 0
+    if rules.marginal_relief_limit is not None:
+        excess = total_taxable_income - rules.rebate_limit
+        relief_due = (excess > 0) & (total_taxable_income <= rules.marginal_relief_limit) & (tax > excess)
+        marginal_relief = ops.where(relief_due, tax - excess, 0)
+        tax = ops.where(relief_due, excess, tax)
+
+    # Surcharge at the total-income rate, capped for capital gains tax
+    surcharge_rate = ops.take(rules.surcharge_rates, ops.segment(rules.surcharge_thresholds, total_taxable_income,
+                                                                 'left'))
+    surcharge = (regular_tax_after_rebate * surcharge_rate // RATE_SCALE
+                 + cg_tax * ops.minimum(surcharge_rate, rules.surcharge_cg_cap) // RATE_SCALE)
+
+    base_tax = _round_rupee(tax)
+    surcharge = _round_rupee(surcharge)
+    cess = _round_rupee((base_tax + surcharge) * rules.cess_rate // RATE_SCALE)
+    total_tax = base_tax + surcharge + cess
+
+    net_tax = total_tax - tds_paid
+    net_tax_liability = ops.maximum(0, net_tax)
+    results = {
+        'total_income': normal_income,
+        'total_taxable_income': total_taxable_income,
+        'base_tax': base_tax,
+        'surcharge': surcharge,
+        'cess': cess,
+        'rebate_applied': _round_rupee(rebate),
+        'marginal_relief_applied': _round_rupee(marginal_relief),
+        'total_tax': total_tax,
+        'net_tax': net_tax,
+        'net_tax_liability': net_tax_liability,
+        'advance_tax_applicable': net_tax_liability >= ADVANCE_TAX_THRESHOLD_PAISE,
+    }
+
+    # Installments: cumulative amount due by each date, rounded to ₹1
+    paid = 0
+    for i, share in enumerate(INSTALLMENT_SHARES, start=1):
+        cumulative_due = _round_half_up(net_tax_liability * share, RATE_SCALE * PAISE_PER_RUPEE) * PAISE_PER_RUPEE
+        results[f'installment_q{i}'] = cumulative_due - paid
+        paid = cumulative_due
+    return results
+
+
+_SCALAR = _ScalarOps()
+
+
+@lru_cache(maxsize=None)
+def _array_ops():
+    return _ArrayOps()
+
+
+def to_paise(rupees):
+    """Rupee amount (None as 0) in whole paise, rounded like ``round(rupees, 2)``"""
+    return round(round(float(rupees or 0.0), 2) * PAISE_PER_RUPEE)
+
+
+def to_paise_array(rupees):
+    """Array of rupee amounts in int64 paise (NaN as 0), matching ``to_paise`` element by element"""
+    import numpy as np
+    from .batch import round2
+
+    rupees = np.nan_to_num(np.asarray(rupees, dtype=np.float64))
+    return np.rint(round2(rupees) * PAISE_PER_RUPEE).astype(np.int64)
+
+
+def _check_range(largest):
+    if largest > MAX_AMOUNT:
+        raise ValueError(f"Amounts above {MAX_AMOUNT:,} paise are not supported in fixed-point mode")
+
+
+def compute_tax_paise(regime, salary=0, business_income=0, house_income=0, house_loan_interest=0, other_sources=0,
+                      stcg=0, ltcg=0, tds_paid=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Fixed-point computation for one taxpayer; amounts in, and results out, as int paise
+
+    Returns a dict keyed by ``PAISE_RESULT_FIELDS``.
+    """
+    amounts = [int(amount) for amount in (salary, business_income, house_income, house_loan_interest,
+                                          other_sources, stcg, ltcg, tds_paid)]
+    _check_range(max(abs(amount) for amount in amounts))
+    regime = 'old' if regime == 'old' else 'new'
+    return _compute(_SCALAR, regime, *amounts, assessment_year)
+
+
+def compute_tax_paise_batch(regime, salary, business_income=0, house_income=0, house_loan_interest=0,
+                            other_sources=0, stcg=0, ltcg=0, tds_paid=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Fixed-point computation for many taxpayers; amounts as int64 paise arrays
+
+    ``regime`` is one regime, an array of 'new'/'old' or a boolean array
+    that is True for old-regime rows (as in ``compute_tax_batch``).
+    Returns a dict of arrays keyed by ``PAISE_RESULT_FIELDS``, row for row
+    equal to ``compute_tax_paise``.
+    """
+    import numpy as np
+
+    salary = np.asarray(salary, dtype=np.int64)
+    amounts = [salary] + [np.broadcast_to(np.asarray(values, dtype=np.int64), salary.shape)
+                          for values in (business_income, house_income, house_loan_interest, other_sources,
+                                         stcg, ltcg, tds_paid)]
+    _check_range(max(int(np.abs(values).max(initial=0)) for values in amounts))
+    regime = np.asarray(regime)
+    is_old = np.broadcast_to(regime if regime.dtype == bool else regime == 'old', salary.shape)
+
+    ops = _array_ops()
+    results = {name: np.zeros(salary.shape, dtype=bool if name == 'advance_tax_applicable' else np.int64)
+               for name in PAISE_RESULT_FIELDS}
+    for regime_name, rows in (('new', ~is_old), ('old', is_old)):
+        if not rows.any():
+            continue
+        regime_results = _compute(ops, regime_name, *(values[rows] for values in amounts), assessment_year)
+        for name in PAISE_RESULT_FIELDS:
+            results[name][rows] = regime_results[name]
+    return results
@@ -0,0 +1,144 @@
+"""Interest on shortfall and deferment of advance tax (sections 234B/234C).
+
+Works on a whole client book at once: one net liability per taxpayer (tax
+on the returned income less TDS/TCS, as ``net_tax_liability`` in
+``compute_tax_batch``) and a ledger of tax payments, each a (taxpayer
+index, date, amount) row.  Payments up to 31 March count as advance tax;
+later ones, up to the filing date, as self-assessment tax.
+
+234C - for each installment, when the advance tax paid by its due date is
+below 12% / 36% / 75% / 100% of the liability, 1% a month for 3 / 3 / 3 / 1
+months on the shortfall against 15% / 45% / 75% / 100% of it.
+
+234B - when advance tax paid by 31 March is below 90% of the liability, 1%
+a month from 1 April of the assessment year to the filing date on the
+unpaid amount; self-assessment tax reduces it from the month after it is
+paid.  Part of a month counts as a full month.
+
+Neither applies below ``ADVANCE_TAX_THRESHOLD``, and every shortfall is
+rounded down to a multiple of ₹100 (Rule 119A).  Not modelled: the
+presumptive-income single installment and the 234C relief for capital
+gains that arise after an installment's due date.
+"""
+import datetime
+
+import numpy as np
+
+from .advance import ADVANCE_TAX_THRESHOLD, INSTALLMENT_SCHEDULE, financial_year_start, installment_due_dates
+from .rules import DEFAULT_ASSESSMENT_YEAR
+
+INTEREST_RATE_PER_MONTH = 0.01
+
+# Per installment: share of liability that must be paid by the due date to
+# avoid 234C, and the months of interest on a shortfall
+SECTION_234C = [(0.12, 3), (0.36, 3), (0.75, 3), (1.00, 1)]
+
+# 234B applies when advance tax is below this share of the liability
+SECTION_234B_SHARE = 0.90
+
+# Result columns of advance_tax_interest, in output order
+INTEREST_RESULT_FIELDS = ('paid_q1', 'paid_q2', 'paid_q3', 'paid_q4',
+                          'shortfall_q1', 'shortfall_q2', 'shortfall_q3', 'shortfall_q4',
+                          'interest_234c', 'advance_tax_paid', 'shortfall_234b', 'months_234b',
+                          'interest_234b', 'total_interest')
+
+
+def default_filing_date(assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """31 July of the assessment year, the usual return due date"""
+    return datetime.date(financial_year_start(assessment_year).year + 1, 7, 31)
+
+
+def _floor_hundred(values):
+    return np.floor(values / 100) * 100
+
+
+def _month_index(dates):
+    return np.asarray(dates, dtype='datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def advance_tax_interest(net_liability, payment_taxpayer=(), payment_date=(), payment_amount=(), filing_date=None,
+                         assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """234B/234C interest for every taxpayer in one pass
+
+    ``net_liability`` has one entry per taxpayer; ``payment_taxpayer``,
+    ``payment_date`` and ``payment_amount`` are the payment ledger (index
+    into ``net_liability``, a date or ``datetime64``, rupees).
+    ``filing_date`` is one date or one per taxpayer, by default
+    ``default_filing_date``.  Returns a dict of arrays keyed by
+    ``INTEREST_RESULT_FIELDS``: advance tax paid by each due date, the
+    interest-bearing shortfall at each, 234C and 234B interest and the
+    months 234B runs for.
+    """
+    net_liability = np.asarray(net_liability, dtype=np.float64)
+    count = len(net_liability)
+    payment_taxpayer = np.asarray(payment_taxpayer, dtype=np.intp)
+    payment_date = np.asarray(payment_date, dtype='datetime64[D]')
+    payment_amount = np.asarray(payment_amount, dtype=np.float64)
+    if filing_date is None:
+        filing_date = default_filing_date(assessment_year)
+    filing_date = np.broadcast_to(np.asarray(filing_date, dtype='datetime64[D]'), net_liability.shape)
+
+    liable = net_liability >= ADVANCE_TAX_THRESHOLD
+    # 1 April of the assessment year: 234B starts, self-assessment tax begins
+    assessment_year_start = np.datetime64(
+        datetime.date(financial_year_start(assessment_year).year + 1, 4, 1), 'D')
+
+    # One pass over the ledger: the total each taxpayer paid up to each
+    # installment due date and up to 31 March (advance tax for 234B)
+    due_dates = installment_due_dates(assessment_year)
+    cutoffs = np.asarray(due_dates + [assessment_year_start - 1], dtype='datetime64[D]')
+    period = np.searchsorted(cutoffs, payment_date, side='left')
+    in_year = period < len(cutoffs)
+    paid_in_period = np.bincount(payment_taxpayer[in_year] * len(cutoffs) + period[in_year],
+                                 weights=payment_amount[in_year],
+                                 minlength=count * len(cutoffs)).reshape(count, len(cutoffs))
+    paid_by_cutoff = []
+    paid = np.zeros(count)
+    for i in range(len(cutoffs)):
+        paid = paid + paid_in_period[:, i]
+        paid_by_cutoff.append(paid)
+
+    results = {}
+
+    # 234C: deferment of each installment
+    interest_234c = np.zeros(count)
+    for i, ((_, _, due_share), (safe_share, months), paid) in enumerate(
+            zip(INSTALLMENT_SCHEDULE, SECTION_234C, paid_by_cutoff), start=1):
+        deferred = liable & (paid < safe_share * net_liability)
+        shortfall = np.where(deferred, _floor_hundred(np.maximum(0, due_share * net_liability - paid)), 0.0)
+        interest_234c += shortfall * INTEREST_RATE_PER_MONTH * months
+        results[f'paid_q{i}'] = paid
+        results[f'shortfall_q{i}'] = shortfall
+    results['interest_234c'] = interest_234c
+
+    # 234B: advance tax (paid by 31 March) short of 90% of the liability
+    advance_tax_paid = paid_by_cutoff[-1]
+    defaulted = liable & (advance_tax_paid < SECTION_234B_SHARE * net_liability)
+    shortfall_234b = np.where(defaulted, np.maximum(0, net_liability - advance_tax_paid), 0.0)
+
+    first_month = _month_index(assessment_year_start)
+    months_234b = np.where(defaulted, np.maximum(0, _month_index(filing_date) - first_month + 1), 0)
+
+    self_assessment = (~in_year) & (payment_date <= filing_date[payment_taxpayer])
+    if self_assessment.any():
+        # Self-assessment tax paid in month k reduces the shortfall from month k + 1
+        max_months = int(months_234b.max(initial=0))
+        paid_in_month = np.zeros((count, max_months + 1))
+        paid_month = np.clip(_month_index(payment_date[self_assessment]) - first_month + 1, 0, max_months)
+        np.add.at(paid_in_month, (payment_taxpayer[self_assessment], paid_month), payment_amount[self_assessment])
+
+        interest_234b = np.zeros(count)
+        paid_before_month = np.zeros(count)
+        for month in range(max_months):
+            paid_before_month = paid_before_month + paid_in_month[:, month]
+            outstanding = _floor_hundred(np.maximum(0, shortfall_234b - paid_before_month))
+            interest_234b += np.where(month < months_234b, outstanding * INTEREST_RATE_PER_MONTH, 0.0)
+    else:
+        interest_234b = _floor_hundred(shortfall_234b) * INTEREST_RATE_PER_MONTH * months_234b
+
+    results['advance_tax_paid'] = advance_tax_paid
+    results['shortfall_234b'] = _floor_hundred(shortfall_234b)
+    results['months_234b'] = months_234b
+    results['interest_234b'] = interest_234b
+    results['total_interest'] = interest_234c + interest_234b
+    return {name: results[name] for name in INTEREST_RESULT_FIELDS}
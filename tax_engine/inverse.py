@@ -0,0 +1,138 @@
+"""Inverse solver: the gross salary that gives a target take-home or tax.
+
+Take-home is gross salary less total income tax (on every head of income).
+Both targets are solved by segment inversion of the compiled
+piecewise-linear tax functions (``tax_engine.piecewise``): normal income is
+linear in salary above the standard deduction, so each segment of the tax
+function is a straight line in salary and the target is reached at a
+closed-form point of the first segment that gets there.
+
+Tax never falls as salary rises, but take-home can - it drops at the
+rebate, marginal-relief and surcharge cliffs - so the answer is always the
+*lowest* salary that reaches the target.  Solutions are rounded up to the
+whole rupee and checked against the batch engine, so the salary returned
+reaches the target in ``compute_tax_batch`` exactly (paise rounding
+included) and one rupee less does not.
+
+All functions take arrays, so a whole salary-revision file is solved in a
+few vectorized passes; rows are grouped by regime and capital gains, which
+fix the shape of the tax function.
+"""
+import numpy as np
+
+from .batch import calculate_total_income_batch, compute_tax_batch
+from .piecewise import compile_tax_function
+from .rules import DEFAULT_ASSESSMENT_YEAR, load_rules
+
+
+def _first_reach(breakpoints, values, slopes, start, target):
+    """Lowest x >= ``start`` (per row) where a piecewise-linear function reaches ``target``
+
+    Segment ``i`` is ``values[i] + (x - breakpoints[i]) * slopes[i]`` on
+    ``(breakpoints[i], breakpoints[i + 1]]``; the last segment must rise.
+    """
+    segment_count = len(breakpoints)
+    first_segment = np.maximum(np.searchsorted(breakpoints, start, side='left') - 1, 0)
+
+    # (rows, segments): each segment's range from the row's start onwards
+    segment_starts = np.maximum(breakpoints, start[:, None])
+    start_values = values + (segment_starts - breakpoints) * slopes
+    ends = np.append(breakpoints[1:], np.inf)
+    with np.errstate(invalid='ignore'):
+        end_values = np.where(np.isinf(ends), np.inf, values + (ends - breakpoints) * slopes)
+
+    reaches = (np.maximum(start_values, end_values) >= target[:, None]) & (
+        np.arange(segment_count) >= first_segment[:, None])
+    segment = np.argmax(reaches, axis=1)
+
+    rows = np.arange(len(start))
+    x = segment_starts[rows, segment]
+    value = start_values[rows, segment]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(value >= target, x, x + (target - value) / slopes[segment])
+
+
+def _solve_group(regime, kind, target, business_income, house_income, house_loan_interest, other_sources,
+                 stcg, ltcg, assessment_year):
+    """Unrounded salaries for rows sharing one regime and one (stcg, ltcg) pair"""
+    rules = load_rules(regime, assessment_year)
+    tax_function = compile_tax_function(regime, stcg, ltcg, assessment_year)
+    breakpoints, values, slopes = (np.asarray(column, dtype=np.float64) for column in (
+        tax_function.breakpoints, tax_function.values, tax_function.slopes))
+    standard_deduction = rules.standard_deduction
+
+    # Normal income without salary; salary adds to it past the standard deduction
+    other_income = calculate_total_income_batch(regime, 0, business_income, house_income, other_sources,
+                                                house_loan_interest, assessment_year)
+    other_income_tax = tax_function.tax_array(other_income)
+
+    if kind == 'tax':
+        income = _first_reach(breakpoints, values, slopes, other_income, target)
+        return np.where(other_income_tax >= target, 0.0, income - other_income + standard_deduction)
+
+    # Take-home = salary - tax.  Up to the standard deduction tax is flat;
+    # past it take-home is (income - tax) plus a constant, solved per segment
+    income = _first_reach(breakpoints, breakpoints - values, 1 - slopes, other_income,
+                          target - standard_deduction + other_income)
+    return np.where(target <= standard_deduction - other_income_tax,
+                    np.maximum(0, target + other_income_tax),
+                    income - other_income + standard_deduction)
+
+
+def _solve_salary(kind, regime, target, business_income, house_income, house_loan_interest, other_sources,
+                  stcg, ltcg, assessment_year):
+    target = np.asarray(target, dtype=np.float64)
+    business_income, house_income, house_loan_interest, other_sources, stcg, ltcg = (
+        np.broadcast_to(np.asarray(values, dtype=np.float64), target.shape)
+        for values in (business_income, house_income, house_loan_interest, other_sources, stcg, ltcg)
+    )
+    regime = np.asarray(regime)
+    is_old = np.broadcast_to(regime if regime.dtype == bool else regime == 'old', target.shape)
+    amounts = (business_income, house_income, house_loan_interest, other_sources)
+
+    salary = np.empty(target.shape)
+    for regime_name, regime_rows in (('new', ~is_old), ('old', is_old)):
+        if not regime_rows.any():
+            continue
+        gains, group = np.unique(np.stack([stcg[regime_rows], ltcg[regime_rows]], axis=-1), axis=0,
+                                 return_inverse=True)
+        regime_indices = np.flatnonzero(regime_rows)
+        for i, (group_stcg, group_ltcg) in enumerate(gains):
+            rows = regime_indices[group.ravel() == i]
+            salary.flat[rows] = _solve_group(
+                regime_name, kind, target.flat[rows], *(values.flat[rows] for values in amounts),
+                float(group_stcg), float(group_ltcg), assessment_year)
+
+    # Whole rupees, checked against the engine: the solve is exact before
+    # paise rounding, so the answer is within a rupee of ceil(salary)
+    rounded = np.ceil(salary)
+    chosen = rounded + 1
+    for candidate in (rounded + 1, rounded, np.maximum(0, rounded - 1)):
+        total_tax = compute_tax_batch(is_old, candidate, business_income, house_income, house_loan_interest,
+                                      other_sources, stcg, ltcg, 0.0, assessment_year)['total_tax']
+        achieved = total_tax if kind == 'tax' else candidate - total_tax
+        chosen = np.where(achieved >= target, candidate, chosen)
+    return chosen
+
+
+def salary_for_tax(regime, target_tax, business_income=0, house_income=0, house_loan_interest=0, other_sources=0,
+                   stcg=0, ltcg=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Lowest whole-rupee gross salary whose total tax reaches ``target_tax``
+
+    Arguments broadcast against ``target_tax``; ``regime`` is one regime,
+    an array of 'new'/'old' or a boolean array that is True for old-regime
+    rows (as in ``compute_tax_batch``).  Returns an array of salaries; 0
+    where the other income already pays the target.
+    """
+    return _solve_salary('tax', regime, target_tax, business_income, house_income, house_loan_interest,
+                         other_sources, stcg, ltcg, assessment_year)
+
+
+def salary_for_take_home(regime, target_take_home, business_income=0, house_income=0, house_loan_interest=0,
+                         other_sources=0, stcg=0, ltcg=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Lowest whole-rupee gross salary whose salary less total tax reaches ``target_take_home``
+
+    Arguments broadcast as in ``salary_for_tax``.
+    """
+    return _solve_salary('take_home', regime, target_take_home, business_income, house_income,
+                         house_loan_interest, other_sources, stcg, ltcg, assessment_year)
@@ -0,0 +1,242 @@
+"""Set-off and carry-forward of losses, in the order that costs least tax.
+
+``compute_tax`` treats a head with a loss as nil.  ``set_off_losses`` sets
+the losses off instead: the current year's losses by head, and the losses
+brought forward from up to ``CARRY_FORWARD_YEARS`` earlier years.  What
+cannot be set off is carried forward, ready to pass back in as next year's
+``brought_forward``.  It works on arrays of taxpayers.
+
+Some losses can only go one way, and are set off first, oldest first:
+
+- a long-term capital loss only against long-term gains (section 70(3));
+- brought-forward house property, business and long-term capital losses
+  only against income of the same kind (sections 71B, 72, 74).
+
+Others can be set off against more than one kind of income:
+
+- a short-term capital loss, current or brought forward, against short- or
+  long-term gains;
+- a business loss against any head except salary (section 71(2A));
+- a house property loss against any head, up to
+  ``HOUSE_PROPERTY_SET_OFF_LIMIT`` a year (section 71(3A)).  Under the new
+  regime none of it is set off against other heads (section 115BAC).
+
+As much loss as possible is set off either way.  The only choice is how
+much of it comes off capital gains rather than normal income.  Within the
+gains, short-term gains always come off first: they are taxed at a higher
+rate, and freeing basic exemption from them shelters long-term gains rupee
+for rupee.  Total income is the same for every split, so the rebate,
+marginal relief and the surcharge rate are the same too.  Tax is therefore
+piecewise linear in the split, with kinks only where normal income crosses
+a slab boundary or the rebate cap, or the gains run out or reach the LTCG
+exemption.  The least tax is at one of those kinks or at an end of the
+range.  Those dozen candidate splits per taxpayer are evaluated in one
+``calculate_tax_batch`` call.
+
+Brought-forward losses carry forward only if the return for the year of
+the loss was filed on time; that is up to the caller.  Unabsorbed
+depreciation and speculation losses are not modelled.
+"""
+import numpy as np
+
+from .batch import calculate_tax_batch
+from .rules import DEFAULT_ASSESSMENT_YEAR, load_rules
+
+LOSS_KINDS = ('house_property', 'business', 'short_term_capital', 'long_term_capital')
+
+# Years a loss can be carried forward (sections 71B, 72, 74)
+CARRY_FORWARD_YEARS = 8
+
+# House property loss that may be set off against other heads in a year
+HOUSE_PROPERTY_SET_OFF_LIMIT = {'old': 200000, 'new': 0}
+
+# Result arrays of set_off_losses, one entry per taxpayer
+LOSS_RESULT_FIELDS = ('total_income', 'stcg', 'ltcg', 'total_taxable_income', 'base_tax', 'surcharge', 'cess',
+                      'total_tax', 'tax_saving', 'loss_set_off', 'loss_lapsed')
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _loss(amount):
+    """Loss as a positive amount (0 for income)"""
+    return np.maximum(0, -amount) + 0.0     # + 0.0 turns -0.0 into 0.0
+
+
+def _brought_forward(brought_forward, rows):
+    """(rows, CARRY_FORWARD_YEARS) arrays per loss kind; column 0 is last year's loss"""
+    brought_forward = brought_forward or {}
+    unknown = set(brought_forward) - set(LOSS_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown loss kind(s) {', '.join(sorted(unknown))}; choose from {', '.join(LOSS_KINDS)}")
+    losses = {}
+    for kind in LOSS_KINDS:
+        values = _as_array(brought_forward.get(kind, 0.0))
+        if values.ndim < 2:
+            values = values.reshape(1, -1)
+        years = values.shape[1]
+        if years > CARRY_FORWARD_YEARS:
+            raise ValueError(f"{kind} losses go back at most {CARRY_FORWARD_YEARS} years, got {years}")
+        values = np.broadcast_to(np.maximum(0, values), (rows, years))
+        losses[kind] = np.pad(values, ((0, 0), (0, CARRY_FORWARD_YEARS - years)))
+    return losses
+
+
+def _absorb(losses, income):
+    """Set (rows, years) ``losses`` off against ``income``, oldest year first
+
+    Returns the losses left and the amount set off per row.
+    """
+    oldest_first = losses[:, ::-1]
+    set_off_before = np.cumsum(oldest_first, axis=1) - oldest_first
+    used = np.clip(income[:, None] - set_off_before, 0, oldest_first)
+    return (oldest_first - used)[:, ::-1], used.sum(axis=1)
+
+
+def _normal_income_kinks(rules):
+    """Normal incomes at which the regime's tax on normal income changes slope"""
+    kinks = set(rules.slabs.lower_bounds[1:])
+    kinks.add(rules.slabs.income_for_tax(rules.rebate_max))
+    return np.array(sorted(kinks), dtype=np.float64)
+
+
+def _set_off_regime(regime, salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg,
+                    brought_forward, assessment_year):
+    rules = load_rules(regime, assessment_year)
+    salary_income = np.maximum(0, salary - rules.standard_deduction)
+    house_property = house_income * 0.70 - house_loan_interest
+    other_income = np.maximum(0, other_sources)
+
+    # Losses with only one possible set-off
+    house_left, used = _absorb(brought_forward['house_property'], np.maximum(0, house_property))
+    house_property_income = np.maximum(0, house_property) - used
+    set_off = used
+    business_left, used = _absorb(brought_forward['business'], np.maximum(0, business_income))
+    business_profit = np.maximum(0, business_income) - used
+    set_off = set_off + used
+
+    long_term_loss = _loss(ltcg)
+    used = np.minimum(long_term_loss, np.maximum(0, ltcg))
+    long_term_loss = long_term_loss - used
+    long_term_gain = np.maximum(0, ltcg) - used
+    set_off = set_off + used
+    long_term_left, used = _absorb(brought_forward['long_term_capital'], long_term_gain)
+    long_term_gain = long_term_gain - used
+    set_off = set_off + used
+
+    # Losses that can go against gains or normal income
+    short_term_gain = np.maximum(0, stcg)
+    short_term_loss = _loss(stcg)
+    capital_pool = short_term_loss + brought_forward['short_term_capital'].sum(axis=1)
+    house_property_loss = _loss(house_property)
+    house_property_across = np.minimum(house_property_loss, HOUSE_PROPERTY_SET_OFF_LIMIT[regime])
+    business_loss = _loss(business_income)
+    general_pool = house_property_across + business_loss
+
+    normal_income = salary_income + other_income + house_property_income + business_profit
+    gains = short_term_gain + long_term_gain
+    # Business loss cannot come off salary
+    normal_max = np.minimum(general_pool, np.minimum(
+        normal_income, house_property_across + np.minimum(business_loss, normal_income - salary_income)))
+    absorbed = np.minimum(capital_pool + general_pool, gains + normal_max)
+
+    # Amount set off against gains, from normal income first (the first
+    # candidate, which also wins ties) to gains first
+    low = np.maximum(0, absorbed - normal_max)
+    high = np.minimum(gains, absorbed)
+    kinks = _normal_income_kinks(rules)
+    candidates = np.column_stack([
+        low, high, short_term_gain, gains - rules.ltcg_exemption,
+        absorbed[:, None] - normal_income[:, None] + kinks[None, :],
+    ])
+    candidates = np.clip(candidates, low[:, None], high[:, None])
+
+    from_short_term = np.minimum(short_term_gain[:, None], candidates)
+    # Clamped at zero against float dust where a head is used up exactly
+    taxed_normal = np.maximum(0, normal_income[:, None] - (absorbed[:, None] - candidates))
+    taxed_stcg = np.maximum(0, short_term_gain[:, None] - from_short_term)
+    taxed_ltcg = np.maximum(0, long_term_gain[:, None] - (candidates - from_short_term))
+    base_tax, surcharge, cess, _, _ = calculate_tax_batch(regime, taxed_normal, taxed_stcg, taxed_ltcg,
+                                                          assessment_year)
+    total_tax = base_tax + surcharge + cess
+    best = np.argmin(total_tax, axis=1)
+    rows = np.arange(len(best))
+    against_gains = candidates[rows, best]
+
+    # Which losses were used: current short-term loss before brought-forward
+    # ones, and of the rest house property loss before business loss
+    capital_used = np.minimum(capital_pool, against_gains)
+    current_used = np.minimum(short_term_loss, capital_used)
+    short_term_left, _ = _absorb(brought_forward['short_term_capital'], capital_used - current_used)
+    general_used = absorbed - capital_used
+    house_property_used = np.minimum(house_property_across, general_used)
+
+    # The business loss left is a difference of derived amounts: clamp it too
+    unabsorbed = {
+        'house_property': house_property_loss - house_property_used,
+        'business': np.maximum(0, business_loss - (general_used - house_property_used)),
+        'short_term_capital': short_term_loss - current_used,
+        'long_term_capital': long_term_loss,
+    }
+    left = {'house_property': house_left, 'business': business_left, 'short_term_capital': short_term_left,
+            'long_term_capital': long_term_left}
+    carried_forward = {kind: np.column_stack([unabsorbed[kind], left[kind][:, :-1]]) for kind in LOSS_KINDS}
+
+    results = {
+        'total_income': taxed_normal[rows, best],
+        'stcg': taxed_stcg[rows, best],
+        'ltcg': taxed_ltcg[rows, best],
+        'base_tax': base_tax[rows, best],
+        'surcharge': surcharge[rows, best],
+        'cess': cess[rows, best],
+        'total_tax': total_tax[rows, best],
+        'tax_saving': total_tax[:, 0] - total_tax[rows, best],
+        'loss_set_off': set_off + absorbed,
+        'loss_lapsed': sum(left[kind][:, -1] for kind in LOSS_KINDS),
+    }
+    results['total_taxable_income'] = results['total_income'] + results['stcg'] + results['ltcg']
+    return results, carried_forward
+
+
+def set_off_losses(regime, salary=0, business_income=0, house_income=0, house_loan_interest=0, other_sources=0,
+                   stcg=0, ltcg=0, brought_forward=None, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Tax after setting off current and brought-forward losses in the cheapest order
+
+    Amounts are as on the Calculate Tax form, for one taxpayer or arrays of
+    them, except that ``business_income``, ``stcg`` and ``ltcg`` may be
+    negative (a loss); house property is a loss when the interest exceeds
+    70% of the rent.  ``regime`` is as for ``compute_tax_batch``.
+    ``brought_forward`` maps a kind in ``LOSS_KINDS`` to losses by year, one
+    row per taxpayer: column 0 is last year's loss, column 7 the loss of
+    eight years ago (its last year).
+
+    Returns ``(results, carried_forward)``.  ``results`` is a dict of
+    arrays keyed by ``LOSS_RESULT_FIELDS``: incomes after set-off, the tax
+    on them, ``tax_saving`` against setting losses off normal income first,
+    and the losses set off and lapsed this year.  ``carried_forward`` has
+    the same layout as ``brought_forward``, aged by one year.
+    """
+    salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg = (
+        np.atleast_1d(values) for values in np.broadcast_arrays(*(_as_array(values) for values in (
+            salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg))))
+    if salary.ndim != 1:
+        raise ValueError("Amounts must be scalars or one-dimensional arrays")
+    brought_forward = _brought_forward(brought_forward, len(salary))
+    regime = np.asarray(regime)
+    is_old = np.broadcast_to(regime if regime.dtype == bool else regime == 'old', salary.shape)
+
+    results = {name: np.zeros(salary.shape) for name in LOSS_RESULT_FIELDS}
+    carried_forward = {kind: np.zeros((len(salary), CARRY_FORWARD_YEARS)) for kind in LOSS_KINDS}
+    for regime_name, rows in (('new', ~is_old), ('old', is_old)):
+        if not rows.any():
+            continue
+        regime_results, regime_carried = _set_off_regime(
+            regime_name, salary[rows], business_income[rows], house_income[rows], house_loan_interest[rows],
+            other_sources[rows], stcg[rows], ltcg[rows], {kind: losses[rows] for kind, losses in brought_forward.items()},
+            assessment_year)
+        for name, values in regime_results.items():
+            results[name][rows] = values
+        for kind, losses in regime_carried.items():
+            carried_forward[kind][rows] = losses
+    return results, carried_forward
@@ -0,0 +1,208 @@
+"""Process-pool execution of the batch engine for multi-million-row runs.
+
+The input columns are cut into shards of ``chunk_size`` rows and each shard
+runs ``compute_tax_batch`` (total income, regime tax, surcharge, cess and
+the advance-tax schedule) in a worker process.  Shards are merged back in
+input order, so the output is identical to a single ``compute_tax_batch``
+call over the whole input.
+
+With the default ``transport='shared_memory'`` the input columns and the
+result columns live in one ``multiprocessing.shared_memory`` block.  Workers
+attach to it by name and only receive a row range, so no row data is
+pickled between processes in either direction.  ``transport='pickle'``
+sends each shard's arrays to the worker and its results back instead.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .batch import BATCH_RESULT_FIELDS, compute_tax_batch
+from .rules import DEFAULT_ASSESSMENT_YEAR
+
+# Inputs in compute_tax_batch argument order (regime first)
+AMOUNT_FIELDS = ('salary', 'business_income', 'house_income', 'house_loan_interest',
+                 'other_sources', 'stcg', 'ltcg', 'tds_paid')
+
+DEFAULT_PARALLEL_CHUNK_SIZE = 250000
+
+TRANSPORTS = ('shared_memory', 'pickle')
+
+
+def default_workers():
+    """One worker per CPU available to this process"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def shard_bounds(rows, chunk_size):
+    """(start, stop) row ranges of at most ``chunk_size`` rows covering ``rows``"""
+    return [(start, min(start + chunk_size, rows)) for start in range(0, rows, chunk_size)]
+
+
+def _normalize_columns(columns):
+    """Old-regime flags plus float64 amount arrays, all of one length"""
+    first = next((columns[name] for name in AMOUNT_FIELDS if name in columns), None)
+    rows = len(first) if first is not None else len(columns['regime'])
+
+    regime = np.asarray(columns.get('regime', 'new'))
+    is_old = np.broadcast_to(regime if regime.dtype == bool else regime == 'old', (rows,))
+    amounts = {
+        name: np.broadcast_to(np.asarray(columns.get(name, 0.0), dtype=np.float64), (rows,))
+        for name in AMOUNT_FIELDS
+    }
+    return rows, np.ascontiguousarray(is_old), {name: np.ascontiguousarray(values) for name, values in amounts.items()}
+
+
+def _compute_shard(is_old, amounts, assessment_year):
+    return compute_tax_batch(is_old, *(amounts[name] for name in AMOUNT_FIELDS), assessment_year=assessment_year)
+
+
+# Column dtypes of the shared block: inputs first, then results
+SHARED_INPUT_DTYPES = {'is_old': 'bool', **{name: 'float64' for name in AMOUNT_FIELDS}}
+SHARED_RESULT_DTYPES = {name: 'bool' if name == 'advance_tax_applicable' else 'float64' for name in BATCH_RESULT_FIELDS}
+
+
+class SharedColumns:
+    """Equal-length NumPy columns laid out back to back in one shared memory block.
+
+    The creating process owns the block and must ``unlink`` it; other
+    processes ``attach`` with ``spec`` and only ``close`` their mapping.
+    """
+
+    def __init__(self, rows, dtypes, name=None):
+        self.rows = rows
+        self.dtypes = dict(dtypes)
+        self.offsets = {}
+        size = 0
+        for column, dtype in self.dtypes.items():
+            self.offsets[column] = size
+            # Keep every column 8-byte aligned
+            size += -(-rows * np.dtype(dtype).itemsize // 8) * 8
+        if name is None:
+            self.block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self.block = shared_memory.SharedMemory(name=name)
+
+    @property
+    def spec(self):
+        """Picklable description for ``attach`` - the only thing sent to workers"""
+        return self.block.name, self.rows, self.dtypes
+
+    @classmethod
+    def attach(cls, spec):
+        name, rows, dtypes = spec
+        return cls(rows, dtypes, name=name)
+
+    def column(self, name, start=0, stop=None):
+        """Writable view of rows ``start:stop`` of column ``name``"""
+        stop = self.rows if stop is None else stop
+        dtype = np.dtype(self.dtypes[name])
+        return np.ndarray((stop - start,), dtype=dtype, buffer=self.block.buf,
+                          offset=self.offsets[name] + start * dtype.itemsize)
+
+    def close(self):
+        self.block.close()
+
+    def unlink(self):
+        self.block.unlink()
+
+
+def _compute_shared_shard(spec, start, stop, assessment_year):
+    shared = SharedColumns.attach(spec)
+    try:
+        results = _compute_shard(
+            shared.column('is_old', start, stop),
+            {name: shared.column(name, start, stop) for name in AMOUNT_FIELDS},
+            assessment_year,
+        )
+        for name in BATCH_RESULT_FIELDS:
+            shared.column(name, start, stop)[:] = results[name]
+    finally:
+        # Only temporary views were taken, so the mapping can be closed here
+        shared.close()
+
+
+class ParallelBatchExecutor:
+    """Runs compute_tax_batch over shards of the input in a process pool.
+
+    ``workers`` defaults to the number of available CPUs, ``chunk_size`` is
+    the number of rows per shard and ``transport`` is 'shared_memory' or
+    'pickle'.  Use as a context manager to reuse one pool across several
+    calls to ``compute``.
+    """
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_PARALLEL_CHUNK_SIZE, assessment_year=DEFAULT_ASSESSMENT_YEAR,
+                 transport='shared_memory'):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of {TRANSPORTS}, got {transport!r}")
+        self.workers = workers or default_workers()
+        self.chunk_size = chunk_size
+        self.assessment_year = assessment_year
+        self.transport = transport
+        self._pool = None
+
+    def __enter__(self):
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._pool.shutdown()
+        self._pool = None
+
+    def compute(self, columns):
+        """Results for ``columns`` (a mapping of regime/amount arrays) as a dict of arrays"""
+        rows, is_old, amounts = _normalize_columns(columns)
+        bounds = shard_bounds(rows, self.chunk_size)
+
+        # Small inputs (or a single worker) are not worth the process hop
+        if self.workers == 1 or len(bounds) <= 1:
+            return _compute_shard(is_old, amounts, self.assessment_year)
+
+        if self._pool is None:
+            with self:
+                return self._compute_sharded(bounds, is_old, amounts)
+        return self._compute_sharded(bounds, is_old, amounts)
+
+    def _compute_sharded(self, bounds, is_old, amounts):
+        if self.transport == 'shared_memory':
+            return self._compute_shared(bounds, is_old, amounts)
+
+        futures = [
+            self._pool.submit(_compute_shard, is_old[start:stop],
+                              {name: values[start:stop] for name, values in amounts.items()},
+                              self.assessment_year)
+            for start, stop in bounds
+        ]
+        shards = [future.result() for future in futures]
+        return {name: np.concatenate([shard[name] for shard in shards]) for name in BATCH_RESULT_FIELDS}
+
+    def _compute_shared(self, bounds, is_old, amounts):
+        shared = SharedColumns(len(is_old), {**SHARED_INPUT_DTYPES, **SHARED_RESULT_DTYPES})
+        try:
+            shared.column('is_old')[:] = is_old
+            for name, values in amounts.items():
+                shared.column(name)[:] = values
+
+            futures = [
+                self._pool.submit(_compute_shared_shard, shared.spec, start, stop, self.assessment_year)
+                for start, stop in bounds
+            ]
+            for future in futures:
+                future.result()
+
+            return {name: shared.column(name).copy() for name in BATCH_RESULT_FIELDS}
+        finally:
+            shared.close()
+            shared.unlink()
+
+
+def compute_tax_parallel(columns, workers=None, chunk_size=DEFAULT_PARALLEL_CHUNK_SIZE,
+                         assessment_year=DEFAULT_ASSESSMENT_YEAR, transport='shared_memory'):
+    """One-shot ``ParallelBatchExecutor(...).compute(columns)``"""
+    return ParallelBatchExecutor(workers, chunk_size, assessment_year, transport).compute(columns)
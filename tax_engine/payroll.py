@@ -0,0 +1,280 @@
+"""Bulk payroll mode: stream an employee master file through the batch engine.
+
+The input is a CSV or Parquet file with one taxpayer per row and the same
+fields as the Calculate Tax form.  It is read in fixed-size chunks, each
+chunk is computed with ``compute_tax_batch`` and appended to the output
+file before the next chunk is read, so memory stays flat however large the
+file is.
+
+With ``workers`` > 1 the chunks are computed in a process pool while the
+file is still being read; results are written in input order and at most a
+few chunks per worker are in flight at once.
+
+A salary-revision file can give a ``target_take_home`` (salary less total
+tax) or ``target_tax`` per row instead of a salary: those rows get the
+lowest gross salary that reaches the target (``tax_engine.inverse``) and
+are computed on it.
+
+With ``fixed_point`` (``--fixed-point``) the rows are computed in integer
+paise with statutory rounding (``tax_engine.fixedpoint``); result amounts
+are written as exact rupees-and-paise and column totals reconcile to the
+paisa.
+
+An ``.xlsx`` output path writes a consolidated workbook instead: a Summary
+sheet and a block of rows with each employee's computation, streamed to
+disk row by row.
+
+Usage::
+
+    python -m tax_engine.payroll employees.csv results.csv --chunk-size 50000 --workers 4
+    python -m tax_engine.payroll employees.csv form16.csv --fixed-point
+    python -m tax_engine.payroll employees.csv computations.xlsx --label-column employee_id
+"""
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .batch import BATCH_RESULT_FIELDS, compute_tax_batch
+from .computation import compute_tax
+from .fixedpoint import PAISE_PER_RUPEE, compute_tax_paise_batch, to_paise_array
+from .inverse import salary_for_take_home, salary_for_tax
+from .parallel import default_workers
+from .report import create_bulk_excel_report
+from .rules import DEFAULT_ASSESSMENT_YEAR
+
+# Input columns - same semantics as the Calculate Tax tab.  Missing columns
+# and blank cells count as 0 (and as the new regime for ``regime``).
+AMOUNT_COLUMNS = ('salary', 'business_income', 'house_income', 'house_loan_interest',
+                  'other_sources', 'stcg', 'ltcg', 'tds_paid')
+REGIME_COLUMN = 'regime'
+DEFAULT_REGIME = 'new'
+
+# Optional per-row targets; the row's salary is solved from whichever is set
+TARGET_COLUMNS = {'target_take_home': salary_for_take_home, 'target_tax': salary_for_tax}
+
+DEFAULT_CHUNK_SIZE = 50000
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+EXCEL_EXTENSIONS = ('.xlsx',)
+
+
+def _is_parquet(path):
+    return os.path.splitext(str(path))[1].lower() in PARQUET_EXTENSIONS
+
+
+def _is_excel(path):
+    return os.path.splitext(str(path))[1].lower() in EXCEL_EXTENSIONS
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def read_payroll_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the input file as DataFrames of at most ``chunk_size`` rows"""
+    if _is_parquet(path):
+        pyarrow = _require_pyarrow()
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        for record_batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield record_batch.to_pandas()
+    else:
+        # round_trip parsing gives the same floats as float() on the text,
+        # i.e. the same amounts the form would have passed to the engine
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={REGIME_COLUMN: str}, float_precision='round_trip')
+
+
+def _amount_column(frame, column):
+    if column not in frame:
+        return np.zeros(len(frame))
+    return pd.to_numeric(frame[column]).fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def _regime_column(frame):
+    if REGIME_COLUMN not in frame:
+        return np.full(len(frame), DEFAULT_REGIME)
+    regime = frame[REGIME_COLUMN].fillna(DEFAULT_REGIME).astype(str).str.strip().str.lower()
+    regime = regime.mask(regime == '', DEFAULT_REGIME)
+    invalid = ~regime.isin(('new', 'old'))
+    if invalid.any():
+        row = invalid.idxmax()
+        raise ValueError(f"Row {row}: regime must be 'new' or 'old', got {frame[REGIME_COLUMN][row]!r}")
+    return regime.to_numpy()
+
+
+def _solve_target_salaries(frame, regime, amounts, assessment_year):
+    """Replace ``amounts['salary']`` with the solved salary on rows that set a target"""
+    targets = {column: pd.to_numeric(frame[column]).to_numpy(dtype=np.float64)
+               for column in TARGET_COLUMNS if column in frame}
+    if len(targets) > 1:
+        both = np.isfinite(targets['target_take_home']) & np.isfinite(targets['target_tax'])
+        if both.any():
+            row = frame.index[both.argmax()]
+            raise ValueError(f"Row {row}: set either target_take_home or target_tax, not both")
+
+    other_amounts = [amounts[column] for column in ('business_income', 'house_income', 'house_loan_interest',
+                                                    'other_sources', 'stcg', 'ltcg')]
+    for column, target in targets.items():
+        rows = np.isfinite(target)
+        if rows.any():
+            salary = amounts['salary'].copy()
+            salary[rows] = TARGET_COLUMNS[column](
+                regime[rows], target[rows], *(values[rows] for values in other_amounts),
+                assessment_year=assessment_year)
+            amounts['salary'] = salary
+    return bool(targets)
+
+
+def _compute_fixed_point(regime, amounts, assessment_year):
+    """compute_tax_batch-shaped results from the fixed-point engine, amounts in rupees"""
+    results = compute_tax_paise_batch(regime, *(to_paise_array(values) for values in amounts.values()),
+                                      assessment_year=assessment_year)
+    return {name: values if values.dtype == bool else values / PAISE_PER_RUPEE for name, values in results.items()}
+
+
+def compute_payroll_chunk(frame, assessment_year=DEFAULT_ASSESSMENT_YEAR, fixed_point=False):
+    """Input chunk (amounts and regime normalized) with the result columns appended"""
+    regime = _regime_column(frame)
+    amounts = {column: _amount_column(frame, column) for column in AMOUNT_COLUMNS}
+    has_targets = _solve_target_salaries(frame, regime, amounts, assessment_year)
+    if fixed_point:
+        results = _compute_fixed_point(regime, amounts, assessment_year)
+    else:
+        results = compute_tax_batch(regime, *amounts.values(), assessment_year=assessment_year)
+
+    # Normalized inputs keep every chunk's column types identical
+    normalized = {column: values for column, values in amounts.items()
+                  if column in frame or (column == 'salary' and has_targets)}
+    if REGIME_COLUMN in frame:
+        normalized[REGIME_COLUMN] = regime
+    return frame.assign(**normalized, **{name: results[name] for name in BATCH_RESULT_FIELDS})
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.header_written = False
+
+    def write(self, frame):
+        frame.to_csv(self.path, mode='a' if self.header_written else 'w', header=not self.header_written, index=False)
+        self.header_written = True
+
+    def close(self):
+        if not self.header_written:
+            open(self.path, 'w').close()
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        self.pyarrow = _require_pyarrow()
+        self.path = path
+        self.writer = None
+
+    def write(self, frame):
+        table = self.pyarrow.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# Chunks queued per worker process before the reader waits for results
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+def _computed_chunks(input_path, chunk_size, assessment_year, workers, fixed_point):
+    """Computed chunks in input order, using a process pool when ``workers`` > 1"""
+    chunks = read_payroll_chunks(input_path, chunk_size)
+    if workers <= 1:
+        for frame in chunks:
+            yield compute_payroll_chunk(frame, assessment_year, fixed_point)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for frame in chunks:
+            pending.append(pool.submit(compute_payroll_chunk, frame, assessment_year, fixed_point))
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run_payroll(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, assessment_year=DEFAULT_ASSESSMENT_YEAR,
+                workers=1, fixed_point=False):
+    """Compute tax for every row of ``input_path`` into ``output_path``; returns the row count"""
+    sink = _ParquetSink(output_path) if _is_parquet(output_path) else _CsvSink(output_path)
+    rows = 0
+    try:
+        for frame in _computed_chunks(input_path, chunk_size, assessment_year, workers, fixed_point):
+            sink.write(frame)
+            rows += len(frame)
+    finally:
+        sink.close()
+    return rows
+
+
+def iter_payroll_computations(input_path, chunk_size=DEFAULT_CHUNK_SIZE, assessment_year=DEFAULT_ASSESSMENT_YEAR,
+                              label_column=None):
+    """Yield (label, TaxComputation) per row of ``input_path``, one chunk in memory at a time"""
+    row = 0
+    for frame in read_payroll_chunks(input_path, chunk_size):
+        regime = _regime_column(frame)
+        amounts = {column: _amount_column(frame, column) for column in AMOUNT_COLUMNS}
+        _solve_target_salaries(frame, regime, amounts, assessment_year)
+        regime = regime.tolist()
+        amounts = [values.tolist() for values in amounts.values()]
+        if label_column is not None:
+            labels = frame[label_column].astype(str).tolist()
+        else:
+            labels = [f'Employee {row + i + 1}' for i in range(len(frame))]
+        for label, regime_value, *values in zip(labels, regime, *amounts):
+            yield label, compute_tax(regime_value, *values, assessment_year=assessment_year)
+        row += len(frame)
+
+
+def export_payroll_workbook(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                            assessment_year=DEFAULT_ASSESSMENT_YEAR, label_column=None):
+    """Consolidated .xlsx with a Summary sheet and a computation block per row; returns the row count"""
+    taxpayers = iter_payroll_computations(input_path, chunk_size, assessment_year, label_column)
+    return create_bulk_excel_report(output_path, taxpayers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute income tax for a CSV/Parquet payroll file.")
+    parser.add_argument('input', help="employee file (.csv or .parquet)")
+    parser.add_argument('output', help="results file (.csv or .parquet), or .xlsx for a computation per row")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument('--assessment-year', default=DEFAULT_ASSESSMENT_YEAR)
+    parser.add_argument('--workers', type=int, default=1, help="worker processes (0 = one per CPU)")
+    parser.add_argument('--label-column', help="column labelling each employee in .xlsx output")
+    parser.add_argument('--fixed-point', action='store_true',
+                        help="compute in integer paise with statutory rounding (.csv/.parquet output)")
+    args = parser.parse_args(argv)
+
+    if _is_excel(args.output):
+        if args.fixed_point:
+            parser.error("--fixed-point applies to .csv and .parquet output")
+        rows = export_payroll_workbook(args.input, args.output, args.chunk_size, args.assessment_year,
+                                       args.label_column)
+        print(f"Wrote computation sheets for {rows:,} rows -> {args.output}")
+        return
+
+    workers = args.workers or default_workers()
+    rows = run_payroll(args.input, args.output, args.chunk_size, args.assessment_year, workers, args.fixed_point)
+    print(f"Computed tax for {rows:,} rows -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
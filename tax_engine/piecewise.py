@@ -0,0 +1,244 @@
+"""Total tax as an explicit piecewise-linear function of normal income.
+
+For fixed capital gains, a regime's total tax (base tax + surcharge + cess)
+is linear in normal income between a handful of breakpoints: the slab
+boundaries, the point where slab tax reaches the 87A rebate cap, the
+rebate limit (a jump), the edges of the new regime's marginal-relief band
+and the income where relief stops binding, the points where capital gains
+start using up the basic exemption, and each surcharge threshold (a jump).
+
+``compile_tax_function`` finds those breakpoints from the compiled rules
+and stores the intercept and slope of every segment, so evaluating the tax
+is one bisect plus one multiply-add, the income for a given tax is a closed
+form per segment, and a chart is exact with two points per breakpoint.
+
+Values are before the per-component rounding to paise that the regime
+functions apply, so they can differ from ``TaxComputation.total_tax`` by a
+few paise.  Segments are open on the left and closed on the right: at a
+jump the tax is the lower value, exactly as the ``<=`` and ``>`` tests in
+``tax_engine.core`` decide.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+from .rules import DEFAULT_ASSESSMENT_YEAR, load_rules
+
+
+def _slab_line(slabs, income):
+    """(value, slope) of slab tax at ``income``"""
+    i = slabs.segment(income)
+    return slabs.cumulative_tax[i] + (income - slabs.lower_bounds[i]) * slabs.rates[i], slabs.rates[i]
+
+
+def _capital_gains_line(rules, income, stcg, ltcg):
+    """(value, slope) of capital gains tax at normal income ``income``"""
+    if rules.regime == 'old':
+        cg_tax = stcg * rules.stcg_rate
+        if ltcg > rules.ltcg_exemption:
+            cg_tax += (ltcg - rules.ltcg_exemption) * rules.ltcg_rate
+        return cg_tax, 0.0
+
+    # New regime: other income, then STCG, then taxable LTCG use the basic
+    # exemption, so every rupee of income below it can push gains into tax
+    taxable_ltcg = max(0, ltcg - rules.ltcg_exemption)
+    remaining = max(0, rules.slabs.basic_exemption - income)
+    remaining_slope = -1.0 if remaining > 0 else 0.0
+
+    stcg_exempted, stcg_exempted_slope = (remaining, remaining_slope) if remaining < stcg else (stcg, 0.0)
+    remaining, remaining_slope = remaining - stcg_exempted, remaining_slope - stcg_exempted_slope
+    ltcg_exempted, ltcg_exempted_slope = ((remaining, remaining_slope) if remaining < taxable_ltcg
+                                          else (taxable_ltcg, 0.0))
+
+    value = (stcg - stcg_exempted) * rules.stcg_rate + (taxable_ltcg - ltcg_exempted) * rules.ltcg_rate
+    slope = -stcg_exempted_slope * rules.stcg_rate - ltcg_exempted_slope * rules.ltcg_rate
+    return value, slope
+
+
+def _total_tax_line(rules, income, stcg, ltcg, marginal_relief=True, force_relief=False):
+    """(value, slope) of unrounded total tax on the linear piece containing ``income``
+
+    Inside the marginal-relief band, ``marginal_relief=False`` gives the
+    uncapped line and ``force_relief=True`` the capped one whether or not
+    the cap binds at ``income``.
+    """
+    regular, regular_slope = _slab_line(rules.slabs, income)
+    cg_tax, cg_slope = _capital_gains_line(rules, income, stcg, ltcg)
+    total_taxable_income = income + stcg + ltcg
+
+    # 87A rebate on regular tax only
+    if total_taxable_income <= rules.rebate_limit:
+        if regular <= rules.rebate_max:
+            regular, regular_slope = 0.0, 0.0
+        else:
+            regular -= rules.rebate_max
+
+    before_surcharge, before_surcharge_slope = regular + cg_tax, regular_slope + cg_slope
+
+    # Marginal relief: tax before surcharge capped at the excess over the rebate limit
+    if (marginal_relief and rules.marginal_relief_limit is not None
+            and rules.rebate_limit < total_taxable_income <= rules.marginal_relief_limit
+            and (force_relief or before_surcharge > total_taxable_income - rules.rebate_limit)):
+        before_surcharge, before_surcharge_slope = total_taxable_income - rules.rebate_limit, 1.0
+
+    # Surcharge on regular tax after rebate, capped rate on capital gains
+    rate = rules.surcharge.rate(total_taxable_income)
+    cg_rate = min(rate, rules.surcharge_cg_cap)
+    surcharge, surcharge_slope = regular * rate + cg_tax * cg_rate, regular_slope * rate + cg_slope * cg_rate
+
+    value = (before_surcharge + surcharge) * (1 + rules.cess_rate)
+    slope = (before_surcharge_slope + surcharge_slope) * (1 + rules.cess_rate)
+    return value, slope
+
+
+def _last_income_within(limit, stcg, ltcg):
+    """Highest normal income whose total income, added up as in ``tax_engine.core``, is within ``limit``
+
+    ``limit - stcg - ltcg`` can be off by an ulp either way, which would
+    put a jump on the wrong side of the breakpoint.
+    """
+    income = limit - (stcg + ltcg)
+    while income + stcg + ltcg > limit:
+        income = math.nextafter(income, -math.inf)
+    while math.nextafter(income, math.inf) + stcg + ltcg <= limit:
+        income = math.nextafter(income, math.inf)
+    return income
+
+
+def _candidate_breakpoints(rules, stcg, ltcg):
+    """Normal incomes where the tax formula can change, before marginal-relief crossings"""
+    slabs = rules.slabs
+    candidates = set(slabs.lower_bounds)
+
+    # Slab tax reaches the rebate cap
+    candidates.add(slabs.income_for_tax(rules.rebate_max))
+
+    # Limits on total income, each exactly where the regime functions switch
+    limits = [rules.rebate_limit, *rules.surcharge.thresholds]
+    if rules.marginal_relief_limit is not None:
+        limits.append(rules.marginal_relief_limit)
+    candidates.update(_last_income_within(limit, stcg, ltcg) for limit in limits)
+
+    if rules.regime == 'new':
+        taxable_ltcg = max(0, ltcg - rules.ltcg_exemption)
+        exemption = slabs.basic_exemption
+        candidates.update((exemption - stcg, exemption - stcg - taxable_ltcg))
+
+    return sorted(income for income in candidates if income >= 0)
+
+
+class PiecewiseTax:
+    """Total tax of one regime as a function of normal income, capital gains fixed
+
+    Segment ``i`` covers incomes in ``(breakpoints[i], breakpoints[i + 1]]``
+    (the first one includes 0) with tax ``values[i] + (income -
+    breakpoints[i]) * slopes[i]``.  ``values[i]`` is the limit from the
+    right at the breakpoint, so jumps show as a difference from the
+    previous segment's end.
+    """
+
+    __slots__ = ('regime', 'stcg', 'ltcg', 'breakpoints', 'values', 'slopes', '_end_values', '_arrays')
+
+    def __init__(self, regime, stcg, ltcg, breakpoints, values, slopes):
+        self.regime = regime
+        self.stcg = stcg
+        self.ltcg = ltcg
+        self.breakpoints = tuple(breakpoints)
+        self.values = tuple(values)
+        self.slopes = tuple(slopes)
+        # Tax at the closed right end of each segment (non-decreasing)
+        self._end_values = tuple(value + (end - start) * slope for start, end, value, slope
+                                 in zip(self.breakpoints, self.breakpoints[1:], self.values, self.slopes))
+        self._arrays = None
+
+    def __repr__(self):
+        return f"PiecewiseTax(regime={self.regime!r}, segments={len(self.breakpoints)})"
+
+    def segment(self, income):
+        """Index of the segment containing ``income``"""
+        return max(0, bisect_left(self.breakpoints, income) - 1)
+
+    def tax(self, income):
+        """Unrounded total tax on normal ``income``"""
+        i = self.segment(income)
+        return self.values[i] + (income - self.breakpoints[i]) * self.slopes[i]
+
+    def right_limit(self, income):
+        """Total tax just above ``income`` (differs from ``tax`` only at a jump)"""
+        i = max(0, bisect_right(self.breakpoints, income) - 1)
+        return self.values[i] + (income - self.breakpoints[i]) * self.slopes[i]
+
+    def tax_array(self, income):
+        """Unrounded total tax on an array of normal incomes (NumPy)"""
+        import numpy as np
+
+        if self._arrays is None:
+            self._arrays = tuple(np.asarray(values, dtype=np.float64)
+                                 for values in (self.breakpoints, self.values, self.slopes))
+        breakpoints, values, slopes = self._arrays
+
+        income = np.asarray(income, dtype=np.float64)
+        i = np.maximum(np.searchsorted(breakpoints, income, side='left') - 1, 0)
+        return values[i] + (income - breakpoints[i]) * slopes[i]
+
+    def income_for_tax(self, target):
+        """Lowest normal income whose total tax reaches ``target``
+
+        Where a jump skips over ``target`` this is the income at the jump
+        (the tax just above it exceeds ``target``).
+        """
+        if target <= self.values[0]:
+            return 0.0
+        i = bisect_left(self._end_values, target)
+        start, value, slope = self.breakpoints[i], self.values[i], self.slopes[i]
+        if value >= target:
+            return float(start)
+        return start + (target - value) / slope
+
+    def vertices(self, upper):
+        """(incomes, taxes) tracing the exact curve from 0 to ``upper``
+
+        Each breakpoint appears once, or twice (tax, then tax just above)
+        where the tax jumps.
+        """
+        incomes, taxes = [], []
+        for income in self.breakpoints + (upper,):
+            if income > upper:
+                break
+            incomes.append(income)
+            taxes.append(self.tax(income))
+            right = self.right_limit(income)
+            if right != taxes[-1]:
+                incomes.append(income)
+                taxes.append(right)
+        return incomes, taxes
+
+
+@lru_cache(maxsize=256)
+def compile_tax_function(regime, stcg=0, ltcg=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Compiled ``PiecewiseTax`` for ``regime`` ('new'/'old') with the given capital gains"""
+    rules = load_rules('old' if regime == 'old' else 'new', assessment_year)
+    candidates = _candidate_breakpoints(rules, stcg, ltcg)
+
+    # Where marginal relief starts or stops binding inside the band, the
+    # capped line (slope 1) crosses the uncapped one; split there as well
+    breakpoints = []
+    for start, end in zip(candidates, candidates[1:] + [candidates[-1] + 1]):
+        breakpoints.append(start)
+        middle = (start + end) / 2
+        capped, capped_slope = _total_tax_line(rules, middle, stcg, ltcg, force_relief=True)
+        uncapped, uncapped_slope = _total_tax_line(rules, middle, stcg, ltcg, marginal_relief=False)
+        if capped_slope != uncapped_slope:
+            crossing = middle + (capped - uncapped) / (uncapped_slope - capped_slope)
+            if start < crossing < end:
+                breakpoints.append(crossing)
+
+    values, slopes = [], []
+    for start, end in zip(breakpoints, breakpoints[1:] + [breakpoints[-1] + 2]):
+        # Linear coefficients from a point inside the segment
+        middle = (start + end) / 2
+        value, slope = _total_tax_line(rules, middle, stcg, ltcg)
+        values.append(value - (middle - start) * slope)
+        slopes.append(slope)
+
+    return PiecewiseTax(rules.regime, stcg, ltcg, breakpoints, values, slopes)
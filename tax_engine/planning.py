@@ -0,0 +1,213 @@
+"""Regime planning: how much deduction makes the old regime worth it.
+
+The old regime allows deductions (80C, 80D, HRA, ...) that the new regime
+does not, so for a given income mix the choice comes down to one number:
+the deduction amount at which the old regime's total tax drops to the new
+regime's.  Old-regime tax never rises as deductions grow (slab tax, rebate
+eligibility and surcharge rate all fall with income), so that break-even
+point is a single crossing.
+
+The break-even runs on the batch engine: it sweeps a grid of
+``SWEEP_POINTS`` deductions in one vectorized call, narrows to the cell
+where the crossing lies and sweeps again, which reaches the exact rupee in
+three or four passes.  The tax-vs-salary curves are traced from the
+compiled piecewise-linear functions in ``tax_engine.piecewise``, so they
+are exact with a few dozen points.
+
+``what_if_grid`` varies any two inputs at once for the Analysis heatmaps:
+both regimes over the whole grid are a single batch-engine call.
+"""
+import numpy as np
+
+from .batch import calculate_tax_batch, calculate_total_income_batch, compute_tax_batch
+from .piecewise import compile_tax_function
+from .rules import DEFAULT_ASSESSMENT_YEAR, load_rules
+
+# Points per break-even refinement pass
+SWEEP_POINTS = 1025
+
+# Curves run up to twice the current gross income, and at least this far
+MIN_CURVE_INCOME = 3000000
+
+
+def _total_tax(regime, total_income, stcg, ltcg, assessment_year):
+    base_tax, surcharge, cess, _, _ = calculate_tax_batch(regime, total_income, stcg, ltcg, assessment_year)
+    return base_tax + surcharge + cess
+
+
+def _new_regime_tax(salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg,
+                    assessment_year):
+    total_income = calculate_total_income_batch('new', salary, business_income, house_income, other_sources,
+                                                house_loan_interest, assessment_year)
+    return _total_tax('new', total_income, stcg, ltcg, assessment_year)
+
+
+def _old_regime_tax(deductions, salary, business_income, house_income, house_loan_interest, other_sources,
+                    stcg, ltcg, assessment_year):
+    total_income = calculate_total_income_batch('old', salary, business_income, house_income, other_sources,
+                                                house_loan_interest, assessment_year)
+    # Deductions come off normal income only, never below zero
+    total_income = np.maximum(0, total_income - np.asarray(deductions, dtype=np.float64))
+    return _total_tax('old', total_income, stcg, ltcg, assessment_year)
+
+
+def regime_tax_by_deduction(deductions, salary=0, business_income=0, house_income=0, house_loan_interest=0,
+                            other_sources=0, stcg=0, ltcg=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Total tax under each regime for an array of old-regime deduction amounts
+
+    Returns ``(new_tax, old_tax)`` arrays shaped like ``deductions``; the new
+    regime ignores deductions, so ``new_tax`` is the same at every point.
+    """
+    deductions = np.asarray(deductions, dtype=np.float64)
+    amounts = (salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg)
+    new_tax = _new_regime_tax(*amounts, assessment_year)
+    old_tax = _old_regime_tax(deductions, *amounts, assessment_year)
+    return np.broadcast_to(new_tax, deductions.shape), old_tax
+
+
+def break_even_deduction(salary=0, business_income=0, house_income=0, house_loan_interest=0, other_sources=0,
+                         stcg=0, ltcg=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Smallest whole-rupee deduction at which the old regime costs no more than the new
+
+    Returns 0.0 when the old regime already wins without deductions, and
+    None when no deduction can get it there (even one that wipes out all
+    of the old regime's normal income - capital gains cannot be deducted).
+    """
+    amounts = (salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg)
+    new_tax = float(_new_regime_tax(*amounts, assessment_year))
+    max_deduction = float(calculate_total_income_batch('old', salary, business_income, house_income,
+                                                       other_sources, house_loan_interest, assessment_year))
+
+    def old_tax(deductions):
+        return _old_regime_tax(deductions, *amounts, assessment_year)
+
+    if old_tax(0.0) <= new_tax:
+        return 0.0
+    if old_tax(max_deduction) > new_tax:
+        return None
+
+    # Old tax at ``low`` is above the new regime's, at ``high`` it is not
+    low, high = 0.0, max_deduction
+    while high - low > 1:
+        grid = np.linspace(low, high, SWEEP_POINTS)
+        first = int(np.argmax(old_tax(grid) <= new_tax))
+        low, high = grid[first - 1], grid[first]
+
+    rupees = np.arange(np.floor(low), np.ceil(high) + 1)
+    return float(rupees[np.argmax(old_tax(rupees) <= new_tax)])
+
+
+def regime_tax_curves(salary=0, business_income=0, house_income=0, house_loan_interest=0, other_sources=0,
+                      stcg=0, ltcg=0, deductions=0, max_salary=None, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Total tax under both regimes as salary varies and the other amounts stay fixed
+
+    The salary axis runs from 0 to ``max_salary`` (by default twice the
+    current gross income, at least ``MIN_CURVE_INCOME``); the old regime is
+    taxed after ``deductions``.  The curves are traced exactly from the
+    compiled piecewise-linear tax functions, so the axis only holds the
+    salaries where either regime's tax changes slope or jumps (a jump is two
+    points at the same salary).  Returns a dict of arrays: ``salary``,
+    ``new_tax`` and ``old_tax``; taxes are before rounding to paise.
+    """
+    if max_salary is None:
+        gross_income = salary + business_income + house_income + other_sources + stcg + ltcg
+        max_salary = max(2 * gross_income, MIN_CURVE_INCOME)
+
+    # Normal income is the other heads plus salary above the standard
+    # deduction, and for the old regime less deductions (never below zero)
+    other_income = float(calculate_total_income_batch('new', 0, business_income, house_income, other_sources,
+                                                      house_loan_interest, assessment_year))
+    regimes = [(regime, load_rules(regime, assessment_year), compile_tax_function(regime, stcg, ltcg, assessment_year),
+                regime_deductions) for regime, regime_deductions in (('new', 0), ('old', deductions))]
+
+    # Salary knots, each with the exact normal income of any regime whose
+    # breakpoint it is: salary - offset need not give the breakpoint back,
+    # which would lose the jump there
+    knots = {0.0: {}, float(max_salary): {}}
+    for regime, rules, tax_function, regime_deductions in regimes:
+        offset = rules.standard_deduction + regime_deductions - other_income
+        knots.setdefault(float(rules.standard_deduction), {})
+        knots.setdefault(offset, {})
+        for breakpoint in tax_function.breakpoints:
+            # Below the standard deduction salary does not move income
+            if breakpoint + offset >= rules.standard_deduction:
+                knots.setdefault(breakpoint + offset, {})[regime] = breakpoint
+
+    salaries, taxes = [], {regime: [] for regime, *_ in regimes}
+    for knot in sorted(knot for knot in knots if 0 <= knot <= max_salary):
+        at_knot, above_knot = {}, {}
+        for regime, rules, tax_function, regime_deductions in regimes:
+            income = knots[knot].get(regime)
+            if income is None:
+                unclipped = other_income + max(0, knot - rules.standard_deduction) - regime_deductions
+                income = max(0, unclipped)
+                # Income only rises with salary past the standard deduction and above zero
+                rising = knot >= rules.standard_deduction and unclipped >= 0
+            else:
+                rising = True
+            at_knot[regime] = tax_function.tax(income)
+            above_knot[regime] = tax_function.right_limit(income) if rising else at_knot[regime]
+
+        points = [at_knot]
+        if above_knot != at_knot and knot < max_salary:
+            points.append(above_knot)
+        for point in points:
+            # Knots that coincide add nothing
+            if salaries and salaries[-1] == knot and all(taxes[regime][-1] == point[regime] for regime in taxes):
+                continue
+            salaries.append(knot)
+            for regime in taxes:
+                taxes[regime].append(point[regime])
+
+    return {
+        'salary': np.asarray(salaries),
+        'new_tax': np.asarray(taxes['new']),
+        'old_tax': np.asarray(taxes['old']),
+    }
+
+
+# Inputs a what-if grid can vary (TDS does not change the tax)
+GRID_FIELDS = ('salary', 'business_income', 'house_income', 'house_loan_interest', 'other_sources', 'stcg', 'ltcg')
+
+
+def what_if_grid(x_field, x_values, y_field, y_values, salary=0, business_income=0, house_income=0,
+                 house_loan_interest=0, other_sources=0, stcg=0, ltcg=0, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Total tax and effective rate under both regimes over a grid of two inputs
+
+    ``x_field`` and ``y_field`` are names from ``GRID_FIELDS``; every other
+    input keeps its given amount.  Both regimes and every grid point are one
+    ``compute_tax_batch`` call.  Returns a dict with the ``x`` and ``y``
+    axes and ``total_tax`` / ``effective_rate`` dicts of (len(y), len(x))
+    arrays keyed by regime.
+    """
+    for field in (x_field, y_field):
+        if field not in GRID_FIELDS:
+            raise ValueError(f"Cannot vary {field!r}; choose from {', '.join(GRID_FIELDS)}")
+    if x_field == y_field:
+        raise ValueError("x_field and y_field must be different inputs")
+
+    x_values = np.asarray(x_values, dtype=np.float64)
+    y_values = np.asarray(y_values, dtype=np.float64)
+    shape = (2, len(y_values), len(x_values))   # regime, y, x
+
+    amounts = dict(salary=salary, business_income=business_income, house_income=house_income,
+                   house_loan_interest=house_loan_interest, other_sources=other_sources, stcg=stcg, ltcg=ltcg)
+    amounts[x_field] = x_values[None, None, :]
+    amounts[y_field] = y_values[None, :, None]
+    columns = {field: np.broadcast_to(np.asarray(amount, dtype=np.float64), shape) for field, amount in amounts.items()}
+    is_old = np.broadcast_to(np.array([False, True])[:, None, None], shape)
+
+    results = compute_tax_batch(is_old, columns['salary'], columns['business_income'], columns['house_income'],
+                                columns['house_loan_interest'], columns['other_sources'], columns['stcg'],
+                                columns['ltcg'], 0.0, assessment_year)
+    total_tax = results['total_tax']
+    taxable_income = results['total_taxable_income']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(taxable_income > 0, total_tax / taxable_income * 100, 0.0)
+
+    return {
+        'x': x_values,
+        'y': y_values,
+        'total_tax': {'new': total_tax[0], 'old': total_tax[1]},
+        'effective_rate': {'new': effective_rate[0], 'old': effective_rate[1]},
+    }
@@ -0,0 +1,627 @@
+"""Excel computation reports: one taxpayer in memory, or many written to disk.
+
+``create_bulk_excel_report`` streams a workbook with a Summary sheet and
+every taxpayer's computation, one block of rows each, on Computations
+sheets of up to ``TAXPAYERS_PER_SHEET`` blocks.  It uses xlsxwriter's
+``constant_memory`` mode, so each row is flushed to a temporary file as soon
+as the next row is started and memory does not grow with the number of
+rows written.  Each sheet keeps its temporary file open until the workbook
+is closed, which is why taxpayers share sheets: a workbook keeps one file
+open per ``TAXPAYERS_PER_SHEET`` taxpayers, not one per taxpayer.
+"""
+from io import BytesIO
+
+from . import timing
+from .computation import compute_tax
+
+
+# PROFESSIONAL EXCEL EXPORT WITH FIXED SYNTAX
+def create_professional_excel_report(salary, business_income, house_income, other_sources, stcg, ltcg, regime, house_loan_interest=0, tds_paid=0):
+    """Create Excel report with professional colors and improved visibility using xlsxwriter"""
+    computation = compute_tax(regime, salary, business_income, house_income, house_loan_interest,
+                              other_sources, stcg, ltcg, tds_paid)
+    return create_computation_excel_report(computation)
+
+
+def _create_report_formats(workbook):
+    """Cell formats of the computation sheet, created once per workbook"""
+    # Define IMPROVED professional formats with better visibility
+    title_format = workbook.add_format({
+        'bold': True,
+        'font_size': 18,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#003366',
+        'font_color': '#FFFFFF',
+        'border': 2,
+        'border_color': '#000000'
+    })
+
+    header_format = workbook.add_format({
+        'bold': True,
+        'font_size': 13,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#0066CC',
+        'font_color': '#FFFFFF',
+        'border': 1,
+        'border_color': '#000000'
+    })
+
+    section_format = workbook.add_format({
+        'bold': True,
+        'font_size': 14,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#8B0000',
+        'font_color': '#FFFFFF',
+        'border': 1,
+        'border_color': '#000000'
+    })
+
+    # FIXED bullet format with WHITE text on ORANGE background for maximum visibility
+    bullet_format = workbook.add_format({
+        'bold': True,
+        'font_size': 12,
+        'align': 'left',
+        'valign': 'vcenter',
+        'bg_color': '#FF8C00',
+        'font_color': '#FFFFFF',
+        'border': 1,
+        'border_color': '#000000'
+    })
+
+    data_format = workbook.add_format({
+        'font_size': 10,
+        'align': 'left',
+        'valign': 'vcenter',
+        'border': 1,
+        'border_color': '#000000'
+    })
+
+    amount_format = workbook.add_format({
+        'font_size': 10,
+        'bold': True,
+        'align': 'right',
+        'valign': 'vcenter',
+        'num_format': '₹#,##0.00',
+        'border': 1,
+        'border_color': '#000000'
+    })
+
+    center_format = workbook.add_format({
+        'font_size': 10,
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1,
+        'border_color': '#000000'
+    })
+
+    total_format = workbook.add_format({
+        'font_size': 11,
+        'bold': True,
+        'align': 'right',
+        'valign': 'vcenter',
+        'num_format': '₹#,##0.00',
+        'bg_color': '#E8F4FD',
+        'border': 1,
+        'border_color': '#000000'
+    })
+    
+    negative_format = workbook.add_format({
+        'font_size': 11,
+        'bold': True,
+        'align': 'right',
+        'valign': 'vcenter',
+        'num_format': '"- "₹#,##0.00',
+        'bg_color': '#E8F4FD',
+        'border': 1,
+        'border_color': '#000000',
+        'font_color': 'red'
+    })
+
+    return {
+        'title_format': title_format,
+        'header_format': header_format,
+        'section_format': section_format,
+        'bullet_format': bullet_format,
+        'data_format': data_format,
+        'amount_format': amount_format,
+        'center_format': center_format,
+        'total_format': total_format,
+        'negative_format': negative_format,
+    }
+
+
+def _write_computation_sheet(worksheet, formats, computation, row=0):
+    """Write the computation for one taxpayer from ``row`` down, in row order; returns the next free row"""
+    regime = computation.regime
+    salary = computation.salary
+    business_income = computation.business_income
+    house_income = computation.house_income
+    house_loan_interest = computation.house_loan_interest
+    other_sources = computation.other_sources
+    stcg = computation.stcg
+    ltcg = computation.ltcg
+    tds_paid = computation.tds_paid
+
+    processed_salary = computation.processed_salary
+    processed_house = computation.processed_house
+    total_income_calc = computation.total_income
+
+    tax = computation.base_tax
+    surcharge = computation.surcharge
+    cess = computation.cess
+    rebate = computation.rebate_applied
+    marginal_relief = computation.marginal_relief_applied
+    total_tax = computation.total_tax
+
+    # Advance Tax Liability
+    advance_tax_applicable = computation.advance_tax_applicable
+    q1_amt, q2_amt, q3_amt, q4_amt = computation.installments
+
+    title_format = formats['title_format']
+    header_format = formats['header_format']
+    section_format = formats['section_format']
+    bullet_format = formats['bullet_format']
+    data_format = formats['data_format']
+    amount_format = formats['amount_format']
+    center_format = formats['center_format']
+    total_format = formats['total_format']
+    negative_format = formats['negative_format']
+
+    # Set column widths
+    worksheet.set_column('A:A', 50)
+    worksheet.set_column('B:B', 20)
+    worksheet.set_column('C:C', 18)
+    worksheet.set_column('D:D', 20)
+
+    # Column headers
+    worksheet.write(row, 0, 'Particulars', header_format)
+    worksheet.write(row, 1, 'Details', header_format)
+    worksheet.write(row, 2, 'Sub-total', header_format)
+    worksheet.write(row, 3, 'Total', header_format)
+    row += 1
+
+    # Main title
+    worksheet.merge_range(f'A{row+1}:D{row+1}', 'INCOME TAX COMPUTATION - A.Y. 2026-27', title_format)
+    row += 2
+
+    # Statement of Income header
+    worksheet.merge_range(f'A{row+1}:D{row+1}', 'STATEMENT OF INCOME', section_format)
+    row += 2
+
+    # Income sources with improved visibility
+    if salary > 0:
+        worksheet.merge_range(f'A{row+1}:D{row+1}', '● INCOME FROM SALARY', bullet_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Salary Income', data_format)
+        worksheet.write(row, 1, salary, amount_format)
+        row += 1
+
+        worksheet.write(row, 0, f'Less: Standard deduction u/s 16(ia)', data_format)
+        worksheet.write(row, 1, computation.standard_deduction, amount_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Net Income from Salary', data_format)
+        worksheet.write(row, 2, max(0, processed_salary), total_format)
+        row += 2
+
+    if house_income != 0:
+        worksheet.merge_range(f'A{row+1}:D{row+1}', '● INCOME FROM HOUSE PROPERTY', bullet_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Property Type', data_format)
+        worksheet.write(row, 1, 'Let-out property' if house_income > 0 else 'Self-occupied', data_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Gross annual value' if house_income > 0 else 'Deemed Rental', data_format)
+        worksheet.write(row, 1, abs(house_income) if house_income != 0 else 0, amount_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Less: Municipal taxes', data_format)
+        worksheet.write(row, 1, 0, amount_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Less: Standard deduction u/s 24(a)', data_format)
+        worksheet.write(row, 1, abs(house_income) * 0.30 if house_income != 0 else 0, amount_format)
+        row += 1
+
+        if house_loan_interest > 0:
+            worksheet.write(row, 0, 'Less: Interest on housing loan u/s 24(b)', data_format)
+            worksheet.write(row, 1, house_loan_interest, amount_format)
+            row += 1
+
+        worksheet.write(row, 0, 'Net Income from House Property', data_format)
+        worksheet.write(row, 2, processed_house, total_format)
+        row += 2
+
+    if business_income > 0:
+        worksheet.merge_range(f'A{row+1}:D{row+1}', '● PROFITS AND GAINS OF BUSINESS OR PROFESSION', bullet_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Business/Professional Income', data_format)
+        worksheet.write(row, 1, business_income, amount_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Net Income from Business/Profession', data_format)
+        worksheet.write(row, 2, business_income, total_format)
+        row += 2
+
+    if stcg > 0 or ltcg > 0:
+        worksheet.merge_range(f'A{row+1}:D{row+1}', '● CAPITAL GAINS', bullet_format)
+        row += 1
+
+        if stcg > 0:
+            worksheet.write(row, 0, 'Short Term Capital Gains', data_format)
+            worksheet.write(row, 1, stcg, amount_format)
+            row += 1
+
+        if ltcg > 0:
+            worksheet.write(row, 0, 'Long Term Capital Gains', data_format)
+            worksheet.write(row, 1, ltcg, amount_format)
+            row += 1
+
+            if ltcg > 125000:
+                worksheet.write(row, 0, 'Less: Exemption u/s 112A', data_format)
+                worksheet.write(row, 1, 125000, amount_format)
+                row += 1
+
+        net_cg = stcg + max(0, ltcg - 125000)
+        worksheet.write(row, 0, 'Net Capital Gains', data_format)
+        worksheet.write(row, 2, net_cg, total_format)
+        row += 2
+
+    if other_sources > 0:
+        worksheet.merge_range(f'A{row+1}:D{row+1}', '● INCOME FROM OTHER SOURCES', bullet_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Interest Income', data_format)
+        worksheet.write(row, 1, other_sources, amount_format)
+        row += 1
+
+        worksheet.write(row, 0, 'Net Income from Other Sources', data_format)
+        worksheet.write(row, 2, other_sources, total_format)
+        row += 2
+
+    # Total Income - FIXED the syntax error here
+    gross_total = total_income_calc + stcg + max(0, ltcg)
+    worksheet.write(row, 0, 'Income chargeable under the head House Property', data_format)
+    worksheet.write(row, 3, gross_total, total_format)
+    row += 2
+
+    # Tax Computation
+    worksheet.merge_range(f'A{row+1}:D{row+1}', 'TAX COMPUTATION', section_format)
+    row += 2
+
+    worksheet.write(row, 0, f'Tax as per {regime.upper()} regime', data_format)
+    worksheet.write(row, 3, tax, total_format)
+    row += 1
+
+    if surcharge > 0:
+        worksheet.write(row, 0, 'Add: Surcharge', data_format)
+        worksheet.write(row, 3, surcharge, amount_format)
+        row += 1
+
+    if cess > 0:
+        worksheet.write(row, 0, 'Add: Health & Education Cess', data_format)
+        worksheet.write(row, 3, cess, amount_format)
+        row += 1
+
+    if rebate > 0:
+        worksheet.write(row, 0, 'Less: Rebate u/s 87A', data_format)
+        worksheet.write(row, 3, rebate, amount_format)
+        row += 1
+
+    if marginal_relief > 0:
+        worksheet.write(row, 0, 'Less: Marginal Relief', data_format)
+        worksheet.write(row, 3, marginal_relief, amount_format)
+        row += 1
+
+    worksheet.write(row, 0, 'TOTAL TAX LIABILITY', data_format)
+    worksheet.write(row, 3, total_tax, total_format)
+    row += 1
+    
+    # TDS and Net Payable
+    if tds_paid > 0:
+        worksheet.write(row, 0, 'Less: TDS / Advance Tax Paid', data_format)
+        worksheet.write(row, 3, tds_paid, amount_format)
+        row += 1
+        
+    net_tax_final = total_tax - tds_paid
+    final_label = 'NET TAX PAYABLE' if net_tax_final >= 0 else 'NET REFUND DUE'
+    final_fmt = total_format if net_tax_final >= 0 else negative_format
+    
+    worksheet.write(row, 0, final_label, data_format)
+    worksheet.write(row, 3, abs(net_tax_final), final_fmt)
+    row += 2
+    
+    # Advance Tax Schedule (New Section)
+    if advance_tax_applicable:
+        worksheet.merge_range(f'A{row+1}:D{row+1}', 'ADVANCE TAX LIABILITY SCHEDULE', section_format)
+        row += 2
+        
+        # Table Headers
+        worksheet.write(row, 0, 'Quarter / Due Date', header_format)
+        worksheet.write(row, 1, 'Cumulative %', header_format)
+        worksheet.write(row, 2, 'Installment Amount', header_format)
+        worksheet.write(row, 3, 'Cumulative Payable', header_format)
+        row += 1
+        
+        installments = [
+            ("Q1 (Due: 15th June)", "15%", q1_amt, q1_amt),
+            ("Q2 (Due: 15th Sept)", "45%", q2_amt, q1_amt + q2_amt),
+            ("Q3 (Due: 15th Dec)", "75%", q3_amt, q1_amt + q2_amt + q3_amt),
+            ("Q4 (Due: 15th Mar)", "100%", q4_amt, q1_amt + q2_amt + q3_amt + q4_amt),
+        ]
+        
+        for label, pct, inst_amt, cum_amt in installments:
+            worksheet.write(row, 0, label, data_format)
+            worksheet.write(row, 1, pct, center_format)
+            worksheet.write(row, 2, inst_amt, amount_format)
+            worksheet.write(row, 3, cum_amt, amount_format)
+            row += 1
+        
+        worksheet.merge_range(f'A{row+1}:D{row+1}', 'Note: Interest u/s 234B/234C applicable if delayed.', bullet_format)
+        row += 1
+    return row
+
+
+def create_computation_excel_report(computation):
+    """Excel report for an existing TaxComputation (nothing is recalculated)"""
+    stages = timing.stages('excel_report') if timing.enabled else None
+
+    # Create Excel file in memory
+    output = BytesIO()
+
+    try:
+        import xlsxwriter
+
+        # Create workbook with xlsxwriter for guaranteed formatting
+        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        worksheet = workbook.add_worksheet('Income Tax Computation')
+        formats = _create_report_formats(workbook)
+        if stages:
+            stages.mark('formats')
+        _write_computation_sheet(worksheet, formats, computation)
+        if stages:
+            stages.mark('computation_sheet')
+
+        workbook.close()
+        output.seek(0)
+        if stages:
+            stages.mark('write_xlsx')
+            stages.done()
+        return output
+
+    except ImportError:
+        # Fallback using pandas if xlsxwriter not available
+        import pandas as pd
+
+        regime = computation.regime
+        salary = computation.salary
+        business_income = computation.business_income
+        house_income = computation.house_income
+        house_loan_interest = computation.house_loan_interest
+        other_sources = computation.other_sources
+        stcg = computation.stcg
+        ltcg = computation.ltcg
+        tds_paid = computation.tds_paid
+
+        processed_salary = computation.processed_salary
+        processed_house = computation.processed_house
+        total_income_calc = computation.total_income
+
+        tax = computation.base_tax
+        surcharge = computation.surcharge
+        cess = computation.cess
+        rebate = computation.rebate_applied
+        marginal_relief = computation.marginal_relief_applied
+        total_tax = computation.total_tax
+
+        # Advance Tax Liability
+        advance_tax_applicable = computation.advance_tax_applicable
+        q1_amt, q2_amt, q3_amt, q4_amt = computation.installments
+
+        # Create basic data structure with FIXED syntax
+        report_data = [
+            ["Particulars", "Details", "Sub-total", "Total"],
+            ["INCOME TAX COMPUTATION - A.Y. 2026-27", "", "", ""],
+            ["", "", "", ""],
+            ["STATEMENT OF INCOME", "", "", ""],
+            ["", "", "", ""]
+        ]
+
+        # Add income details (with FIXED syntax)
+        if salary > 0:
+            report_data.extend([
+                ["● INCOME FROM SALARY", "", "", ""],
+                ["Salary Income", f"₹{salary:,.2f}", "", ""],
+                [f"Less: Standard deduction u/s 16(ia)", f"₹{computation.standard_deduction:,.2f}", "", ""],
+                ["Net Income from Salary", "", f"₹{max(0, processed_salary):,.2f}", ""],
+                ["", "", "", ""]
+            ])
+
+        if house_income != 0:
+            report_data.extend([
+                ["● INCOME FROM HOUSE PROPERTY", "", "", ""],
+                ["Property Type", "Let-out property" if house_income > 0 else "Self-occupied", "", ""],
+                ["Gross annual value" if house_income > 0 else "Deemed Rental", f"₹{abs(house_income):,.2f}" if house_income != 0 else "₹0", "", ""],
+                ["Less: Municipal taxes", "₹0", "", ""],
+                ["Less: Standard deduction u/s 24(a)", f"₹{abs(house_income) * 0.30 if house_income != 0 else 0:,.2f}", "", ""]
+            ])
+            if house_loan_interest > 0:
+                report_data.append(["Less: Interest on housing loan u/s 24(b)", f"₹{house_loan_interest:,.2f}", "", ""])
+            report_data.extend([
+                ["Net Income from House Property", "", f"₹{processed_house:,.2f}", ""],
+                ["", "", "", ""]
+            ])
+
+        if business_income > 0:
+            report_data.extend([
+                ["● PROFITS AND GAINS OF BUSINESS OR PROFESSION", "", "", ""],
+                ["Business/Professional Income", f"₹{business_income:,.2f}", "", ""],
+                ["Net Income from Business/Profession", "", f"₹{business_income:,.2f}", ""],
+                ["", "", "", ""]
+            ])
+
+        if stcg > 0 or ltcg > 0:
+            report_data.extend([
+                ["● CAPITAL GAINS", "", "", ""]
+            ])
+            if stcg > 0:
+                report_data.append(["Short Term Capital Gains", f"₹{stcg:,.2f}", "", ""])
+            if ltcg > 0:
+                report_data.append(["Long Term Capital Gains", f"₹{ltcg:,.2f}", "", ""])
+                if ltcg > 125000:
+                    report_data.append(["Less: Exemption u/s 112A", f"₹{125000:,.2f}", "", ""])
+            net_cg = stcg + max(0, ltcg - 125000)
+            report_data.extend([
+                ["Net Capital Gains", "", f"₹{net_cg:,.2f}", ""],
+                ["", "", "", ""]
+            ])
+
+        if other_sources > 0:
+            report_data.extend([
+                ["● INCOME FROM OTHER SOURCES", "", "", ""],
+                ["Interest Income", f"₹{other_sources:,.2f}", "", ""],
+                ["Net Income from Other Sources", "", f"₹{other_sources:,.2f}", ""],
+                ["", "", "", ""]
+            ])
+
+        # Total Income - FIXED the syntax error here too
+        gross_total = total_income_calc + stcg + max(0, ltcg)
+        report_data.extend([
+            ["Income chargeable under the head House Property", "", "", f"₹{gross_total:,.2f}"],
+            ["", "", "", ""],
+            ["TAX COMPUTATION", "", "", ""],
+            [f"Tax as per {regime.upper()} regime", "", "", f"₹{tax:,.2f}"]
+        ])
+
+        if surcharge > 0:
+            report_data.append(["Add: Surcharge", "", "", f"₹{surcharge:,.2f}"])
+        if cess > 0:
+            report_data.append(["Add: Health & Education Cess", "", "", f"₹{cess:,.2f}"])
+        if rebate > 0:
+            report_data.append(["Less: Rebate u/s 87A", "", "", f"₹{rebate:,.2f}"])
+        if marginal_relief > 0:
+            report_data.append(["Less: Marginal Relief", "", "", f"₹{marginal_relief:,.2f}"])
+
+        report_data.append(["TOTAL TAX LIABILITY", "", "", f"₹{total_tax:,.2f}"])
+        
+        # TDS and Advance Tax in Pandas fallback
+        if tds_paid > 0:
+             report_data.append(["Less: TDS / Advance Tax Paid", "", "", f"₹{tds_paid:,.2f}"])
+        
+        net_val = total_tax - tds_paid
+        lbl = "NET TAX PAYABLE" if net_val >= 0 else "NET REFUND DUE"
+        report_data.append([lbl, "", "", f"₹{abs(net_val):,.2f}"])
+        
+        # Advance Tax Schedule in Pandas fallback
+        if advance_tax_applicable:
+             report_data.extend([
+                 ["", "", "", ""],
+                 ["ADVANCE TAX LIABILITY SCHEDULE", "", "", ""],
+                 ["Quarter / Due Date", "Cumulative %", "Installment", "Cumulative Payable"]
+             ])
+             
+             report_data.extend([
+                 ["Q1 (Due: 15th June)", "15%", f"₹{q1_amt:,.2f}", f"₹{q1_amt:,.2f}"],
+                 ["Q2 (Due: 15th Sept)", "45%", f"₹{q2_amt:,.2f}", f"₹{q1_amt + q2_amt:,.2f}"],
+                 ["Q3 (Due: 15th Dec)", "75%", f"₹{q3_amt:,.2f}", f"₹{q1_amt + q2_amt + q3_amt:,.2f}"],
+                 ["Q4 (Due: 15th Mar)", "100%", f"₹{q4_amt:,.2f}", f"₹{q1_amt + q2_amt + q3_amt + q4_amt:,.2f}"]
+             ])
+
+        df = pd.DataFrame(report_data)
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            df.to_excel(writer, sheet_name='Income Tax Computation', index=False, header=False)
+
+        return output
+
+
+SUMMARY_SHEET = 'Summary'
+
+SUMMARY_COLUMNS = (
+    ('Taxpayer', 30),
+    ('Regime', 10),
+    ('Total Taxable Income', 22),
+    ('Total Tax', 18),
+    ('TDS Paid', 18),
+    ('Net Tax Payable / (Refund)', 26),
+)
+
+# Taxpayer blocks on each Computations sheet.  In constant_memory mode every
+# sheet holds a temporary file open until the workbook is closed.  At up to
+# ~55 rows a block a sheet stays under 300,000 rows, and the most taxpayers
+# a Summary sheet can list (Excel's 1,048,576 rows) need ~210 sheets
+TAXPAYERS_PER_SHEET = 5000
+COMPUTATIONS_SHEET = 'Computations'
+
+# Blank rows between two taxpayers' blocks
+BLOCK_GAP = 2
+
+
+def create_bulk_excel_report(path, taxpayers):
+    """Write a Summary sheet plus every taxpayer's computation to ``path``.
+
+    ``taxpayers`` is any iterable of (label, TaxComputation) pairs, e.g. a
+    generator over a payroll file.  It is consumed lazily and each block is
+    written completely before the next pair is read.  The computations go
+    on sheets ``Computations 1``, ``Computations 2``, ... of
+    ``TAXPAYERS_PER_SHEET`` blocks, each under its label, and the Summary
+    links to each block.  Returns the number of taxpayers written.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        formats = _create_report_formats(workbook)
+        amount_format = formats['amount_format']
+        total_format = formats['total_format']
+        link_format = workbook.add_format({
+            'font_size': 10,
+            'align': 'left',
+            'valign': 'vcenter',
+            'font_color': 'blue',
+            'underline': 1,
+            'border': 1,
+            'border_color': '#000000'
+        })
+
+        summary = workbook.add_worksheet(SUMMARY_SHEET)
+        for column, (heading, width) in enumerate(SUMMARY_COLUMNS):
+            summary.set_column(column, column, width)
+            summary.write(0, column, heading, formats['header_format'])
+        summary.freeze_panes(1, 0)
+
+        totals = [0.0, 0.0, 0.0, 0.0]
+        count = 0
+        worksheet = sheet_name = None
+        row = 0
+        for count, (label, computation) in enumerate(taxpayers, start=1):
+            if (count - 1) % TAXPAYERS_PER_SHEET == 0:
+                sheet_name = f'{COMPUTATIONS_SHEET} {(count - 1) // TAXPAYERS_PER_SHEET + 1}'
+                worksheet = workbook.add_worksheet(sheet_name)
+                row = 0
+
+            block_row = row
+            worksheet.merge_range(row, 0, row, 3, str(label), formats['section_format'])
+            row = _write_computation_sheet(worksheet, formats, computation, row + 1) + BLOCK_GAP
+
+            figures = (computation.total_taxable_income, computation.total_tax,
+                       computation.tds_paid, computation.total_tax - computation.tds_paid)
+            summary.write_url(count, 0, f"internal:'{sheet_name}'!A{block_row + 1}", link_format, str(label))
+            summary.write(count, 1, computation.regime.upper(), formats['center_format'])
+            for column, value in enumerate(figures, start=2):
+                summary.write(count, column, value, amount_format)
+                totals[column - 2] += value
+
+        row = count + 1
+        summary.write(row, 0, 'TOTAL', formats['data_format'])
+        summary.write_blank(row, 1, None, formats['data_format'])
+        for column, value in enumerate(totals, start=2):
+            summary.write(row, column, value, total_format)
+    finally:
+        workbook.close()
+    return count
@@ -0,0 +1,185 @@
+"""Data-driven tax rule tables, compiled once per assessment year and regime.
+
+The slab rates, rebate limits, capital gains rates and the surcharge ladder
+are plain data in ``RULE_DATA``.  ``load_rules`` compiles them into a
+``TaxRules`` object whose ``SlabTable`` precomputes the cumulative tax at
+every slab boundary, so the tax on any income is one bisect plus one
+multiply-add.  The scalar functions, the NumPy batch functions and chart
+sweeps all share the same compiled tables.
+"""
+import hashlib
+import json
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+DEFAULT_ASSESSMENT_YEAR = '2026-27'
+
+# Slabs are (lower bound, rate) pairs in ascending order; the last slab is
+# open-ended.  Surcharge rungs are (income threshold, rate) and apply to
+# income strictly above the threshold.
+RULE_DATA = {
+    ('2026-27', 'new'): {
+        'standard_deduction': 75000,
+        'slabs': [
+            (0, 0.00),          # 0 to 4L: 0%
+            (400000, 0.05),     # 4L to 8L: 5%
+            (800000, 0.10),     # 8L to 12L: 10%
+            (1200000, 0.15),    # 12L to 16L: 15%
+            (1600000, 0.20),    # 16L to 20L: 20%
+            (2000000, 0.25),    # 20L to 24L: 25%
+            (2400000, 0.30),    # Above 24L: 30%
+        ],
+        'rebate_limit': 1200000,
+        'rebate_max': 60000,
+        'marginal_relief_limit': 1260000,
+        'stcg_rate': 0.20,
+        'ltcg_rate': 0.125,
+        'ltcg_exemption': 125000,
+        'surcharge': [(5000000, 0.10), (10000000, 0.15), (20000000, 0.25), (50000000, 0.25)],
+        'surcharge_cg_cap': 0.15,
+        'cess_rate': 0.04,
+    },
+    ('2026-27', 'old'): {
+        'standard_deduction': 50000,
+        'slabs': [
+            (0, 0.00),          # 0 to 2.5L: 0%
+            (250000, 0.05),     # 2.5L to 5L: 5%
+            (500000, 0.20),     # 5L to 10L: 20%
+            (1000000, 0.30),    # Above 10L: 30%
+        ],
+        'rebate_limit': 500000,
+        'rebate_max': 12500,
+        'marginal_relief_limit': None,
+        'stcg_rate': 0.20,
+        'ltcg_rate': 0.125,
+        'ltcg_exemption': 125000,
+        'surcharge': [(5000000, 0.10), (10000000, 0.15), (20000000, 0.25), (50000000, 0.37)],
+        'surcharge_cg_cap': 0.15,
+        'cess_rate': 0.04,
+    },
+}
+
+
+class SlabTable:
+    """Progressive slab schedule with the cumulative tax at each boundary"""
+
+    __slots__ = ('lower_bounds', 'rates', 'cumulative_tax', '_arrays')
+
+    def __init__(self, slabs):
+        self.lower_bounds = tuple(lower for lower, _ in slabs)
+        self.rates = tuple(rate for _, rate in slabs)
+
+        # Accumulate full-slab tax in slab order (same additions as walking
+        # the slabs one by one, so results match the slab-walk exactly)
+        cumulative = [0]
+        for i in range(1, len(slabs)):
+            width = self.lower_bounds[i] - self.lower_bounds[i - 1]
+            cumulative.append(cumulative[-1] + width * self.rates[i - 1])
+        self.cumulative_tax = tuple(cumulative)
+        self._arrays = None
+
+    @property
+    def basic_exemption(self):
+        """Upper bound of the first (0%) slab"""
+        return self.lower_bounds[1]
+
+    def segment(self, income):
+        """Index of the slab that ``income`` falls in"""
+        return max(0, bisect_right(self.lower_bounds, income) - 1)
+
+    def tax(self, income):
+        """Slab tax on ``income``"""
+        i = self.segment(income)
+        return self.cumulative_tax[i] + (income - self.lower_bounds[i]) * self.rates[i]
+
+    def income_for_tax(self, tax):
+        """Lowest income whose slab tax is ``tax`` (inverse of ``tax``)"""
+        if tax <= 0:
+            return 0
+        i = bisect_left(self.cumulative_tax, tax) - 1
+        return self.lower_bounds[i] + (tax - self.cumulative_tax[i]) / self.rates[i]
+
+    def tax_array(self, income):
+        """Slab tax on an array of incomes (NumPy)"""
+        import numpy as np
+
+        if self._arrays is None:
+            self._arrays = tuple(np.asarray(values, dtype=np.float64)
+                                 for values in (self.lower_bounds, self.rates, self.cumulative_tax))
+        lower_bounds, rates, cumulative_tax = self._arrays
+
+        income = np.asarray(income, dtype=np.float64)
+        i = np.maximum(np.searchsorted(lower_bounds, income, side='right') - 1, 0)
+        return cumulative_tax[i] + (income - lower_bounds[i]) * rates[i]
+
+
+class SurchargeLadder:
+    """Surcharge rate by total income; each rung applies strictly above its threshold"""
+
+    __slots__ = ('thresholds', 'rates', '_arrays')
+
+    def __init__(self, rungs):
+        self.thresholds = tuple(threshold for threshold, _ in rungs)
+        self.rates = (0.00,) + tuple(rate for _, rate in rungs)
+        self._arrays = None
+
+    def rate(self, total_income):
+        return self.rates[bisect_left(self.thresholds, total_income)]
+
+    def rate_array(self, total_income):
+        import numpy as np
+
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.thresholds, dtype=np.float64),
+                            np.asarray(self.rates, dtype=np.float64))
+        thresholds, rates = self._arrays
+        return rates[np.searchsorted(thresholds, np.asarray(total_income, dtype=np.float64), side='left')]
+
+
+class TaxRules:
+    """Compiled rules for one regime in one assessment year"""
+
+    __slots__ = ('assessment_year', 'regime', 'standard_deduction', 'slabs', 'rebate_limit',
+                 'rebate_max', 'marginal_relief_limit', 'stcg_rate', 'ltcg_rate',
+                 'ltcg_exemption', 'surcharge', 'surcharge_cg_cap', 'cess_rate')
+
+    def __init__(self, assessment_year, regime, data):
+        self.assessment_year = assessment_year
+        self.regime = regime
+        self.standard_deduction = data['standard_deduction']
+        self.slabs = SlabTable(data['slabs'])
+        self.rebate_limit = data['rebate_limit']
+        self.rebate_max = data['rebate_max']
+        self.marginal_relief_limit = data['marginal_relief_limit']
+        self.stcg_rate = data['stcg_rate']
+        self.ltcg_rate = data['ltcg_rate']
+        self.ltcg_exemption = data['ltcg_exemption']
+        self.surcharge = SurchargeLadder(data['surcharge'])
+        self.surcharge_cg_cap = data['surcharge_cg_cap']
+        self.cess_rate = data['cess_rate']
+
+    def __repr__(self):
+        return f"TaxRules(assessment_year={self.assessment_year!r}, regime={self.regime!r})"
+
+
+@lru_cache(maxsize=None)
+def load_rules(regime, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Compiled ``TaxRules`` for ``regime`` ('new'/'old') and ``assessment_year``"""
+    try:
+        data = RULE_DATA[(assessment_year, regime)]
+    except KeyError:
+        raise ValueError(f"No tax rules for A.Y. {assessment_year} ({regime} regime)") from None
+    return TaxRules(assessment_year, regime, data)
+
+
+@lru_cache(maxsize=None)
+def rule_version(assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Short digest of ``assessment_year``'s rule tables (both regimes)
+
+    Changes whenever any rate, slab or limit of that year does, so results
+    stored under it are never served after the rules are corrected.
+    """
+    data = {regime: RULE_DATA[(year, regime)] for year, regime in sorted(RULE_DATA) if year == assessment_year}
+    if not data:
+        raise ValueError(f"No tax rules for A.Y. {assessment_year}")
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
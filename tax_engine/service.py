@@ -0,0 +1,370 @@
+"""Local HTTP JSON API over the tax engine, for HRMS/payroll integrations.
+
+Usage::
+
+    python -m tax_engine.service --host 127.0.0.1 --port 8765
+
+Endpoints (request bodies use the Calculate Tax form fields; missing amounts
+and nulls count as 0, a missing regime as the new regime)::
+
+    POST /compute            {"regime": "new", "salary": 1500000, "tds_paid": 50000}
+    POST /compare-regimes    {"salary": 1500000, "house_loan_interest": 200000}
+    POST /advance-schedule   {"regime": "old", "salary": 2400000, "tds_paid": 150000}
+    GET  /health
+
+Each POST also accepts a JSON array of such objects and answers with an
+array in the same order.
+
+Requests are not computed one by one: every taxpayer that arrives within
+``batch_window`` seconds (or until ``max_batch`` rows are waiting) is
+computed in one ``compute_tax_batch`` call, so under concurrent load the
+per-request cost is a small share of one vectorized call.  The batch engine
+is bit-identical to the scalar functions the app uses, so the numbers match
+the form exactly.
+
+The server is plain asyncio with no dependency beyond NumPy; it speaks
+HTTP/1.1 with keep-alive and Content-Length bodies, which is what HTTP
+client libraries send.  Run it behind a reverse proxy if it has to be
+reachable from outside the host.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+from http import HTTPStatus
+
+from .advance import INSTALLMENT_SCHEDULE
+from .batch import BATCH_RESULT_FIELDS, compute_tax_batch
+from .rules import DEFAULT_ASSESSMENT_YEAR
+
+AMOUNT_FIELDS = ('salary', 'business_income', 'house_income', 'house_loan_interest',
+                 'other_sources', 'stcg', 'ltcg', 'tds_paid')
+REGIMES = ('new', 'old')
+DEFAULT_REGIME = 'new'
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class RequestError(ValueError):
+    """Invalid request - answered with ``status`` and the message"""
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_taxpayer(payload, allow_regime=True):
+    """(regime, amounts...) row for one request object, validated like the form"""
+    if not isinstance(payload, dict):
+        raise RequestError("Each taxpayer must be a JSON object")
+    allowed = set(AMOUNT_FIELDS) | ({'regime'} if allow_regime else set())
+    unknown = sorted(set(payload) - allowed)
+    if unknown:
+        raise RequestError(f"Unknown field(s): {', '.join(unknown)}")
+
+    regime = payload.get('regime') or DEFAULT_REGIME
+    if regime not in REGIMES:
+        raise RequestError(f"regime must be 'new' or 'old', got {regime!r}")
+
+    amounts = []
+    for field in AMOUNT_FIELDS:
+        value = payload.get(field)
+        if value is None:
+            value = 0.0
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RequestError(f"{field} must be a number, got {value!r}")
+        try:
+            value = float(value)
+        except OverflowError:
+            raise RequestError(f"{field} is too large") from None
+        if not math.isfinite(value):
+            # json.loads accepts NaN, Infinity and 1e400
+            raise RequestError(f"{field} must be a finite number, got {value!r}")
+        if field != 'house_income' and value < 0:
+            # Same bounds as the form (house income may be a loss)
+            raise RequestError(f"{field} cannot be negative")
+        amounts.append(value)
+    return (regime, *amounts)
+
+
+class MicroBatcher:
+    """Coalesces rows submitted close together into one compute_tax_batch call.
+
+    The first row of a batch starts a ``window``-second timer; the batch is
+    computed when the timer fires or as soon as ``max_batch`` rows are
+    waiting, whichever comes first.
+    """
+
+    def __init__(self, window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH,
+                 assessment_year=DEFAULT_ASSESSMENT_YEAR):
+        self.window = window
+        self.max_batch = max_batch
+        self.assessment_year = assessment_year
+        self._pending = []
+        self._pending_rows = 0
+        self._timer = None
+        self.batches = 0
+        self.rows = 0
+
+    async def compute(self, rows):
+        """Result dicts (``BATCH_RESULT_FIELDS``) for ``rows`` of (regime, amounts...)"""
+        if not rows:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((rows, future))
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        if not pending:
+            return
+
+        rows = [row for entry_rows, _ in pending for row in entry_rows]
+        try:
+            results = self._compute_rows(rows)
+        except Exception:
+            # One bad request must not fail the others batched with it:
+            # compute each request on its own so only its future fails
+            for entry_rows, future in pending:
+                try:
+                    entry_results = self._compute_rows(entry_rows)
+                except Exception as exc:
+                    if not future.done():
+                        future.set_exception(exc)
+                else:
+                    if not future.done():
+                        future.set_result(entry_results)
+            return
+
+        start = 0
+        for entry_rows, future in pending:
+            stop = start + len(entry_rows)
+            if not future.done():
+                future.set_result(results[start:stop])
+            start = stop
+
+    def _compute_rows(self, rows):
+        """Result dicts for ``rows`` from one compute_tax_batch call"""
+        results = compute_tax_batch(*zip(*rows), assessment_year=self.assessment_year)
+        self.batches += 1
+        self.rows += len(rows)
+        values = {name: results[name].tolist() for name in BATCH_RESULT_FIELDS}
+        return [{name: values[name][index] for name in BATCH_RESULT_FIELDS} for index in range(len(rows))]
+
+
+def _computation(row, result):
+    regime, *amounts = row
+    computation = {'regime': regime, **dict(zip(AMOUNT_FIELDS, amounts)), **result}
+    total_taxable_income = computation['total_taxable_income']
+    computation['effective_rate'] = (
+        (computation['total_tax'] / total_taxable_income) * 100 if total_taxable_income > 0 else 0.0)
+    return computation
+
+
+def _schedule(result):
+    installments = []
+    cumulative_amount = 0.0
+    for index, (quarter, due_date, cumulative_share) in enumerate(INSTALLMENT_SCHEDULE, start=1):
+        amount = result[f'installment_q{index}']
+        cumulative_amount += amount
+        installments.append({
+            'quarter': quarter,
+            'due_date': due_date,
+            'cumulative_share': cumulative_share,
+            'amount': amount,
+            'cumulative_amount': cumulative_amount,
+        })
+    return {
+        'net_tax_liability': result['net_tax_liability'],
+        'advance_tax_applicable': result['advance_tax_applicable'],
+        'installments': installments,
+    }
+
+
+async def compute_endpoint(batcher, payloads):
+    rows = [parse_taxpayer(payload) for payload in payloads]
+    results = await batcher.compute(rows)
+    return [_computation(row, result) for row, result in zip(rows, results)]
+
+
+async def compare_regimes_endpoint(batcher, payloads):
+    rows = []
+    for payload in payloads:
+        _, *amounts = parse_taxpayer(payload, allow_regime=False)
+        rows.extend([('new', *amounts), ('old', *amounts)])
+    results = await batcher.compute(rows)
+
+    comparisons = []
+    for index in range(0, len(rows), 2):
+        new = _computation(rows[index], results[index])
+        old = _computation(rows[index + 1], results[index + 1])
+        recommended = 'new' if new['total_tax'] <= old['total_tax'] else 'old'
+        comparisons.append({
+            'new': new,
+            'old': old,
+            'recommended_regime': recommended,
+            'tax_saving': abs(new['total_tax'] - old['total_tax']),
+        })
+    return comparisons
+
+
+async def advance_schedule_endpoint(batcher, payloads):
+    rows = [parse_taxpayer(payload) for payload in payloads]
+    results = await batcher.compute(rows)
+    return [_schedule(result) for result in results]
+
+
+ENDPOINTS = {
+    '/compute': compute_endpoint,
+    '/compare-regimes': compare_regimes_endpoint,
+    '/advance-schedule': advance_schedule_endpoint,
+}
+
+
+class TaxService:
+    """asyncio HTTP server routing the JSON endpoints through one MicroBatcher"""
+
+    def __init__(self, batcher=None):
+        self.batcher = batcher or MicroBatcher()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                status, payload = await self._dispatch(method, path, body)
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except RequestError as exc:
+            self._write_response(writer, exc.status, {'error': str(exc)}, keep_alive=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _readline(reader):
+        try:
+            return await reader.readline()
+        except ValueError:
+            # StreamReader's line limit (64 KiB) was exceeded
+            raise RequestError("Request line or header too long") from None
+
+    async def _read_request(self, reader):
+        request_line = await self._readline(reader)
+        if not request_line:
+            return None
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise RequestError("Malformed request line")
+
+        headers = {}
+        while True:
+            line = await self._readline(reader)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise RequestError("Chunked request bodies are not supported", HTTPStatus.LENGTH_REQUIRED)
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise RequestError("Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise RequestError("Request body too large", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        return method, path.split('?', 1)[0], body, keep_alive
+
+    async def _dispatch(self, method, path, body):
+        if path == '/health':
+            if method != 'GET':
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "Use GET"}
+            return HTTPStatus.OK, {'status': 'ok', 'batches': self.batcher.batches, 'rows': self.batcher.rows}
+
+        endpoint = ENDPOINTS.get(path)
+        if endpoint is None:
+            return HTTPStatus.NOT_FOUND, {'error': f"Unknown endpoint {path}"}
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "Use POST"}
+
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {'error': "Body must be JSON"}
+        try:
+            if isinstance(data, list):
+                return HTTPStatus.OK, await endpoint(self.batcher, data)
+            return HTTPStatus.OK, (await endpoint(self.batcher, [data]))[0]
+        except RequestError as exc:
+            return exc.status, {'error': str(exc)}
+        except Exception:
+            # Answer rather than drop the connection, e.g. when the engine fails on a batch
+            logger.exception("%s %s failed", method, path)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "Internal error computing the request"}
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, batch_window=DEFAULT_BATCH_WINDOW,
+                max_batch=DEFAULT_MAX_BATCH, assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    service = TaxService(MicroBatcher(batch_window, max_batch, assessment_year))
+    server = await service.start(host, port)
+    print(f"Tax API listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the tax engine as a local HTTP JSON API.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--batch-window', type=float, default=DEFAULT_BATCH_WINDOW,
+                        help="seconds to wait for more requests before computing a batch")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help="rows that trigger a batch at once")
+    parser.add_argument('--assessment-year', default=DEFAULT_ASSESSMENT_YEAR)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.batch_window, args.max_batch, args.assessment_year))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
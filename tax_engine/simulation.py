@@ -0,0 +1,93 @@
+"""Monte Carlo advance-tax planning for income that is not known yet.
+
+Advance tax is paid during the year, before business income, capital gains
+or interest are final.  Each uncertain amount is given as a triangular
+distribution - (low, most likely, high) - and ``simulate_advance_tax``
+draws every sample in one go, runs all of them through
+``compute_tax_batch`` and reports the spread of the net liability.
+
+The recommended installments cover the liability at a chosen percentile
+(the ``confidence``).  That plan is then checked against every sample with
+the 234B/234C engine, as if each installment were paid on its due date, so
+the result also shows the interest the plan is expected to cost when
+income turns out higher.
+"""
+import numpy as np
+
+from .advance import INSTALLMENT_SCHEDULE, advance_tax_installments, installment_due_dates
+from .batch import compute_tax_batch
+from .interest import advance_tax_interest
+from .rules import DEFAULT_ASSESSMENT_YEAR
+
+# Amounts that can be given as a (low, most likely, high) range
+SIMULATED_FIELDS = ('business_income', 'other_sources', 'stcg', 'ltcg')
+
+DEFAULT_SAMPLES = 200000
+DEFAULT_CONFIDENCE = 80
+REPORTED_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Fixed seed, so the same inputs always give the same plan
+DEFAULT_SEED = 2026
+
+
+def _draw(rng, income_range, samples):
+    low, likely, high = (float(value) for value in income_range)
+    if not low <= likely <= high:
+        raise ValueError(f"Range must satisfy low <= most likely <= high, got {income_range!r}")
+    if low == high:
+        return np.full(samples, low)
+    return rng.triangular(low, likely, high, samples)
+
+
+def simulate_advance_tax(regime, ranges, salary=0, business_income=0, house_income=0, house_loan_interest=0,
+                         other_sources=0, stcg=0, ltcg=0, tds_paid=0, samples=DEFAULT_SAMPLES,
+                         confidence=DEFAULT_CONFIDENCE, seed=DEFAULT_SEED,
+                         assessment_year=DEFAULT_ASSESSMENT_YEAR):
+    """Liability distribution and an installment plan at the ``confidence`` percentile
+
+    ``ranges`` maps names in ``SIMULATED_FIELDS`` to (low, most likely,
+    high); those amounts are drawn per sample, every other amount is fixed.
+    Returns a dict with the ``net_tax_liability`` samples, its ``mean`` and
+    ``percentiles`` (``REPORTED_PERCENTILES``), the ``planned_liability``
+    at ``confidence``, the quarterly ``installments`` covering it, the
+    ``shortfall_probability`` (share of samples above the plan) and the
+    ``expected_interest`` under 234B/234C if the plan is paid on time.
+    """
+    unknown = set(ranges) - set(SIMULATED_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot simulate {', '.join(sorted(unknown))}; choose from {', '.join(SIMULATED_FIELDS)}")
+
+    rng = np.random.default_rng(seed)
+    amounts = {'business_income': business_income, 'other_sources': other_sources, 'stcg': stcg, 'ltcg': ltcg}
+    for field in SIMULATED_FIELDS:
+        if field in ranges:
+            amounts[field] = _draw(rng, ranges[field], samples)
+
+    results = compute_tax_batch(
+        regime, np.full(samples, float(salary)), amounts['business_income'], house_income, house_loan_interest,
+        amounts['other_sources'], amounts['stcg'], amounts['ltcg'], tds_paid, assessment_year)
+    liability = results['net_tax_liability']
+
+    planned_liability = float(np.percentile(liability, confidence))
+    installments = advance_tax_installments(planned_liability)
+
+    # Every sample pays the same plan on the due dates
+    due_dates = installment_due_dates(assessment_year)
+    quarters = len(INSTALLMENT_SCHEDULE)
+    interest = advance_tax_interest(
+        liability,
+        np.repeat(np.arange(samples), quarters),
+        np.tile(np.asarray(due_dates, dtype='datetime64[D]'), samples),
+        np.tile(np.asarray(installments, dtype=np.float64), samples),
+        assessment_year=assessment_year,
+    )
+
+    return {
+        'net_tax_liability': liability,
+        'mean': float(liability.mean()),
+        'percentiles': dict(zip(REPORTED_PERCENTILES, np.percentile(liability, REPORTED_PERCENTILES).tolist())),
+        'planned_liability': planned_liability,
+        'installments': installments,
+        'shortfall_probability': float((liability > planned_liability).mean()),
+        'expected_interest': float(interest['total_interest'].mean()),
+    }
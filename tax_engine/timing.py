@@ -0,0 +1,98 @@
+"""Opt-in per-stage timing for the calculation pipeline.
+
+Instrumented code only creates a tracker when timing is switched on::
+
+    stages = timing.stages('new_regime') if timing.enabled else None
+    ...
+    if stages:
+        stages.mark('slab_tax')
+
+so with timing off every stage costs a single flag test.  Switch it on with
+the ``TAX_ENGINE_TIMING=1`` environment variable or ``timing.enable()``.
+
+Each mark produces a record such as
+``{"span": "new_regime", "stage": "slab_tax", "ms": 0.0042}`` - the time
+since the previous mark (or since the tracker was created) - and ``done()``
+adds a ``"total"`` record.  Records are logged as JSON on the
+``tax_engine.timing`` logger at DEBUG level and appended to the list
+returned by ``collect()`` in the current thread, which the app shows in its
+debug panel.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+enabled = os.environ.get('TAX_ENGINE_TIMING', '').strip().lower() not in ('', '0', 'false', 'no')
+
+# Per thread/context, so concurrent app sessions collect only their own spans
+_records = ContextVar('tax_engine_timing_records', default=None)
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+class Stages:
+    """Times consecutive stages of one span"""
+
+    __slots__ = ('span', '_start', '_last')
+
+    def __init__(self, span):
+        self.span = span
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        """Record the time since the previous mark as ``stage``"""
+        _emit(self.span, stage, time.perf_counter() - self._last)
+        # Restart after emitting, so logging is not billed to the next stage
+        self._last = time.perf_counter()
+
+    def done(self):
+        """Record the time since the tracker was created as ``total``"""
+        _emit(self.span, 'total', time.perf_counter() - self._start)
+
+
+def stages(span):
+    return Stages(span)
+
+
+def _emit(span, stage, seconds):
+    record = {'span': span, 'stage': stage, 'ms': round(seconds * 1000, 4)}
+    records = _records.get()
+    if records is not None:
+        records.append(record)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps(record))
+
+
+def start_collecting():
+    """Collect records of the current thread into a new list from here on.
+
+    For scripts that cannot wrap their body in ``collect()``, such as the
+    Streamlit app, which starts a fresh list on every rerun.
+    """
+    records = []
+    _records.set(records)
+    return records
+
+
+@contextmanager
+def collect():
+    """Records produced in the current thread while the block runs, as a list"""
+    records = []
+    token = _records.set(records)
+    try:
+        yield records
+    finally:
+        _records.reset(token)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from tax_engine import calculate_tax_new_regime, calculate_tax_old_regime, compute_tax
+from tax_engine.batch import BATCH_RESULT_FIELDS, calculate_tax_batch, compute_tax_batch, round2
+from tax_engine.rules import load_rules
+
+INSTALLMENT_FIELDS = ('installment_q1', 'installment_q2', 'installment_q3', 'installment_q4')
+
+
+def taxpayers(regime, count=2000, seed=11):
+    """Random inputs plus incomes at and around the rebate limit and surcharge thresholds"""
+    rng = np.random.default_rng(seed)
+    rules = load_rules(regime)
+    salary = np.concatenate([
+        rng.uniform(0, 6e7, count).round(2),
+        np.repeat([rules.rebate_limit, *rules.surcharge.thresholds], 3) + rules.standard_deduction
+        + np.tile([-0.01, 0.0, 0.01], 1 + len(rules.surcharge.thresholds)),
+    ])
+    rows = len(salary)
+
+    def sometimes(high):
+        return rng.choice([0, 1], rows) * rng.uniform(0, high, rows).round(2)
+
+    return (salary, sometimes(3e7), sometimes(2e6), sometimes(3e5), sometimes(5e5), sometimes(2e6),
+            sometimes(3e6), sometimes(5e5))
+
+
+@pytest.mark.parametrize('regime', ['new', 'old'])
+def test_batch_is_bit_identical_to_scalar(regime):
+    columns = taxpayers(regime)
+    results = compute_tax_batch(regime, *columns)
+    for index in range(len(columns[0])):
+        computation = compute_tax(regime, *(float(column[index]) for column in columns))
+        for name in BATCH_RESULT_FIELDS:
+            if name in INSTALLMENT_FIELDS:
+                expected = computation.installments[INSTALLMENT_FIELDS.index(name)]
+            else:
+                expected = getattr(computation, name)
+            assert results[name][index] == expected, (name, index)
+
+
+def test_mixed_regimes_match_single_regime_batches():
+    columns = taxpayers('new', count=500)
+    regimes = np.where(np.arange(len(columns[0])) % 2 == 0, 'new', 'old')
+    mixed = compute_tax_batch(regimes, *columns)
+    for regime in ('new', 'old'):
+        rows = regimes == regime
+        single = compute_tax_batch(regime, *(column[rows] for column in columns))
+        for name in BATCH_RESULT_FIELDS:
+            np.testing.assert_array_equal(mixed[name][rows], single[name])
+
+
+def test_round2_matches_builtin_round_next_to_half_paise():
+    # Half-paisa values whose product by 100 rounds the other way in floats
+    values = [0.125, 0.375, 1.005, 2.675, 1.115, 8.345, 1234567.885, -0.125, -2.675, 0.0, -0.0, 1e15 + 0.5]
+    rng = np.random.default_rng(2)
+    values += list((rng.integers(0, 10 ** 9, 20000) + 0.5) / 100)
+    values += list(rng.uniform(0, 1e7, 20000))
+    # float(): np.float64.__round__ is NumPy's scale-and-rint, not the reference
+    np.testing.assert_array_equal(round2(values), [round(float(value), 2) for value in values])
+
+
+@pytest.mark.parametrize('regime, scalar', [('new', calculate_tax_new_regime), ('old', calculate_tax_old_regime)])
+def test_regime_functions_match_scalar(regime, scalar):
+    rng = np.random.default_rng(13)
+    total_income = np.concatenate([rng.uniform(0, 6e7, 3000).round(2), rng.integers(0, 6e6, 3000) + 0.005])
+    stcg = rng.choice([0, 1], len(total_income)) * rng.uniform(0, 2e6, len(total_income)).round(2)
+    ltcg = rng.choice([0, 1], len(total_income)) * rng.uniform(0, 3e6, len(total_income)).round(2)
+    results = calculate_tax_batch(regime, total_income, stcg, ltcg)
+    for index in range(len(total_income)):
+        expected = scalar(float(total_income[index]), float(stcg[index]), float(ltcg[index]))
+        assert tuple(values[index] for values in results) == expected, index
@@ -0,0 +1,26 @@
+from tax_engine.cache import ResultCache
+
+
+def test_clients_sharing_inputs_each_keep_the_entry():
+    with ResultCache(':memory:') as cache:
+        cache.computation('new', salary=1500000, client='ACME-001')
+        cache.computation('new', salary=1500000, client='ACME-002')
+        cache.computation('new', salary=900000, client='ACME-002')
+        assert len(cache.client_entries('ACME-001')) == 1
+        assert len(cache.client_entries('ACME-002')) == 2
+
+
+def test_hit_records_the_client():
+    with ResultCache(':memory:') as cache:
+        cache.computation('new', salary=1500000)
+        cache.computation('new', salary=1500000, client='ACME-001')
+        [entry] = cache.client_entries('ACME-001')
+        assert entry['computation'].total_tax == cache.computation('new', salary=1500000).total_tax
+
+
+def test_eviction_removes_client_rows():
+    with ResultCache(':memory:', max_bytes=1) as cache:
+        cache.computation('new', salary=1500000, client='ACME-001')
+        cache.computation('new', salary=900000, client='ACME-001')
+        assert cache.client_entries('ACME-001') == []
+        assert cache._connection.execute('SELECT COUNT(*) FROM result_clients').fetchone()[0] == 0
@@ -0,0 +1,64 @@
+import datetime
+
+import pytest
+
+from tax_engine.capital_gains import match_trades, summarize_capital_gains
+
+
+def trade(date, side, quantity, price, isin='INE000A01011', charges=0):
+    return {'isin': isin, 'trade_date': date, 'trade_type': side, 'quantity': quantity, 'price': price,
+            'charges': charges}
+
+
+def test_sales_close_oldest_lots_first():
+    trades = [
+        trade('2024-01-10', 'buy', 10, 100),
+        trade('2024-06-01', 'buy', 5, 120),
+        trade('2025-01-11', 'sell', 12, 150),
+        trade('2025-02-01', 'sell', 3, 160),
+    ]
+    disposals = list(match_trades(trades))
+    assert [(d[1], d[3], d[7]) for d in disposals] == [
+        (datetime.date(2024, 1, 10), 10, True),
+        (datetime.date(2024, 6, 1), 2, False),
+        (datetime.date(2024, 6, 1), 3, False),
+    ]
+    assert [d[6] for d in disposals] == [500, 60, 120]
+
+
+def test_twelve_months_to_the_day_is_short_term():
+    trades = [trade('2024-01-10', 'buy', 2, 100), trade('2025-01-10', 'sell', 1, 100),
+              trade('2025-01-11', 'sell', 1, 100)]
+    assert [d[7] for d in match_trades(trades)] == [False, True]
+
+
+def test_charges_go_into_cost_and_sale_value():
+    trades = [trade('2025-04-01', 'buy', 10, 100, charges=20), trade('2025-05-01', 'sell', 10, 110, charges=10)]
+    [disposal] = match_trades(trades)
+    assert disposal[4] == pytest.approx(1090)
+    assert disposal[5] == pytest.approx(1020)
+
+
+def test_grandfathered_cost_is_the_higher_of_cost_and_fair_market_value():
+    trades = [trade('2017-05-02', 'buy', 10, 100), trade('2025-06-02', 'sell', 10, 399)]
+    [disposal] = match_trades(trades, {'INE000A01011': 150})
+    assert disposal[5] == 1500
+    assert disposal[8]
+
+
+def test_selling_more_than_held_raises():
+    with pytest.raises(ValueError):
+        list(match_trades([trade('2025-04-01', 'buy', 1, 100), trade('2025-05-01', 'sell', 2, 100)]))
+
+
+def test_summary_nets_short_term_loss_against_long_term_gain():
+    trades = [
+        trade('2023-04-03', 'buy', 10, 100, isin='A'),
+        trade('2025-04-10', 'buy', 10, 100, isin='B'),
+        trade('2025-05-02', 'sell', 10, 130, isin='A'),
+        trade('2025-05-02', 'sell', 10, 80, isin='B'),
+    ]
+    summary = summarize_capital_gains(trades)
+    assert (summary.long_term_gain, summary.short_term_loss) == (300, 200)
+    assert (summary.stcg, summary.ltcg) == (0, 100)
+    assert summary.open_lots == 0
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from tax_engine import compute_tax, compute_tax_paise, compute_tax_paise_batch, to_paise, to_paise_array
+
+
+def test_288a_rounding_counts_paise_of_capital_gains():
+    # Normal income ₹11,25,000 plus gains of ₹12,467.60 twice: the total is
+    # ₹11,49,935.20, so ₹11,49,930 after paise and ₹11,49,940 after rounding
+    result = compute_tax_paise('new', to_paise(1200000), 0, 0, 0, 0, to_paise(12467.6), to_paise(12467.6), 0)
+    assert result['total_taxable_income'] == to_paise(1149940)
+
+
+def test_288a_rounding_below_the_gains_comes_off_the_gains():
+    result = compute_tax_paise('new', 0, 0, 0, 0, 0, to_paise(12462.6), to_paise(12467.6), 0)
+    assert result['total_taxable_income'] == to_paise(24930)
+    assert result['total_income'] == 0
+
+
+def random_amounts(count, seed):
+    """Whole-₹10 amounts, so that 288A rounding leaves total income unchanged"""
+    rng = np.random.default_rng(seed)
+
+    def tens(high, share=1.0, unit=10):
+        return (rng.random(count) < share) * rng.integers(0, high // unit, count) * float(unit)
+
+    # House income in hundreds keeps 70% of it in whole tens
+    return (tens(6000000), tens(2000000, 0.3), tens(1000000, 0.3, unit=100), tens(200000, 0.3),
+            tens(200000, 0.5), tens(300000, 0.3), tens(400000, 0.3), tens(300000, 0.5))
+
+
+@pytest.mark.parametrize('regime', ['new', 'old'])
+def test_fixed_point_agrees_with_float_engine(regime):
+    for amounts in zip(*random_amounts(2000, seed=5)):
+        amounts = [float(amount) for amount in amounts]
+        computation = compute_tax(regime, *amounts)
+        result = compute_tax_paise(regime, *(to_paise(amount) for amount in amounts))
+        assert result['total_taxable_income'] == to_paise(computation.total_taxable_income)
+        # Each component is rounded to the rupee rather than the paisa
+        assert result['total_tax'] / 100 == pytest.approx(computation.total_tax, abs=3)
+
+
+def test_batch_matches_scalar():
+    columns = [to_paise_array(column) + 37 * (index < 7) for index, column in enumerate(random_amounts(3000, seed=9))]
+    regimes = np.where(np.arange(3000) % 3 == 0, 'old', 'new')
+    results = compute_tax_paise_batch(regimes, *columns)
+    for row in range(3000):
+        expected = compute_tax_paise(regimes[row], *(int(column[row]) for column in columns))
+        assert {name: values[row] for name, values in results.items()} == expected
@@ -0,0 +1,53 @@
+import datetime
+
+import pytest
+
+from tax_engine.interest import advance_tax_interest
+
+FILING_DATE = datetime.date(2026, 7, 31)
+
+
+def test_no_advance_tax_paid():
+    # 234C: 1% x 3 on 15,000 + 1% x 3 on 45,000 + 1% x 3 on 75,000 + 1% on 1,00,000
+    # 234B: 1% x 4 months (April to July) on 1,00,000
+    results = advance_tax_interest([100000], filing_date=FILING_DATE)
+    assert results['interest_234c'][0] == 450 + 1350 + 2250 + 1000
+    assert results['months_234b'][0] == 4
+    assert results['interest_234b'][0] == 4000
+
+
+def test_last_installment_short():
+    # 90% paid by 31 March: only the fourth installment defers 10,000
+    payments = [(datetime.date(2025, 6, 15), 15000), (datetime.date(2025, 9, 15), 30000),
+                (datetime.date(2025, 12, 15), 30000), (datetime.date(2026, 3, 15), 15000)]
+    results = advance_tax_interest([100000], [0] * 4, [date for date, _ in payments],
+                                   [amount for _, amount in payments], filing_date=FILING_DATE)
+    assert [results[f'shortfall_q{i}'][0] for i in range(1, 5)] == [0, 0, 0, 10000]
+    assert results['interest_234c'][0] == 100
+    assert results['interest_234b'][0] == 0
+
+
+def test_self_assessment_tax_reduces_234b_from_the_next_month():
+    # Half paid on 10 May: April and May on 1,00,000, June and July on 50,000
+    results = advance_tax_interest([100000], [0], [datetime.date(2026, 5, 10)], [50000], filing_date=FILING_DATE)
+    assert results['interest_234b'][0] == 1000 + 1000 + 500 + 500
+
+
+def test_shortfalls_round_down_to_hundreds():
+    results = advance_tax_interest([100099], filing_date=FILING_DATE)
+    assert results['shortfall_234b'][0] == 100000
+    assert results['shortfall_q1'][0] == 15000
+
+
+def test_below_threshold_no_interest():
+    results = advance_tax_interest([9999], filing_date=FILING_DATE)
+    assert results['total_interest'][0] == 0
+
+
+@pytest.mark.parametrize('liability', [100000, 250000])
+def test_each_taxpayer_in_a_book_matches_alone(liability):
+    dates = [datetime.date(2025, 6, 10), datetime.date(2026, 6, 1)]
+    book = advance_tax_interest([50000, liability], [1, 1], dates, [20000, 30000], filing_date=FILING_DATE)
+    alone = advance_tax_interest([liability], [0, 0], dates, [20000, 30000], filing_date=FILING_DATE)
+    for name, values in alone.items():
+        assert book[name][1] == values[0], name
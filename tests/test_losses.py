@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from tax_engine.batch import calculate_tax_batch
+from tax_engine.losses import CARRY_FORWARD_YEARS, HOUSE_PROPERTY_SET_OFF_LIMIT, LOSS_KINDS, set_off_losses
+
+ROWS = 3000
+
+
+def book(seed=21):
+    rng = np.random.default_rng(seed)
+
+    def amounts(low, high, share=0.5):
+        return (rng.random(ROWS) < share) * rng.uniform(low, high, ROWS).round(2)
+
+    inputs = {
+        'salary': amounts(0, 3e6, 0.7),
+        'business_income': amounts(-1.5e6, 2e6),
+        'house_income': amounts(0, 6e5, 0.3),
+        'house_loan_interest': amounts(0, 8e5, 0.3),
+        'other_sources': amounts(0, 3e5),
+        'stcg': amounts(-8e5, 8e5),
+        'ltcg': amounts(-8e5, 1.5e6),
+    }
+    brought_forward = {kind: (rng.random((ROWS, CARRY_FORWARD_YEARS)) < 0.1) * rng.uniform(0, 4e5, (ROWS, 8))
+                       for kind in LOSS_KINDS}
+    return inputs, brought_forward
+
+
+def current_losses(inputs):
+    house_property = np.maximum(0, inputs['house_loan_interest'] - 0.70 * inputs['house_income'])
+    return (house_property + np.maximum(0, -inputs['business_income']) + np.maximum(0, -inputs['stcg'])
+            + np.maximum(0, -inputs['ltcg']))
+
+
+@pytest.mark.parametrize('regime', ['new', 'old'])
+def test_every_loss_is_set_off_carried_forward_or_lapsed(regime):
+    inputs, brought_forward = book()
+    results, carried_forward = set_off_losses(regime, brought_forward=brought_forward, **inputs)
+    losses_in = current_losses(inputs) + sum(losses.sum(axis=1) for losses in brought_forward.values())
+    losses_out = (results['loss_set_off'] + results['loss_lapsed']
+                  + sum(losses.sum(axis=1) for losses in carried_forward.values()))
+    np.testing.assert_allclose(losses_out, losses_in, atol=1e-6)
+    for losses in carried_forward.values():
+        assert (losses >= 0).all()
+
+
+@pytest.mark.parametrize('regime', ['new', 'old'])
+def test_chosen_order_is_no_worse_than_normal_income_first(regime):
+    inputs, brought_forward = book()
+    results, _ = set_off_losses(regime, brought_forward=brought_forward, **inputs)
+    assert (results['tax_saving'] >= 0).all()
+    for name in ('total_income', 'stcg', 'ltcg'):
+        assert (results[name] >= 0).all()
+    np.testing.assert_allclose(results['total_taxable_income'],
+                               results['total_income'] + results['stcg'] + results['ltcg'])
+    # The tax is the regime's tax on the incomes reported
+    base_tax, surcharge, cess, _, _ = calculate_tax_batch(regime, results['total_income'], results['stcg'],
+                                                          results['ltcg'])
+    np.testing.assert_array_equal(results['total_tax'], base_tax + surcharge + cess)
+
+
+@pytest.mark.parametrize('regime', ['new', 'old'])
+def test_no_split_of_a_business_loss_costs_less(regime):
+    # Without salary a business loss can go against any income, so every
+    # split between normal income and the two kinds of gains is allowed
+    rng = np.random.default_rng(4)
+    rows = 300
+    other_sources = rng.uniform(0, 2.5e6, rows).round(2)
+    stcg = rng.uniform(0, 1e6, rows).round(2)
+    ltcg = rng.uniform(0, 2e6, rows).round(2)
+    loss = rng.uniform(0, 2e6, rows).round(2)
+    results, _ = set_off_losses(regime, other_sources=other_sources, business_income=-loss, stcg=stcg, ltcg=ltcg)
+
+    absorbed = np.minimum(loss, other_sources + stcg + ltcg)
+    steps = np.linspace(0, 1, 41)
+    for stcg_share in steps:
+        for ltcg_share in steps:
+            from_stcg = np.minimum(stcg, absorbed) * stcg_share
+            from_ltcg = np.minimum(ltcg, absorbed - from_stcg) * ltcg_share
+            from_normal = absorbed - from_stcg - from_ltcg
+            legal = from_normal <= other_sources
+            base_tax, surcharge, cess, _, _ = calculate_tax_batch(
+                regime, np.maximum(0, other_sources - from_normal), stcg - from_stcg, ltcg - from_ltcg)
+            tax = base_tax + surcharge + cess
+            assert (results['total_tax'][legal] <= tax[legal] + 0.01).all()
+
+
+def test_house_property_set_off_is_capped():
+    results, carried_forward = set_off_losses('old', salary=2000000, house_income=0, house_loan_interest=500000)
+    assert results['loss_set_off'][0] == HOUSE_PROPERTY_SET_OFF_LIMIT['old']
+    assert carried_forward['house_property'][0, 0] == 500000 - HOUSE_PROPERTY_SET_OFF_LIMIT['old']
+
+
+def test_business_loss_does_not_come_off_salary():
+    results, carried_forward = set_off_losses('new', salary=1500000, business_income=-300000)
+    assert results['loss_set_off'][0] == 0
+    assert carried_forward['business'][0, 0] == 300000
+
+
+def test_losses_lapse_after_the_last_year():
+    brought_forward = {'business': [[0] * (CARRY_FORWARD_YEARS - 1) + [100000]]}
+    results, carried_forward = set_off_losses('new', salary=1000000, brought_forward=brought_forward)
+    assert results['loss_lapsed'][0] == 100000
+    assert carried_forward['business'].sum() == 0
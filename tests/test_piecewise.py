@@ -0,0 +1,39 @@
+import math
+
+import numpy as np
+import pytest
+
+from tax_engine import calculate_tax_new_regime, calculate_tax_old_regime
+from tax_engine.piecewise import compile_tax_function
+from tax_engine.rules import load_rules
+
+REGIME_FUNCTIONS = {'new': calculate_tax_new_regime, 'old': calculate_tax_old_regime}
+
+
+def scalar_tax(regime, income, stcg, ltcg):
+    return sum(REGIME_FUNCTIONS[regime](income, stcg, ltcg)[:3])
+
+
+def test_surcharge_jump_lands_on_the_scalar_side():
+    stcg, ltcg = 732231.55, 23755.29
+    tax = compile_tax_function('old', stcg, ltcg)
+    income = math.nextafter(50000000 - (stcg + ltcg), math.inf)
+    assert tax.tax(income) == pytest.approx(scalar_tax('old', income, stcg, ltcg), abs=0.02)
+
+
+@pytest.mark.parametrize('regime', ['new', 'old'])
+def test_breakpoints_match_scalar_on_both_sides(regime):
+    rng = np.random.default_rng(7)
+    rules = load_rules(regime)
+    for stcg, ltcg in rng.uniform(0, 2e6, (200, 2)).round(2):
+        stcg, ltcg = float(stcg), float(ltcg)
+        tax = compile_tax_function(regime, stcg, ltcg)
+        limits = [rules.rebate_limit, *rules.surcharge.thresholds]
+        for breakpoint in tax.breakpoints:
+            for income in (breakpoint, math.nextafter(breakpoint, math.inf)):
+                assert tax.tax(income) == pytest.approx(scalar_tax(regime, income, stcg, ltcg), abs=0.02)
+        for limit in limits:
+            if limit - stcg - ltcg > 0:
+                # The jump sits on a breakpoint that is the last income within the limit
+                assert any(b + stcg + ltcg <= limit < math.nextafter(b, math.inf) + stcg + ltcg
+                           for b in tax.breakpoints)
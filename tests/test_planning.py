@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from tax_engine import compute_tax
+from tax_engine.planning import regime_tax_curves
+
+REGIMES = ('new', 'old')
+
+
+def check_curves(curves, amounts):
+    """Every point, both sides of each jump and each segment's middle against compute_tax"""
+    salary = curves['salary']
+
+    def expected(regime, at):
+        return compute_tax(regime, salary=at, **amounts).total_tax
+
+    for index, knot in enumerate(salary):
+        if index + 1 < len(salary) and salary[index + 1] == knot:
+            at = knot - 0.01          # lower side of a jump: the limit from the left
+        elif index > 0 and salary[index - 1] == knot:
+            at = knot + 0.01          # upper side: the limit from the right
+        else:
+            at = knot
+        for regime in REGIMES:
+            assert curves[f'{regime}_tax'][index] == pytest.approx(expected(regime, at), abs=0.5), (regime, knot)
+
+    for index in np.flatnonzero(np.diff(salary) > 0.02):
+        middle = (salary[index] + salary[index + 1]) / 2
+        for regime in REGIMES:
+            line = np.interp(middle, salary[index:index + 2], curves[f'{regime}_tax'][index:index + 2])
+            assert line == pytest.approx(expected(regime, middle), abs=0.5), (regime, middle)
+
+
+def test_jump_at_the_rebate_limit_is_drawn():
+    curves = regime_tax_curves(stcg=204464, ltcg=76633)
+    jumps = np.flatnonzero(np.diff(curves['salary']) == 0)
+    assert any(curves['new_tax'][i] == pytest.approx(62400) and curves['new_tax'][i + 1] > 80000 for i in jumps)
+    check_curves(curves, {'stcg': 204464, 'ltcg': 76633})
+
+
+@pytest.mark.parametrize('decimals', [0, 2])
+def test_curves_match_compute_tax(decimals):
+    rng = np.random.default_rng(17 + decimals)
+    for _ in range(40):
+        amounts = {
+            'business_income': rng.choice([0, 1]) * round(rng.uniform(0, 8e5), decimals),
+            'house_income': rng.choice([0, 1]) * round(rng.uniform(0, 5e5), decimals),
+            'house_loan_interest': rng.choice([0, 1]) * round(rng.uniform(0, 2e5), decimals),
+            'other_sources': rng.choice([0, 1]) * round(rng.uniform(0, 3e5), decimals),
+            'stcg': rng.choice([0, 1]) * round(rng.uniform(0, 6e5), decimals),
+            'ltcg': rng.choice([0, 1]) * round(rng.uniform(0, 9e5), decimals),
+        }
+        curves = regime_tax_curves(max_salary=rng.choice([4e6, 6e7]), **amounts)
+        check_curves(curves, amounts)
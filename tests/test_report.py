@@ -0,0 +1,56 @@
+import os
+import re
+import zipfile
+
+import pytest
+
+from tax_engine import compute_tax, compute_tax_batch, create_bulk_excel_report, create_computation_excel_report, report
+from tax_engine.payroll import export_payroll_workbook
+
+try:
+    import resource
+except ImportError:     # not on Windows
+    resource = None
+
+
+def test_bulk_report_writes_summary_and_linked_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(report, 'TAXPAYERS_PER_SHEET', 20)
+    path = tmp_path / 'computations.xlsx'
+    taxpayers = ((f'EMP{index:03d}', compute_tax('new', 1000000 + index * 1000)) for index in range(50))
+    assert create_bulk_excel_report(str(path), taxpayers) == 50
+    workbook = zipfile.ZipFile(path)
+    sheets = [name for name in workbook.namelist() if name.startswith('xl/worksheets/sheet')]
+    assert len(sheets) == 4     # Summary and three Computations sheets
+    links = re.findall(r'location="([^"]+)"', workbook.read('xl/worksheets/sheet1.xml').decode())
+    assert links[0] == "'Computations 1'!A1"
+    assert links[20] == "'Computations 2'!A1"
+    assert len(links) == 50
+
+
+@pytest.mark.skipif(resource is None or not os.path.isdir('/proc/self/fd'), reason="needs RLIMIT_NOFILE and /proc")
+def test_payroll_workbook_needs_no_file_per_employee(tmp_path):
+    employees = tmp_path / 'employees.csv'
+    employees.write_text('salary,tds_paid\n' + ''.join(f'{1000000 + row * 100},{row}\n' for row in range(1500)))
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    # Well below one file per employee
+    limit = len(os.listdir('/proc/self/fd')) + 32
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+    try:
+        assert export_payroll_workbook(str(employees), str(tmp_path / 'computations.xlsx')) == 1500
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_net_long_term_loss_counts_as_nil_in_the_report():
+    computation = compute_tax('new', salary=1500000, stcg=100000, ltcg=-250000)
+    assert computation == compute_tax('new', salary=1500000, stcg=100000)
+    assert computation.ltcg == 0
+    batch = compute_tax_batch('new', [1500000], 0, 0, 0, 0, 100000, -250000, 0)
+    assert batch['total_taxable_income'][0] == computation.total_taxable_income
+
+    workbook = zipfile.ZipFile(create_computation_excel_report(computation))
+    sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+    # Numeric cells are the ones without a t="s" (shared string) type
+    amounts = [float(value) for value in re.findall(r'<c r="[A-Z]+\d+"(?: s="\d+")?><v>([^<]+)</v>', sheet)]
+    assert amounts and min(amounts) >= 0
+    assert 'Long Term' not in workbook.read('xl/sharedStrings.xml').decode()
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+from tax_engine import service
+from tax_engine.service import MicroBatcher, RequestError, TaxService, parse_taxpayer
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), 10 ** 400])
+def test_parse_taxpayer_rejects_non_finite_amounts(value):
+    with pytest.raises(RequestError):
+        parse_taxpayer({'salary': value})
+
+
+def test_overflowing_body_is_a_bad_request():
+    status, payload = asyncio.run(TaxService()._dispatch('POST', '/compute', b'{"salary": 1' + b'0' * 400 + b'}'))
+    assert status == 400
+    assert 'salary' in payload['error']
+
+
+def test_nan_body_is_a_bad_request():
+    status, payload = asyncio.run(TaxService()._dispatch('POST', '/compute', b'{"salary": NaN}'))
+    assert status == 400
+    json.dumps(payload, allow_nan=False)
+
+
+def test_failed_batch_only_fails_the_bad_request(monkeypatch):
+    compute_tax_batch = service.compute_tax_batch
+
+    def failing_batch(regime, salary, *columns, **kwargs):
+        if 13.0 in salary:
+            raise ArithmeticError("bad row")
+        return compute_tax_batch(regime, salary, *columns, **kwargs)
+
+    monkeypatch.setattr(service, 'compute_tax_batch', failing_batch)
+
+    async def run():
+        batcher = MicroBatcher(window=0.01)
+        return await asyncio.gather(
+            batcher.compute([parse_taxpayer({'salary': 1500000})]),
+            batcher.compute([parse_taxpayer({'salary': 13})]),
+            batcher.compute([parse_taxpayer({'salary': 900000})]),
+            return_exceptions=True)
+
+    good, bad, other = asyncio.run(run())
+    assert isinstance(bad, ArithmeticError)
+    assert good[0]['total_tax'] > 0
+    assert other[0]['total_tax'] >= 0
+
+
+def test_engine_failure_is_answered_with_500(monkeypatch):
+    def failing_batch(*columns, **kwargs):
+        raise ArithmeticError("engine failure")
+
+    monkeypatch.setattr(service, 'compute_tax_batch', failing_batch)
+
+    async def run():
+        server = await TaxService(MicroBatcher(window=0.001)).start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            body = b'{"salary": 1500000}'
+            writer.write(b'POST /compute HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+                         b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        return response
+
+    head, _, body = asyncio.run(run()).partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 500 ')
+    assert 'error' in json.loads(body)